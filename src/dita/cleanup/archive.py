@@ -0,0 +1,321 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import argparse
+import copy
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+
+from collections.abc import Iterator, Mapping
+from errno import EPERM
+from io import BytesIO
+from lxml import etree
+from pathlib import Path
+from typing import Final
+from .catalog import Catalog
+from .hooks import HOOKS, Event, emit
+from .limits import LimitExceeded, Limits, check_elements, check_size, time_limit
+from .out import warn
+from .patch import serialize_xml, snapshot_attributes
+from .suggest import SuggestionIndex
+from .validate import Validator
+from .xml import list_ids, parse_xml, prune_ids, prune_xrefs, replace_attributes, \
+     report_problems, update_xref_targets
+
+__all__ = [
+    'ArchiveWriter', 'is_archive', 'process_archive', 'read_archive'
+]
+
+# Supported archive formats and the modes in which tar files are written:
+TAR_MODES: Final = {
+    '.tar':     'w',
+    '.tar.gz':  'w:gz',
+    '.tgz':     'w:gz',
+    '.tar.bz2': 'w:bz2',
+    '.tbz2':    'w:bz2',
+    '.tar.xz':  'w:xz',
+    '.txz':     'w:xz',
+}
+
+Member = zipfile.ZipInfo | tarfile.TarInfo
+
+def archive_suffix(file_path: str | Path) -> str:
+    name = str(file_path).lower()
+
+    for suffix in sorted(['.zip', *TAR_MODES], key=len, reverse=True):
+        if name.endswith(suffix):
+            return suffix
+
+    return ''
+
+def is_archive(file_path: str | Path) -> bool:
+    return bool(archive_suffix(file_path))
+
+def member_name(info: Member) -> str:
+    return info.filename if isinstance(info, zipfile.ZipInfo) else info.name
+
+def read_archive(file_path: str | Path) -> Iterator[tuple[Member, bytes | None]]:
+    if str(file_path).lower().endswith('.zip'):
+        with zipfile.ZipFile(file_path) as zip_file:
+            for zip_info in zip_file.infolist():
+                yield zip_info, None if zip_info.is_dir() else zip_file.read(zip_info)
+        return
+
+    # Tar files are read as a stream so that compressed archives are not
+    # decompressed more than once per pass:
+    with tarfile.open(file_path, 'r|*') as tar_file:
+        for tar_info in tar_file:
+            member = tar_file.extractfile(tar_info) if tar_info.isfile() else None
+            yield tar_info, member.read() if member else None
+
+class ArchiveWriter:
+    __slots__ = ('_zip', '_tar')
+
+    def __init__(self, file_path: str | Path) -> None:
+        suffix = archive_suffix(file_path)
+
+        self._zip: zipfile.ZipFile | None = None
+        self._tar: tarfile.TarFile | None = None
+
+        if suffix == '.zip':
+            self._zip = zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            self._tar = tarfile.open(file_path, TAR_MODES[suffix])  # type: ignore[call-overload]
+
+    def add(self, info: Member, data: bytes | None) -> None:
+        if self._zip is not None:
+            if not isinstance(info, zipfile.ZipInfo):
+                zip_info = zipfile.ZipInfo(info.name + ('/' if info.isdir() and not info.name.endswith('/') else ''), time.localtime(max(info.mtime, 315532800))[:6])
+                zip_info.compress_type = zipfile.ZIP_DEFLATED
+                zip_info.external_attr = (info.mode & 0o7777) << 16
+            else:
+                zip_info = info
+
+            if data is not None or zip_info.is_dir():
+                self._zip.writestr(zip_info, data or b'')
+            return
+
+        assert self._tar is not None
+
+        if isinstance(info, zipfile.ZipInfo):
+            tar_info = tarfile.TarInfo(info.filename.rstrip('/'))
+            tar_info.mtime = int(time.mktime(info.date_time + (0, 0, -1)))
+            tar_info.mode = (info.external_attr >> 16) & 0o7777 or (0o755 if info.is_dir() else 0o644)
+            tar_info.type = tarfile.DIRTYPE if info.is_dir() else tarfile.REGTYPE
+        else:
+            tar_info = copy.copy(info)
+
+        if data is not None:
+            tar_info.size = len(data)
+            self._tar.addfile(tar_info, BytesIO(data))
+        else:
+            self._tar.addfile(tar_info)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+# New archives get the default permissions of new files; replaced ones keep
+# theirs:
+def copy_mode(source_path: Path, target_path: Path) -> None:
+    if source_path.exists():
+        shutil.copymode(source_path, target_path)
+        return
+
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(target_path, 0o666 & ~umask)
+
+def process_archive(args: argparse.Namespace, attributes: Mapping[str, str] | None = None, limits: Limits | None = None) -> int:
+    exit_code = 0
+    xml_ids   = Catalog()
+    stored: dict[str, tuple[bytes, bool]] = {}
+    validator: Validator | None = None
+    xref_dir  = Path(args.xref_dir) if args.xref_dir else None
+    count     = 0
+
+    if args.validate:
+        validator = Validator(args.xml_catalog or os.environ.get('XML_CATALOG_FILES', '').split())
+
+    if HOOKS:
+        emit(Event('phase_start', 'process'))
+
+    # The first pass transforms the topics, keeps those that changed or
+    # need their cross references updated, and builds the catalog of IDs
+    # from the archive members in the --xref-dir directory:
+    try:
+        for info, data in read_archive(args.archive):
+            file_path = member_name(info)
+
+            if data is None or not file_path.endswith('.dita'):
+                continue
+
+            count += 1
+
+            if HOOKS:
+                emit(Event('file_start', file_path=file_path))
+
+            updated  = False
+            snapshot = None
+
+            try:
+                check_size(data, limits)
+
+                with time_limit(limits.timeout if limits else None):
+                    xml = parse_xml(BytesIO(data))
+                    check_elements(xml, limits)
+                    snapshot = snapshot_attributes(xml) if args.patch else None
+
+                    if (args.conref_target or attributes) and replace_attributes(xml, args.conref_target.strip() if args.conref_target else None, attributes):
+                        updated  = True
+                        snapshot = None
+
+                    if args.prune_ids and prune_ids(xml):
+                        updated = True
+
+                    if args.prune_xrefs and prune_xrefs(xml):
+                        updated = True
+
+                    if args.verbose:
+                        report_problems(xml, Path(file_path))
+            except etree.XMLSyntaxError as message:
+                warn(file_path + ": " + str(message))
+                exit_code = EPERM
+                if HOOKS:
+                    emit(Event('file_end', file_path=file_path))
+                continue
+            except LimitExceeded as message:
+                warn(file_path + ": " + str(message))
+                exit_code = EPERM
+
+                # Skipped members are copied unchanged, but links to them
+                # are still resolved:
+                if xref_dir is not None and Path(file_path).is_relative_to(xref_dir):
+                    try:
+                        xml_ids.add_file(Path(file_path), list_ids(parse_xml(BytesIO(data))))
+                    except etree.XMLSyntaxError:
+                        pass
+
+                if HOOKS:
+                    emit(Event('file_end', file_path=file_path))
+                continue
+
+            queued = False
+
+            if xref_dir is not None:
+                if Path(file_path).is_relative_to(xref_dir):
+                    xml_ids.add_file(Path(file_path), list_ids(xml))
+
+                queued = bool(xml.xpath('boolean(//xref[contains(@href, "#")] | //link[contains(@href, "#")])'))
+
+            if validator and not queued:
+                for problem in validator.validate(xml, Path(file_path)):
+                    warn(problem)
+
+            if updated or queued:
+                stored[file_path] = (serialize_xml(xml, data, snapshot) if updated else data, queued)
+
+            if HOOKS:
+                emit(Event('file_end', file_path=file_path, updated=updated))
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as message:
+        warn(str(message))
+        return EPERM
+
+    if HOOKS:
+        emit(Event('phase_end', 'process', files=count))
+
+    suggestions = SuggestionIndex(xml_ids) if xref_dir is not None else None
+    target_path = Path(args.output or args.archive)
+    xref_count  = sum(1 for _, queued in stored.values() if queued)
+
+    if HOOKS:
+        emit(Event('phase_start', 'xref', files=xref_count))
+
+    # The second pass writes all members to a new archive in their
+    # original order, which replaces the target only once it is complete:
+    with tempfile.NamedTemporaryFile(dir=target_path.parent, prefix='.' + target_path.name + '.', suffix=archive_suffix(target_path), delete=False) as f:
+        temp_path = Path(f.name)
+
+    try:
+        with ArchiveWriter(temp_path) as writer:
+            for info, data in read_archive(args.archive):
+                file_path = member_name(info)
+
+                if file_path not in stored:
+                    writer.add(info, data)
+                    continue
+
+                data, queued = stored.pop(file_path)
+
+                if queued:
+                    if HOOKS:
+                        emit(Event('file_start', file_path=file_path))
+
+                    try:
+                        with time_limit(limits.timeout if limits else None):
+                            xml      = parse_xml(BytesIO(data))
+                            snapshot = snapshot_attributes(xml) if args.patch else None
+                            updated  = update_xref_targets(xml, xml_ids, Path(file_path), args.aggressive, suggestions)
+                    except LimitExceeded as message:
+                        warn(file_path + ": " + str(message))
+                        exit_code = EPERM
+                        writer.add(info, data)
+                        if HOOKS:
+                            emit(Event('file_end', file_path=file_path))
+                        continue
+
+                    if validator:
+                        for problem in validator.validate(xml, Path(file_path)):
+                            warn(problem)
+
+                    if updated:
+                        data = serialize_xml(xml, data, snapshot)
+
+                    if HOOKS:
+                        emit(Event('file_end', file_path=file_path, updated=updated))
+
+                writer.add(info, data)
+
+        copy_mode(target_path, temp_path)
+        os.replace(temp_path, target_path)
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as message:
+        warn(str(message))
+        temp_path.unlink(missing_ok=True)
+        return EPERM
+
+    if HOOKS:
+        emit(Event('phase_end', 'xref', files=xref_count))
+
+    return exit_code
@@ -0,0 +1,65 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import re
+
+from pathlib import Path
+from typing import Final
+from .xml import substitute_attributes
+
+__all__ = [
+    'parse_attributes', 'read_attributes'
+]
+
+# Attribute entries, including those that unset the attribute with an
+# exclamation mark before or after its name:
+RE_ATTRIBUTE_ENTRY: Final = re.compile(r'^:(?P<unset>!?)(?P<name>[0-9A-Za-z_][0-9A-Za-z_-]*)(?P<unset_after>!?):(?:[ \t]+(?P<value>.*?))?[ \t]*$')
+
+def parse_attributes(text: str) -> dict[str, str]:
+    result: dict[str, str] = {}
+    lines  = iter(text.splitlines())
+
+    for line in lines:
+        if not (match := RE_ATTRIBUTE_ENTRY.match(line)):
+            continue
+
+        name  = match['name'].lower()
+        value = match['value'] or ''
+
+        # Values that end with a backslash continue on the next line:
+        while value.endswith(' \\'):
+            value = value[:-2].rstrip() + ' ' + next(lines, '').strip()
+
+        if match['unset'] or match['unset_after']:
+            result.pop(name, None)
+            continue
+
+        # References to attributes that are already defined are resolved
+        # at the time of definition:
+        result[name] = substitute_attributes(value, result)
+
+    return result
+
+def read_attributes(file_path: str | Path) -> dict[str, str]:
+    with open(file_path, encoding='utf-8') as f:
+        return parse_attributes(f.read())
@@ -0,0 +1,656 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import time
+
+from collections.abc import Callable, Collection, Iterator, Mapping
+from lxml import etree
+from pathlib import Path
+from typing import Final
+from .hooks import HOOKS, Event, emit
+from .limits import LimitExceeded, Limits, check_elements, check_size, time_limit
+from .out import warn
+from .xml import list_ids, list_links, match_candidates, match_ids, parse_xml
+
+__all__ = [
+    'Catalog', 'MappedCatalog', 'catalog_ids', 'complete_catalog', 'index_links', 'list_files',
+    'load_catalog', 'save_catalog', 'update_catalog'
+]
+
+CATALOG_MAGIC:   Final = b'DITACAT\0'
+CATALOG_VERSION: Final = 3
+
+# Header: magic, format version, number of files, IDs, and links
+HEADER: Final = struct.Struct('<8sIIII')
+
+# File record: path offset and length, topic ID offset and length, size,
+# modification time in nanoseconds, content digest
+FILE_RECORD: Final = struct.Struct('<IIIIqq16s')
+
+# ID record: ID offset and length, index of the file record
+ID_RECORD: Final = struct.Struct('<III')
+
+# Link record: target path offset and length, index of the source file
+LINK_RECORD: Final = struct.Struct('<III')
+
+def list_files(directory: str | Path, exclude: str | Path | None = None) -> list[Path]:
+    result: list[Path] = []
+    excluded = Path(exclude).resolve() if exclude else None
+    if HOOKS:
+        emit(Event('phase_start', 'walk'))
+    for root, dirs, files in Path(directory).walk(top_down=True, on_error=print):
+        # Skip the excluded directory, for example the output directory
+        # inside the scanned one:
+        if excluded is not None:
+            dirs[:] = [d for d in dirs if d != excluded.name or Path(root, d).resolve() != excluded]
+        for name in files:
+            if name.endswith('.dita'):
+                result.append(Path(root, name))
+                if HOOKS:
+                    emit(Event('file_found', file_path=str(result[-1])))
+    if HOOKS:
+        emit(Event('phase_end', 'walk', files=len(result)))
+    return result
+
+def file_digest(file_path: Path) -> bytes:
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).digest()
+
+def defines_ids(file_path: Path, pattern: re.Pattern[bytes]) -> bool:
+    try:
+        data = file_path.read_bytes()
+    except OSError:
+        return True
+
+    # Files that are not ASCII-compatible cannot be searched as bytes:
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return True
+
+    return pattern.search(data) is not None
+
+# Files that exceed the limits are left out of the catalog instead of being
+# parsed without them. Files that were already reported as skipped while
+# they were processed are not reported again:
+def parse_file(file_path: Path, limits: Limits | None = None, reported: Collection[Path] = ()) -> etree._ElementTree | None:
+    try:
+        check_size(file_path, limits)
+
+        with time_limit(limits.timeout if limits else None):
+            xml = parse_xml(file_path)
+            check_elements(xml, limits)
+    except (etree.XMLSyntaxError, OSError) as message:
+        warn(str(message))
+        return None
+    except LimitExceeded as message:
+        if file_path.resolve() not in reported:
+            warn(str(file_path) + ": " + str(message))
+        return None
+
+    return xml
+
+def catalog_ids(directory: str | Path, id_lists: Mapping[Path, list[str]] | None = None, link_lists: dict[Path, list[str]] | None = None, targets: Collection[str] | None = None, exclude: str | Path | None = None, limits: Limits | None = None, skipped: Collection[Path] = ()) -> 'Catalog':
+    result  = Catalog()
+    start   = time.perf_counter()
+    pattern = None
+
+    # With a selection of target IDs, only files that contain any of the
+    # IDs they can match as the value of an id attribute are parsed:
+    if targets is not None:
+        candidates = sorted({c for i in targets for c in match_candidates(i)})
+        pattern = re.compile(rb'(?<![\w:.-])id\s*=\s*(["\'])(?:' + (b'|'.join(re.escape(c.encode('utf-8')) for c in candidates) or rb'(?!)') + rb')\1')
+
+    file_list = list_files(directory, exclude)
+
+    if HOOKS:
+        emit(Event('phase_start', 'catalog', files=len(file_list)))
+
+    for file_path in file_list:
+        if HOOKS:
+            emit(Event('file_start', file_path=str(file_path)))
+
+        resolved_path = file_path.resolve() if id_lists or link_lists is not None else file_path
+
+        if id_lists and resolved_path in id_lists and (link_lists is None or resolved_path in link_lists):
+            id_list = id_lists[resolved_path]
+        elif pattern is not None and not defines_ids(file_path, pattern):
+            id_list = []
+        elif (xml := parse_file(file_path, limits, skipped)) is None:
+            id_list = []
+        else:
+            id_list = list_ids(xml)
+
+            if link_lists is not None:
+                link_lists[resolved_path] = list_links(xml)
+
+        result.add_file(file_path, id_list)
+
+        if HOOKS:
+            emit(Event('file_end', file_path=str(file_path)))
+
+    if HOOKS:
+        emit(Event('phase_end', 'catalog', files=len(file_list)))
+        emit(Event('catalog', str(directory), duration=time.perf_counter() - start, elements=len(result), files=len(file_list)))
+
+    return result
+
+# The catalog is rebuilt in the order of the directory walk so that each
+# duplicate ID refers to the same file as after a full scan. Duplicates
+# that were already reported are not reported again:
+def complete_catalog(catalog: 'Catalog', directory: str | Path, exclude: str | Path | None = None, limits: Limits | None = None, skipped: Collection[Path] = ()) -> None:
+    known    = dict(catalog.id_lists())
+    reported = {file_path: {i for i in id_list if catalog[i][1] != file_path} for file_path, id_list in known.items()}
+    records: list[tuple[Path, list[str]]] = []
+    parsed   = False
+
+    for file_path in list_files(directory, exclude):
+        if file_path in known:
+            records.append((file_path, known[file_path]))
+            continue
+
+        if (xml := parse_file(file_path, limits, skipped)) is None:
+            continue
+
+        records.append((file_path, list_ids(xml)))
+        parsed = True
+
+    if not parsed:
+        return
+
+    catalog.clear()
+
+    for file_path, id_list in records:
+        catalog.add_file(file_path, id_list, reported=reported.get(file_path, set()))
+
+def index_links(directory: str | Path, xml_ids: Mapping[str, tuple[str, Path]], link_lists: Mapping[Path, list[str]]) -> dict[str, set[str]]:
+    result: dict[str, set[str]] = {}
+    base = Path(directory).resolve()
+
+    for source_path, hrefs in link_lists.items():
+        if not source_path.is_relative_to(base):
+            continue
+
+        source = source_path.relative_to(base).as_posix()
+
+        for href in hrefs:
+            xref_file, _, anchor = href.partition('#')
+
+            if xref_file:
+                target_path = Path(os.path.normpath(source_path.parent / xref_file))
+            else:
+                match = match_ids(anchor.rpartition('/')[2], xml_ids)
+
+                if len(match) != 1:
+                    continue
+
+                target_path = xml_ids[match[0]][1].resolve()
+
+            if not target_path.is_relative_to(base):
+                continue
+
+            target = target_path.relative_to(base).as_posix()
+
+            if target != source:
+                result.setdefault(target, set()).add(source)
+
+    return result
+
+def read_statuses(catalog_file: str | Path, directory: str | Path) -> dict[Path, tuple[int, int, bytes]]:
+    try:
+        catalog = MappedCatalog(catalog_file, directory)
+    except (OSError, ValueError):
+        return {}
+
+    try:
+        return catalog.statuses()
+    finally:
+        catalog.close()
+
+def save_catalog(catalog_file: str | Path, xml_ids: Mapping[str, tuple[str, Path]], directory: str | Path, links: Mapping[str, set[str]] | None = None, exclude: str | Path | None = None) -> None:
+    topics: dict[Path, str] = {}
+    links = links or {}
+
+    for topic_id, file_path in xml_ids.values():
+        topics[file_path] = topic_id
+
+    strings = bytearray()
+
+    def add_string(value: str) -> tuple[int, int]:
+        data   = value.encode('utf-8')
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    file_list    = sorted(list_files(directory, exclude))
+    file_index   = {}
+    file_records = bytearray()
+    previous     = read_statuses(catalog_file, directory)
+
+    for index, file_path in enumerate(file_list):
+        path = file_path.relative_to(directory).as_posix()
+
+        path_offset, path_length   = add_string(path)
+        topic_offset, topic_length = add_string(topics.get(file_path, ''))
+
+        status = file_path.stat()
+
+        # Only files that changed since the previous catalog are read:
+        if (record := previous.get(file_path)) and record[:2] == (status.st_size, status.st_mtime_ns):
+            digest = record[2]
+        else:
+            digest = file_digest(file_path)
+
+        file_records.extend(FILE_RECORD.pack(path_offset, path_length, topic_offset, topic_length, status.st_size, status.st_mtime_ns, digest))
+        file_index[path] = index
+
+    id_records = bytearray()
+    id_count   = 0
+
+    for xml_id in sorted(xml_ids.keys()):
+        topic_id, file_path = xml_ids[xml_id]
+        path = file_path.relative_to(directory).as_posix()
+
+        if path not in file_index:
+            continue
+
+        id_offset, id_length = add_string(xml_id)
+        id_records.extend(ID_RECORD.pack(id_offset, id_length, file_index[path]))
+        id_count += 1
+
+    link_records = bytearray()
+    link_count   = 0
+
+    for target in sorted(links, key=lambda t: t.encode('utf-8')):
+        sources = sorted(file_index[s] for s in links[target] if s in file_index)
+
+        if not sources:
+            continue
+
+        target_offset, target_length = add_string(target)
+
+        for source in sources:
+            link_records.extend(LINK_RECORD.pack(target_offset, target_length, source))
+            link_count += 1
+
+    temp_file = Path(str(catalog_file) + '.tmp')
+
+    with open(temp_file, 'wb') as f:
+        f.write(HEADER.pack(CATALOG_MAGIC, CATALOG_VERSION, len(file_list), id_count, link_count))
+        f.write(file_records)
+        f.write(id_records)
+        f.write(link_records)
+        f.write(strings)
+
+    os.replace(temp_file, catalog_file)
+
+def load_catalog(catalog_file: str | Path, directory: str | Path, renames: list[tuple[Path, Path]] | None = None, validate: bool = True, exclude: str | Path | None = None) -> 'MappedCatalog | None':
+    try:
+        catalog = MappedCatalog(catalog_file, directory)
+    except (OSError, ValueError) as message:
+        warn(str(catalog_file) + ": Cannot load catalog: " + str(message))
+        return None
+
+    for old_path, new_path in renames or []:
+        catalog.rename(old_path, new_path)
+
+    if validate and not catalog.is_current(exclude):
+        warn(str(catalog_file) + ": Catalog does not match the contents of " + str(directory))
+        catalog.close()
+        return None
+
+    return catalog
+
+class Catalog(Mapping[str, tuple[str, Path]]):
+    __slots__ = ('_files', '_ids', '_id_lists', '_paths')
+
+    def __init__(self) -> None:
+        self._files: list[tuple[str, Path] | None] = []
+        self._ids: dict[str, int] = {}
+        self._id_lists: list[list[str] | None] = []
+        self._paths: dict[Path, list[int]] | None = None
+
+    def add_file(self, file_path: Path, id_list: list[str], is_known: Callable[[str], bool] | None = None, reported: Collection[str] = ()) -> None:
+        if not id_list:
+            return
+
+        # Every ID from the same file refers to the same file record and the
+        # same integer object:
+        index = len(self._files)
+        self._files.append((id_list[0], file_path))
+        self._id_lists.append(id_list)
+
+        if self._paths is not None:
+            self._paths.setdefault(file_path, []).append(index)
+
+        for xml_id in id_list:
+            if xml_id in self._ids or (is_known and is_known(xml_id)):
+                if xml_id not in reported:
+                    warn(str(file_path) + ": Duplicate ID: " + xml_id)
+                continue
+
+            self._ids[xml_id] = index
+
+    # Only the IDs of the removed file are deleted; IDs that were reported
+    # as duplicates belong to the file that defined them first. The index
+    # of file paths is built on the first removal because hashing a path
+    # caches its string forms:
+    def remove_file(self, file_path: Path) -> None:
+        if self._paths is None:
+            self._paths = {}
+
+            for index, record in enumerate(self._files):
+                if record:
+                    self._paths.setdefault(record[1], []).append(index)
+
+        for index in self._paths.pop(file_path, []):
+            for xml_id in self._id_lists[index] or []:
+                if self._ids.get(xml_id) == index:
+                    del self._ids[xml_id]
+
+            self._files[index]    = None
+            self._id_lists[index] = None
+
+    def files(self) -> Iterator[tuple[Path, str]]:
+        for record in self._files:
+            if record:
+                yield record[1], record[0]
+
+    def id_lists(self) -> Iterator[tuple[Path, list[str]]]:
+        for record, id_list in zip(self._files, self._id_lists):
+            if record and id_list:
+                yield record[1], id_list
+
+    def clear(self) -> None:
+        self._files.clear()
+        self._ids.clear()
+        self._id_lists.clear()
+        self._paths = None
+
+    def __getitem__(self, key: str) -> tuple[str, Path]:
+        return self._files[self._ids[key]]  # type: ignore[return-value]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+def update_catalog(catalog: 'MappedCatalog', changed: list[Path], deleted: list[Path], id_lists: Mapping[Path, list[str]] | None = None, link_lists: dict[Path, list[str]] | None = None, limits: Limits | None = None, skipped: Collection[Path] = ()) -> None:
+    directory = catalog.directory.resolve()
+
+    for file_path in deleted:
+        if file_path.resolve().is_relative_to(directory):
+            catalog.remove_file(file_path)
+
+    for file_path in changed:
+        resolved_path = file_path.resolve()
+
+        if not resolved_path.is_relative_to(directory):
+            continue
+
+        if id_lists and resolved_path in id_lists and (link_lists is None or resolved_path in link_lists):
+            id_list = id_lists[resolved_path]
+        else:
+            if (xml := parse_file(file_path, limits, skipped)) is None:
+                catalog.remove_file(file_path)
+                continue
+
+            id_list = list_ids(xml)
+
+            if link_lists is not None:
+                link_lists[resolved_path] = list_links(xml)
+
+        catalog.add_file(file_path, id_list)
+
+def open_catalog(catalog_file: str | Path, directory: str | Path, renames: dict[str, str], removed: set[str], added: Catalog) -> 'MappedCatalog':
+    catalog = MappedCatalog(catalog_file, directory)
+    catalog._renames.update(renames)
+    catalog._removed.update(removed)
+    catalog._added = added
+    return catalog
+
+class MappedCatalog(Mapping[str, tuple[str, Path]]):
+    def __init__(self, catalog_file: str | Path, directory: str | Path) -> None:
+        self.catalog_file = Path(catalog_file)
+        self.directory = Path(directory)
+        self._renames: dict[str, str] = {}
+        self._removed: set[str] = set()
+        self._added = Catalog()
+
+        with open(catalog_file, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._data) < HEADER.size:
+            self.close()
+            raise ValueError('Truncated header')
+
+        magic, version = struct.unpack_from('<8sI', self._data, 0)
+
+        if magic != CATALOG_MAGIC:
+            self.close()
+            raise ValueError('Not a catalog file')
+        if version != CATALOG_VERSION:
+            self.close()
+            raise ValueError(f'Unsupported catalog version: {version}')
+
+        _, _, self._file_count, self._id_count, self._link_count = HEADER.unpack_from(self._data, 0)
+
+        self._files   = HEADER.size
+        self._ids     = self._files + self._file_count * FILE_RECORD.size
+        self._links   = self._ids + self._id_count * ID_RECORD.size
+        self._strings = self._links + self._link_count * LINK_RECORD.size
+
+        if len(self._data) < self._strings:
+            self.close()
+            raise ValueError('Truncated catalog')
+
+    def close(self) -> None:
+        self._data.close()
+
+    def __reduce__(self) -> tuple[object, tuple[Path, Path, dict[str, str], set[str], Catalog]]:
+        return open_catalog, (self.catalog_file, self.directory, self._renames, self._removed, self._added)
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings + offset
+        return self._data[start:start + length]
+
+    def _id(self, index: int) -> bytes:
+        offset, length, _ = ID_RECORD.unpack_from(self._data, self._ids + index * ID_RECORD.size)
+        return self._string(offset, length)
+
+    def _link(self, index: int) -> tuple[bytes, int]:
+        offset, length, source = LINK_RECORD.unpack_from(self._data, self._links + index * LINK_RECORD.size)
+        return self._string(offset, length), source
+
+    def _file(self, index: int) -> tuple[str, str, int]:
+        path_offset, path_length, topic_offset, topic_length, size, _, _ = \
+            FILE_RECORD.unpack_from(self._data, self._files + index * FILE_RECORD.size)
+        path = self._string(path_offset, path_length).decode('utf-8')
+        return self._renames.get(path, path), \
+               self._string(topic_offset, topic_length).decode('utf-8'), size
+
+    def _status(self, index: int) -> tuple[int, int, bytes]:
+        _, _, _, _, size, mtime, digest = FILE_RECORD.unpack_from(self._data, self._files + index * FILE_RECORD.size)
+        return size, mtime, digest
+
+    def _relative(self, file_path: str | Path) -> str:
+        return Path(os.path.relpath(file_path, self.directory)).as_posix()
+
+    def _find(self, key: str) -> int:
+        target = key.encode('utf-8')
+        low    = 0
+        high   = self._id_count
+
+        while low < high:
+            middle = (low + high) // 2
+            if self._id(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._id_count and self._id(low) == target:
+            return low
+
+        return -1
+
+    def _lookup(self, key: str) -> tuple[str, Path] | None:
+        index = self._find(key)
+
+        if index < 0:
+            return None
+
+        _, _, file_index = ID_RECORD.unpack_from(self._data, self._ids + index * ID_RECORD.size)
+        path, topic_id, _ = self._file(file_index)
+
+        if path in self._removed:
+            return None
+
+        return topic_id, self.directory / path
+
+    def _is_unchanged(self, key: str) -> bool:
+        return self._lookup(key) is not None
+
+    def __getitem__(self, key: str) -> tuple[str, Path]:
+        if key in self._added:
+            return self._added[key]
+
+        if (result := self._lookup(key)) is None:
+            raise KeyError(key)
+
+        return result
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and (key in self._added or self._lookup(key) is not None)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._added
+
+        removed = {i for i in range(self._file_count) if self._file(i)[0] in self._removed} if self._removed else set()
+
+        for index in range(self._id_count):
+            offset, length, file_index = ID_RECORD.unpack_from(self._data, self._ids + index * ID_RECORD.size)
+
+            if file_index in removed:
+                continue
+
+            xml_id = self._string(offset, length).decode('utf-8')
+
+            if xml_id not in self._added:
+                yield xml_id
+
+    def __len__(self) -> int:
+        if self._removed or self._added:
+            return sum(1 for _ in self)
+
+        return self._id_count
+
+    def files(self) -> Iterator[tuple[Path, str, int]]:
+        for index in range(self._file_count):
+            path, topic_id, size = self._file(index)
+            yield self.directory / path, topic_id, size
+
+    def links(self) -> dict[str, set[str]]:
+        result: dict[str, set[str]] = {}
+
+        for index in range(self._link_count):
+            target, source = self._link(index)
+            target_path = target.decode('utf-8')
+            source_path = self._file(source)[0]
+
+            if source_path in self._removed:
+                continue
+
+            result.setdefault(self._renames.get(target_path, target_path), set()).add(source_path)
+
+        return result
+
+    def referencing_files(self, file_path: str | Path) -> list[Path]:
+        target = self._relative(file_path).encode('utf-8')
+        low    = 0
+        high   = self._link_count
+
+        while low < high:
+            middle = (low + high) // 2
+            if self._link(middle)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        result = []
+
+        while low < self._link_count and (link := self._link(low))[0] == target:
+            result.append(self.directory / self._file(link[1])[0])
+            low += 1
+
+        return result
+
+    def rename(self, old_path: str | Path, new_path: str | Path) -> None:
+        self._renames[self._relative(old_path)] = self._relative(new_path)
+
+    def add_file(self, file_path: str | Path, id_list: list[str]) -> None:
+        file_path = self.directory / self._relative(file_path)
+        self.remove_file(file_path)
+        self._added.add_file(file_path, id_list, self._is_unchanged)
+
+    def remove_file(self, file_path: str | Path) -> None:
+        path = self._relative(file_path)
+        self._removed.add(path)
+        self._added.remove_file(self.directory / path)
+
+    # Files with a different size are changed, files with the same size and
+    def statuses(self) -> dict[Path, tuple[int, int, bytes]]:
+        return {self.directory / self._file(i)[0]: self._status(i) for i in range(self._file_count)}
+
+    # modification time are not, and the contents of the remaining files are
+    # compared, for example after a fresh checkout:
+    def is_current(self, exclude: str | Path | None = None) -> bool:
+        expected = self.statuses()
+        actual   = list_files(self.directory, exclude)
+
+        if len(actual) != len(expected):
+            return False
+
+        for file_path in actual:
+            if (record := expected.get(file_path)) is None:
+                return False
+
+            size, mtime, digest = record
+
+            try:
+                status = file_path.stat()
+
+                if status.st_size != size:
+                    return False
+                if status.st_mtime_ns != mtime and file_digest(file_path) != digest:
+                    return False
+            except OSError:
+                return False
+
+        return True
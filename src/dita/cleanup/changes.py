@@ -0,0 +1,58 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import subprocess
+
+from errno import EINVAL
+from pathlib import Path
+from .out import exit_with_error
+
+__all__ = [
+    'list_changes'
+]
+
+def git(*arguments: str, cwd: str | Path | None = None) -> str:
+    try:
+        return subprocess.run(['git', *arguments], cwd=cwd, capture_output=True, text=True, check=True).stdout
+    except OSError as message:
+        exit_with_error(str(message))
+    except subprocess.CalledProcessError as error:
+        exit_with_error(error.stderr.strip() or f"Command failed: 'git {arguments[0]}'", EINVAL)
+
+def list_changes(revision: str) -> tuple[list[Path], list[Path]]:
+    changed: list[Path] = []
+    deleted: list[Path] = []
+
+    toplevel = Path(git('rev-parse', '--show-toplevel').strip())
+    fields   = git('diff', '--name-status', '--no-renames', '-z', revision, '--', cwd=toplevel).split('\0')
+
+    for status, file_path in zip(fields[0::2], fields[1::2]):
+        if not file_path.endswith('.dita'):
+            continue
+
+        if status.startswith('D'):
+            deleted.append(toplevel / file_path)
+        else:
+            changed.append(toplevel / file_path)
+
+    return changed, deleted
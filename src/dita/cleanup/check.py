@@ -0,0 +1,253 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import multiprocessing
+import os
+import re
+import signal
+import time
+
+from collections.abc import Iterator, Mapping
+from errno import EPERM
+from lxml import etree
+from pathlib import Path
+from typing import IO, Any, Final
+from .hooks import HOOKS, Event, emit
+from .limits import LimitExceeded, Limits, check_size, time_limit
+from .out import warn
+from .validate import Validator
+
+__all__ = [
+    'check_file', 'check_files', 'write_link_graph'
+]
+
+# A resolved link: source file, source ID, target file, and target ID
+Link = tuple[str, str, str, str]
+
+# Links with a URL scheme point outside of the documentation set even if
+# they are not marked as external:
+RE_URL_SCHEME: Final = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+_xml_ids: Mapping[str, tuple[str, Path]] = {}
+_validator: Validator | None = None
+_limits: Limits | None = None
+_started: Any = None
+
+def resolve_link(href: str, file_path: Path, xml_ids: Mapping[str, tuple[str, Path]]) -> tuple[str, str] | None:
+    xref_file, _, anchor = href.partition('#')
+    xref_path = Path(os.path.normpath(file_path.parent / xref_file)) if xref_file else file_path
+
+    if not anchor:
+        return (str(xref_path), '') if xref_path.is_file() else None
+
+    xref_topic_id, _, xref_target_id = anchor.rpartition('/')
+
+    if xref_target_id not in xml_ids:
+        return None
+
+    topic_id, target_file = xml_ids[xref_target_id]
+
+    if xref_topic_id and xref_topic_id != topic_id:
+        return None
+    if os.path.abspath(target_file) != os.path.abspath(xref_path):
+        return None
+
+    return str(target_file), xref_target_id
+
+def check_file(file_path: str, xml_ids: Mapping[str, tuple[str, Path]] | None = None, validator: Validator | None = None, limits: Limits | None = None) -> tuple[list[str], list[Link], bool]:
+    if xml_ids is None:
+        xml_ids = _xml_ids
+        validator = _validator
+        limits = _limits
+
+    try:
+        check_size(file_path, limits)
+
+        with time_limit(limits.timeout if limits else None):
+            return _check_file(file_path, xml_ids, validator, limits.max_elements if limits else None)
+    except LimitExceeded as message:
+        return [file_path + ": " + str(message)], [], True
+    except OSError as message:
+        return [str(message)], [], True
+
+def _check_file(file_path: str, xml_ids: Mapping[str, tuple[str, Path]], validator: Validator | None, max_elements: int | None) -> tuple[list[str], list[Link], bool]:
+    messages: list[str] = []
+    links: list[Link] = []
+    ids: list[str | None] = []
+    root: etree._Element | None = None
+    failed = False
+    count  = 0
+
+    try:
+        for event, e in etree.iterparse(file_path, events=('start', 'end')):
+            if root is None:
+                root = e
+
+            if event == 'end':
+                ids.pop()
+
+                if validator:
+                    continue
+
+                e.clear(keep_tail=True)
+                parent = e.getparent()
+                while parent is not None and e.getprevious() is not None:
+                    del parent[0]
+                continue
+
+            count += 1
+
+            if max_elements is not None and count > max_elements:
+                raise LimitExceeded(f'Element limit exceeded: more than {max_elements} elements')
+
+            href = e.get('href')
+
+            if e.tag in ['xref', 'link'] and href and e.get('scope') != 'external' and not RE_URL_SCHEME.match(str(href)):
+                source_id = next((i for i in reversed(ids) if i), '')
+
+                if target := resolve_link(str(href), Path(file_path), xml_ids):
+                    links.append((file_path, str(source_id), target[0], target[1]))
+                else:
+                    messages.append(file_path + ": Broken link: " + str(href))
+                    failed = True
+
+            ids.append(e.get('id'))
+    except (etree.XMLSyntaxError, OSError) as message:
+        messages.append(str(message))
+        return messages, links, True
+
+    if validator and root is not None and (errors := validator.validate(root.getroottree(), Path(file_path))):
+        messages.extend(errors)
+        failed = True
+
+    return messages, links, failed
+
+def _initialize_worker(xml_ids: Mapping[str, tuple[str, Path]], validator: Validator | None, limits: Limits | None = None, started: Any = None) -> None:
+    global _xml_ids, _validator, _limits, _started
+    _xml_ids   = xml_ids
+    _validator = validator
+    _limits    = limits
+    _started   = started
+
+def _check_task(index: int, file_path: str) -> tuple[list[str], list[Link], bool]:
+    _started.put((index, os.getpid()))
+    return check_file(file_path)
+
+# Workers that do not finish a file in time are killed, the pool replaces
+# them with new ones, and the file is reported as skipped:
+def _check_files_supervised(files: list[str], xml_ids: Mapping[str, tuple[str, Path]], jobs: int, validator: Validator | None, limits: Limits, timeout: float) -> Iterator[tuple[list[str], list[Link], bool]]:
+    started: multiprocessing.SimpleQueue[tuple[int, int]] = multiprocessing.SimpleQueue()
+    running: dict[int, tuple[int, float]] = {}
+    expired: set[int] = set()
+
+    with multiprocessing.Pool(min(jobs, len(files)), _initialize_worker, (xml_ids, validator, limits, started)) as pool:
+        results = [pool.apply_async(_check_task, (i, f)) for i, f in enumerate(files)]
+
+        for index, result in enumerate(results):
+            while not result.ready() and index not in expired:
+                while not started.empty():
+                    task, pid = started.get()
+                    running[task] = (pid, time.monotonic())
+
+                for task, (pid, start) in running.items():
+                    if task not in expired and not results[task].ready() and time.monotonic() - start > timeout:
+                        expired.add(task)
+
+                        try:
+                            os.kill(pid, signal.SIGKILL)
+                        except OSError:
+                            pass
+
+                result.wait(0.05)
+
+            if index in expired and not result.ready():
+                yield [files[index] + f": Time limit exceeded: {limits.timeout:g} seconds"], [], True
+            else:
+                yield result.get()
+
+def _check_files(files: list[str], xml_ids: Mapping[str, tuple[str, Path]], jobs: int, validator: Validator | None, limits: Limits | None = None) -> Iterator[tuple[list[str], list[Link], bool]]:
+    if jobs <= 1 or len(files) <= 1:
+        for file_path in files:
+            yield check_file(file_path, xml_ids, validator, limits)
+        return
+
+    if limits and limits.timeout:
+        yield from _check_files_supervised(files, xml_ids, jobs, validator, limits, limits.timeout + 1.0)
+        return
+
+    with multiprocessing.Pool(min(jobs, len(files)), _initialize_worker, (xml_ids, validator, limits)) as pool:
+        yield from pool.imap(check_file, files, chunksize=16)
+
+def write_link_graph(f: IO[str], links: list[Link], graph_format: str) -> None:
+    if graph_format == 'dot':
+        f.write('digraph links {\n')
+        for source_file, source_id, target_file, target_id in links:
+            source = json.dumps(f'{source_file}#{source_id}' if source_id else source_file)
+            target = json.dumps(f'{target_file}#{target_id}' if target_id else target_file)
+            f.write(f'  {source} -> {target};\n')
+        f.write('}\n')
+        return
+
+    for source_file, source_id, target_file, target_id in links:
+        f.write(json.dumps({
+            'source_file': source_file,
+            'source_id': source_id,
+            'target_file': target_file,
+            'target_id': target_id,
+        }) + '\n')
+
+def check_files(files: list[str], xml_ids: Mapping[str, tuple[str, Path]], jobs: int = 1, graph_file: str | None = None, validator: Validator | None = None, limits: Limits | None = None) -> int:
+    exit_code = 0
+    graph: list[Link] = []
+
+    if HOOKS:
+        emit(Event('phase_start', 'check', files=len(files)))
+
+    for file_path, (messages, links, failed) in zip(files, _check_files(files, xml_ids, jobs, validator, limits)):
+        if HOOKS:
+            emit(Event('file_end', file_path=file_path))
+
+        for message in messages:
+            warn(message)
+
+        if failed:
+            exit_code = EPERM
+
+        if graph_file:
+            graph.extend(links)
+
+    if HOOKS:
+        emit(Event('phase_end', 'check', files=len(files)))
+
+    if graph_file:
+        graph_format = 'dot' if graph_file.endswith('.dot') else 'jsonl'
+
+        try:
+            with open(graph_file, 'w') as f:
+                write_link_graph(f, graph, graph_format)
+        except OSError as message:
+            warn(str(message))
+            exit_code = EPERM
+
+    return exit_code
@@ -22,53 +22,90 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 import argparse
+import hashlib
+import os
+import re
 import sys
+import tempfile
 
-from errno import EPERM, ENOTDIR
+from collections import deque
+from collections.abc import Callable, Collection, Mapping
+from errno import EINVAL, EPERM, ENOTDIR
 from lxml import etree
 from pathlib import Path
 from . import NAME, VERSION, DESCRIPTION
+from .archive import is_archive, process_archive
+from .attributes import read_attributes
+from .changes import list_changes
+from .hooks import HOOKS, Event, emit, load_plugins, register, unregister
+from .limits import LimitExceeded, Limits, check_elements, check_size, parse_size, time_limit
+from .metrics import Metrics
+from .mirror import Mirror
+from .check import check_files
+from .conref import ConrefIndex
+from .catalog import Catalog, MappedCatalog, catalog_ids, complete_catalog, index_links, load_catalog, \
+     save_catalog, update_catalog
 from .out import exit_with_error, warn
-from .xml import list_ids, prune_ids, prune_xrefs, replace_attributes, \
-     report_problems, update_image_paths, update_xref_targets
+from .patch import snapshot_attributes, write_xml
+from .profiler import Profiler
+from .progress import Progress
+from .stream import scan_xml, stream_file
+from .suggest import SuggestionIndex
+from .validate import Validator
+from .xml import list_ids, list_links, list_target_ids, match_ids, parse_xml, prune_id, prune_ids, prune_xref, prune_xrefs, \
+     replace_attributes, report_problems, update_image_path, update_image_paths, \
+     update_xref_target, update_xref_targets
 
 __all__ = [
     'run'
 ]
 
-def list_files(directory: str) -> list[Path]:
-    result: list[Path] = []
-    for root, dirs, files in Path(directory).walk(top_down=True, on_error=print):
-        for name in files:
-            if name.endswith('.dita'):
-                result.append(Path(root, name))
-    return result
+def shard_files(files: list[str], index: int, count: int) -> list[str]:
+    loads    = [(0, 0)] * count
+    selected = set()
+    entries  = []
 
-def catalog_ids(directory: str) -> dict[str, tuple[str, Path]]:
-    result: dict[str, tuple[str, Path]] = {}
+    for file_path in files:
+        try:
+            size = Path(file_path).stat().st_size
+        except OSError:
+            size = 0
 
-    file_list = list_files(directory)
+        digest = hashlib.sha1(Path(file_path).as_posix().encode('utf-8')).digest()
+        entries.append((size, digest, file_path))
 
-    for file_path in file_list:
-        try:
-            xml = etree.parse(file_path)
-        except (etree.XMLSyntaxError, OSError) as message:
-            warn(str(message))
-            continue
+    for size, digest, file_path in sorted(entries, key=lambda e: (-e[0], e[1])):
+        shard = loads.index(min(loads))
+        loads[shard] = (loads[shard][0] + size, loads[shard][1] + 1)
+
+        if shard == index - 1:
+            selected.add(file_path)
+
+    return [f for f in files if f in selected]
 
-        id_list  = list_ids(xml)
+def read_rename_map(file_path: str) -> list[tuple[Path, Path]]:
+    result: list[tuple[Path, Path]] = []
+
+    try:
+        with open(file_path) as f:
+            lines = f.read().splitlines()
+    except OSError as message:
+        exit_with_error(str(message))
 
-        if not id_list:
+    for line in lines:
+        if not line.strip():
             continue
 
-        topic_id = id_list[0]
+        fields = line.split('\t') if '\t' in line else line.split()
 
-        for xml_id in id_list:
-            if xml_id in result:
-                warn(str(file_path) + ": Duplicate ID: " + xml_id)
-                continue
+        if len(fields) == 3 and fields[0].startswith('R'):
+            fields = fields[1:]
 
-            result[xml_id] = (topic_id, file_path)
+        if len(fields) != 2:
+            warn(file_path + ": Invalid rename map entry: " + line)
+            continue
+
+        result.append((Path(fields[0]), Path(fields[1])))
 
     return result
 
@@ -85,11 +122,23 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=False,
         metavar='FILE',
         help='write output to the selected file instead of overwriting the file')
+    out.add_argument('--output-dir',
+        default=False,
+        metavar='DIRECTORY',
+        help='write the supplied files to the same relative paths in the selected directory and link unchanged files')
 
     parser.add_argument('-C', '--conref-target',
         default=False,
         metavar='TARGET',
         help='replace attribute references with reusable content references')
+    parser.add_argument('-A', '--attributes',
+        default=False,
+        metavar='FILE',
+        help='replace references to attributes defined in the selected AsciiDoc file with their values')
+    parser.add_argument('--check-conrefs',
+        default=False,
+        action='store_true',
+        help='report reusable content references that have no matching ID in the --conref-target topic')
     parser.add_argument('-D', '--images-dir',
         default=[],
         metavar='DIRECTORY',
@@ -99,6 +148,91 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=False,
         metavar='DIRECTORY',
         help='update all cross references based on the supplied files')
+    parser.add_argument('--save-catalog',
+        default=False,
+        metavar='FILE',
+        help='save the catalog of IDs from the --xref-dir directory to the selected file')
+    parser.add_argument('--load-catalog',
+        default=False,
+        metavar='FILE',
+        help='load the catalog of IDs from the selected file instead of scanning the --xref-dir directory')
+    parser.add_argument('--lazy-catalog',
+        default=False,
+        action='store_true',
+        help='parse only files in the --xref-dir directory that can define IDs referenced by the supplied files')
+    parser.add_argument('--rename-map',
+        default=False,
+        metavar='FILE',
+        help='update only files that link to files renamed according to the selected file with old and new paths')
+    parser.add_argument('--since',
+        default=False,
+        metavar='REVISION',
+        help='process only supplied files that changed in the git repository since the selected revision')
+    parser.add_argument('--shard',
+        default=False,
+        metavar='K/N',
+        help='process only the K-th of N stable, size-balanced subsets of the supplied files')
+    parser.add_argument('-c', '--check',
+        default=False,
+        action='store_true',
+        help='report broken cross references based on the --xref-dir directory without modifying any files')
+    parser.add_argument('-j', '--jobs',
+        default=1,
+        type=int,
+        metavar='NUMBER',
+        help='check the supplied files in the selected number of parallel processes')
+    parser.add_argument('--link-graph',
+        default=False,
+        metavar='FILE',
+        help='write resolved links to the selected file in the DOT format if it ends with .dot, or as JSON Lines')
+    parser.add_argument('--validate',
+        default=False,
+        action='store_true',
+        help='validate the resulting files against their DTDs')
+    parser.add_argument('--xml-catalog',
+        default=[],
+        metavar='FILE',
+        action='append',
+        help='resolve DTDs through the selected XML catalog instead of XML_CATALOG_FILES; can be defined more than once')
+    parser.add_argument('--max-size',
+        default=None,
+        metavar='SIZE',
+        help='skip supplied files larger than the selected size in bytes, optionally with a K, M, or G suffix')
+    parser.add_argument('--max-elements',
+        default=None,
+        type=int,
+        metavar='NUMBER',
+        help='skip supplied files with more than the selected number of elements')
+    parser.add_argument('--timeout',
+        default=None,
+        type=float,
+        metavar='SECONDS',
+        help='skip supplied files that take longer than the selected number of seconds to process; the limit is checked between parser calls')
+    parser.add_argument('--patch',
+        default=False,
+        action='store_true',
+        help='rewrite only changed attribute values and preserve the rest of the original files')
+    parser.add_argument('--stream',
+        default=False,
+        action='store_true',
+        help='transform the supplied files element by element without loading them into memory')
+    parser.add_argument('--progress',
+        default=False,
+        action='store_true',
+        help='report the current phase, throughput, and estimated time remaining')
+    parser.add_argument('--metrics-file',
+        default=False,
+        metavar='FILE',
+        help='write counters and histograms of the run to the selected file in the Prometheus text format')
+    parser.add_argument('--profile-out',
+        default=False,
+        metavar='DIRECTORY',
+        help='write a profile of each phase of the run to the selected directory in the pstats format')
+    parser.add_argument('--profile-slowest',
+        default=None,
+        type=int,
+        metavar='NUMBER',
+        help='also write profiles of the selected number of slowest files to the --profile-out directory')
     parser.add_argument('-i', '--prune-ids',
         default=False,
         action='store_true',
@@ -132,99 +266,526 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
 
     args = parser.parse_args(argv)
 
+    args.archive = False
+
+    if archives := [f for f in args.files if is_archive(f)]:
+        if len(args.files) > 1:
+            exit_with_error(f"Archives must be supplied on their own: '{archives[0]}'", EINVAL)
+        if args.output and not is_archive(args.output):
+            exit_with_error(f"Not an archive: '{args.output}'", EINVAL)
+
+        for option in ('images_dir', 'check', 'check_conrefs', 'save_catalog', 'load_catalog', 'since', 'shard', 'output_dir'):
+            if getattr(args, option):
+                exit_with_error(f"Option not supported with archives: '--{option.replace('_', '-')}'", EINVAL)
+
+        args.archive = args.files[0]
+
     if args.output == '-':
         args.output = sys.stdout
 
-    if args.xref_dir and not Path(args.xref_dir).is_dir():
+    if args.output_dir and Path(args.output_dir).exists() and not Path(args.output_dir).is_dir():
+        exit_with_error(f"Not a directory: '{args.output_dir}'", ENOTDIR)
+    if args.output_dir and Path(args.output_dir).resolve() == Path.cwd().resolve():
+        exit_with_error(f"Output directory contains the supplied files: '{args.output_dir}'", EINVAL)
+    if args.xref_dir and not args.archive and not Path(args.xref_dir).is_dir():
         exit_with_error(f"Not a directory: '{args.xref_dir}'", ENOTDIR)
+    if args.save_catalog and not args.xref_dir:
+        exit_with_error("Option requires --xref-dir: '--save-catalog'", EINVAL)
+    if args.load_catalog and not args.xref_dir:
+        exit_with_error("Option requires --xref-dir: '--load-catalog'", EINVAL)
+    if args.check and not args.xref_dir:
+        exit_with_error("Option requires --xref-dir: '--check'", EINVAL)
+    if args.link_graph and not args.check:
+        exit_with_error("Option requires --check: '--link-graph'", EINVAL)
+    if args.jobs < 1:
+        exit_with_error(f"Invalid number of jobs: '{args.jobs}'", EINVAL)
+    if args.max_size is not None and parse_size(args.max_size) is None:
+        exit_with_error(f"Invalid size: '{args.max_size}'", EINVAL)
+    if args.max_elements is not None and args.max_elements < 1:
+        exit_with_error(f"Invalid number of elements: '{args.max_elements}'", EINVAL)
+    if args.timeout is not None and not args.timeout > 0:
+        exit_with_error(f"Invalid timeout: '{args.timeout:g}'", EINVAL)
+    if args.profile_slowest is not None and not args.profile_out:
+        exit_with_error("Option requires --profile-out: '--profile-slowest'", EINVAL)
+    if args.profile_slowest is not None and args.profile_slowest < 1:
+        exit_with_error(f"Invalid number of files: '{args.profile_slowest}'", EINVAL)
+    if args.lazy_catalog and not args.xref_dir:
+        exit_with_error("Option requires --xref-dir: '--lazy-catalog'", EINVAL)
+    if args.lazy_catalog:
+        for option in ('save_catalog', 'load_catalog', 'check'):
+            if getattr(args, option):
+                exit_with_error(f"Option not supported with --lazy-catalog: '--{option.replace('_', '-')}'", EINVAL)
+    if args.rename_map and not args.load_catalog:
+        exit_with_error("Option requires --load-catalog: '--rename-map'", EINVAL)
+    if args.check_conrefs and not args.conref_target:
+        exit_with_error("Option requires --conref-target: '--check-conrefs'", EINVAL)
+    if args.xml_catalog and not args.validate:
+        exit_with_error("Option requires --validate: '--xml-catalog'", EINVAL)
+    if args.stream:
+        for option in ('conref_target', 'attributes', 'check', 'validate', 'patch', 'verbose', 'archive', 'output_dir'):
+            if getattr(args, option):
+                exit_with_error(f"Option not supported with --stream: '--{option.replace('_', '-')}'", EINVAL)
     for value in args.images_dir:
         if not Path(value).is_dir():
             exit_with_error(f"Not a directory: '{value}'", ENOTDIR)
 
-    return args
+    if args.max_size is not None:
+        args.max_size = parse_size(args.max_size)
 
-def process_files(args: argparse.Namespace) -> int:
-    exit_code = 0
+    if args.shard:
+        match = re.fullmatch(r'([0-9]+)/([0-9]+)', args.shard)
 
-    for file_path in args.files:
-        try:
-            xml = etree.parse(file_path)
-        except (etree.XMLSyntaxError, OSError) as message:
-            warn(str(message))
-            exit_code = EPERM
-            continue
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            exit_with_error(f"Invalid shard: '{args.shard}'", EINVAL)
+
+        args.shard = (int(match.group(1)), int(match.group(2)))
 
+    return args
+
+def element_transform(args: argparse.Namespace, file_path: Path, xml_ids: Mapping[str, tuple[str, Path]] | None = None, suggestions: SuggestionIndex | None = None, renamed: Mapping[Path, Path] | None = None) -> Callable[[etree._Element], bool]:
+    images_dir = list(map(Path, args.images_dir))
+
+    def transform(e: etree._Element) -> bool:
         updated = False
 
-        if args.conref_target and replace_attributes(xml, args.conref_target.strip()):
+        if images_dir and update_image_path(e, images_dir, file_path):
             updated = True
 
-        if args.images_dir and update_image_paths(xml, list(map(Path, args.images_dir)), Path(file_path)):
+        if args.prune_ids and prune_id(e):
             updated = True
 
-        if args.prune_ids and prune_ids(xml):
+        if args.prune_xrefs and prune_xref(e):
             updated = True
 
-        if args.prune_xrefs and prune_xrefs(xml):
+        if xml_ids is not None and update_xref_target(e, xml_ids, file_path, args.aggressive, suggestions, renames=renamed):
             updated = True
 
-        if args.verbose:
-            report_problems(xml, Path(file_path))
+        return updated
+
+    return transform
+
+# Duplicate IDs found in a warm catalog are reported with the paths that a
+# catalog built from the same directory would use:
+def report_duplicates(duplicates: Mapping[Path, list[str]], xref_dir: str, exclude: Collection[Path] = ()) -> None:
+    directory = Path(xref_dir).resolve()
 
-        if args.output == sys.stdout:
-            if not args.xref_dir:
-                sys.stdout.write(etree.tostring(xml, encoding='unicode'))
+    for file_path, id_list in duplicates.items():
+        if file_path in exclude:
             continue
 
-        if args.output:
-            file_path = args.output
-        elif not updated:
+        relative_path = str(Path(xref_dir, file_path.relative_to(directory)))
+
+        for xml_id in id_list:
+            warn(relative_path + ": Duplicate ID: " + xml_id, relative_path)
+
+def process_files(args: argparse.Namespace, warm_catalog: Catalog | None = None, warm_duplicates: Mapping[Path, list[str]] | None = None) -> int:
+    exit_code = 0
+    id_lists: dict[Path, list[str]] = {}
+    link_lists: dict[Path, list[str]] | None = {} if args.save_catalog else None
+    pending: deque[str] = deque()
+    spooled: dict[str, Path] = {}
+    spool: tempfile.TemporaryDirectory[str] | None = None
+    renames: list[tuple[Path, Path]] = []
+    changed: list[Path] = []
+    deleted: list[Path] = []
+    skipped: set[Path] = set()
+    catalog: MappedCatalog | None = None
+    mirror: Mirror | None = None
+    written: set[str] = set()
+    validator: Validator | None = None
+    conrefs: ConrefIndex | None = None
+    attributes: dict[str, str] | None = None
+    targets: set[str] | None = set() if args.lazy_catalog else None
+    limits = Limits(args.max_size, args.max_elements, args.timeout)
+
+    if args.attributes:
+        try:
+            attributes = read_attributes(args.attributes)
+        except (OSError, UnicodeDecodeError) as message:
+            exit_with_error(str(message))
+
+    if args.archive:
+        return process_archive(args, attributes, limits)
+
+    if args.check_conrefs:
+        conrefs = ConrefIndex(args.conref_target)
+
+    if args.validate:
+        validator = Validator(args.xml_catalog or os.environ.get('XML_CATALOG_FILES', '').split())
+
+    if args.rename_map:
+        renames = read_rename_map(args.rename_map)
+
+    if args.since:
+        changed, deleted = list_changes(args.since)
+        changed_files = {p.resolve() for p in changed}
+        args.files = [f for f in args.files if Path(f).resolve() in changed_files]
+
+    if args.load_catalog:
+        catalog = load_catalog(args.load_catalog, args.xref_dir, renames, validate=not args.since, exclude=args.output_dir)
+
+    if args.since and catalog is not None:
+        input_files = {Path(f).resolve() for f in args.files}
+        update_catalog(catalog, [p for p in changed if args.check or p.resolve() not in input_files], deleted, link_lists=link_lists, limits=limits)
+
+    if renames and catalog is not None:
+        affected = {new_path.resolve() for old_path, new_path in renames}
+
+        for old_path, new_path in renames:
+            affected.update(p.resolve() for p in catalog.referencing_files(old_path))
+
+        args.files = [f for f in args.files if Path(f).resolve() in affected]
+
+    if args.shard:
+        args.files = shard_files(args.files, *args.shard)
+
+    if args.output_dir:
+        try:
+            mirror = Mirror(args.output_dir, args.files)
+        except ValueError as message:
+            exit_with_error(str(message), EINVAL)
+
+    if args.check:
+        if catalog is None and warm_catalog is not None:
+            report_duplicates(warm_duplicates or {}, args.xref_dir)
+            return check_files(args.files, warm_catalog, args.jobs, args.link_graph, validator, limits)
+
+        return check_files(args.files, catalog if catalog is not None else catalog_ids(args.xref_dir, limits=limits), args.jobs, args.link_graph, validator, limits)
+
+    if HOOKS:
+        emit(Event('phase_start', 'process', files=len(args.files)))
+
+    for file_path in args.files:
+        if HOOKS:
+            emit(Event('file_start', file_path=file_path))
+
+        # Streamed files are only scanned for IDs and links if their cross
+        # references are updated in the second pass:
+        if args.stream:
+            updated = False
+
+            try:
+                check_size(file_path, limits)
+
+                if args.xref_dir:
+                    with time_limit(limits.timeout):
+                        id_list, link_list = scan_xml(file_path, args.prune_ids)
+                    id_lists[Path(file_path).resolve()] = id_list
+
+                    if link_lists is not None:
+                        link_lists[Path(file_path).resolve()] = link_list
+
+                    if targets is not None:
+                        targets.update(list_target_ids(link_list))
+
+                    pending.append(file_path)
+                else:
+                    with time_limit(limits.timeout):
+                        updated = stream_file(file_path, args.output or None, element_transform(args, Path(file_path)))
+            except (etree.XMLSyntaxError, OSError) as message:
+                warn(str(message))
+                exit_code = EPERM
+            except LimitExceeded as message:
+                warn(file_path + ": " + str(message))
+                exit_code = EPERM
+                skipped.add(Path(file_path).resolve())
+
+            if HOOKS:
+                emit(Event('file_end', file_path=file_path, updated=updated))
             continue
 
+        updated  = False
+        snapshot = None
+
         try:
-            xml.write(file_path)
-        except OSError as message:
+            check_size(file_path, limits)
+
+            with time_limit(limits.timeout):
+                xml = parse_xml(file_path)
+                check_elements(xml, limits)
+                snapshot = snapshot_attributes(xml) if args.patch else None
+
+                if (args.conref_target or attributes) and replace_attributes(xml, args.conref_target.strip() if args.conref_target else None, attributes):
+                    updated  = True
+                    snapshot = None
+
+                    if conrefs:
+                        conrefs.check(xml, Path(file_path))
+
+                if args.images_dir and update_image_paths(xml, list(map(Path, args.images_dir)), Path(file_path), mirror):
+                    updated = True
+
+                if args.prune_ids and prune_ids(xml):
+                    updated = True
+
+                if args.prune_xrefs and prune_xrefs(xml):
+                    updated = True
+
+                if args.verbose:
+                    report_problems(xml, Path(file_path))
+        except (etree.XMLSyntaxError, OSError) as message:
             warn(str(message))
             exit_code = EPERM
+            if HOOKS:
+                emit(Event('file_end', file_path=file_path))
             continue
+        except LimitExceeded as message:
+            warn(file_path + ": " + str(message))
+            exit_code = EPERM
+            skipped.add(Path(file_path).resolve())
+            if HOOKS:
+                emit(Event('file_end', file_path=file_path))
+            continue
+
+        queued = False
+
+        if args.xref_dir:
+            id_lists[Path(file_path).resolve()] = list_ids(xml)
+
+            if link_lists is not None:
+                link_lists[Path(file_path).resolve()] = list_links(xml)
+
+            if targets is not None:
+                targets.update(list_target_ids(list_links(xml)))
+
+            # Files for the standard output are written to a temporary
+            # directory so that the parsed trees are not kept in memory
+            # until the second pass:
+            if args.output:
+                try:
+                    if spool is None:
+                        spool = tempfile.TemporaryDirectory()
+
+                    spooled[file_path] = Path(spool.name, f'{len(spooled)}.dita')
+                    write_xml(xml, file_path, spooled[file_path], snapshot)
+                    pending.append(file_path)
+                except OSError as message:
+                    warn(str(message))
+                    exit_code = EPERM
+
+                if HOOKS:
+                    emit(Event('file_end', file_path=file_path, updated=updated))
+                continue
+
+            if xml.xpath('boolean(//xref[contains(@href, "#")] | //link[contains(@href, "#")])'):
+                pending.append(file_path)
+                queued = True
+
+        if validator and not queued:
+            for problem in validator.validate(xml, Path(file_path)):
+                warn(problem)
+
+        # Updated files are written to the output directory right away so
+        # that the second pass reads them from there:
+        if mirror is not None:
+            try:
+                if updated:
+                    write_xml(xml, file_path, mirror.prepare(file_path), snapshot)
+                    written.add(file_path)
+                elif not queued:
+                    mirror.link(file_path)
+            except OSError as message:
+                warn(str(message))
+                exit_code = EPERM
+        elif args.output or updated:
+            try:
+                write_xml(xml, file_path, args.output or file_path, snapshot)
+            except OSError as message:
+                warn(str(message))
+                exit_code = EPERM
+
+        if HOOKS:
+            emit(Event('file_end', file_path=file_path, updated=updated))
+
+    if HOOKS:
+        emit(Event('phase_end', 'process', files=len(args.files)))
+
+    if conrefs:
+        conrefs.report()
 
     if not args.xref_dir:
         return exit_code
 
-    xml_ids = catalog_ids(args.xref_dir)
+    xml_ids: Mapping[str, tuple[str, Path]]
+
+    if args.since and catalog is not None:
+        update_catalog(catalog, list(map(Path, args.files)), [], id_lists, link_lists, limits, skipped)
+
+    if catalog is not None:
+        xml_ids = catalog
+    elif warm_catalog is not None:
+        directory = Path(args.xref_dir).resolve()
+
+        # Duplicate IDs in the supplied files are reported again when their
+        # entries are replaced with the updated IDs:
+        report_duplicates(warm_duplicates or {}, args.xref_dir, id_lists.keys())
+
+        for file_path, id_list in id_lists.items():
+            if file_path.suffix == '.dita' and file_path.is_relative_to(directory):
+                warm_catalog.remove_file(file_path)
+                warm_catalog.add_file(file_path, id_list)
+
+        xml_ids = warm_catalog
+    elif targets is not None:
+        xml_ids = catalog_ids(args.xref_dir, id_lists, link_lists, targets, args.output_dir, limits, skipped)
+
+        # Suggestions for IDs that are not found depend on the whole
+        # catalog:
+        if any(not match_ids(i, xml_ids) for i in targets):
+            complete_catalog(xml_ids, args.xref_dir, args.output_dir, limits, skipped)
+    else:
+        xml_ids = catalog_ids(args.xref_dir, id_lists, link_lists, exclude=args.output_dir, limits=limits, skipped=skipped)
+
+    suggestions = SuggestionIndex(xml_ids)
+    xref_count  = len(pending)
+    renamed     = {old_path.resolve(): new_path.resolve() for old_path, new_path in renames} or None
+
+    if HOOKS:
+        emit(Event('phase_start', 'xref', files=xref_count))
+
+    while pending:
+        file_path = pending.popleft()
+
+        if HOOKS:
+            emit(Event('file_start', file_path=file_path))
+
+        if args.stream:
+            updated = False
+
+            try:
+                with time_limit(limits.timeout):
+                    updated = stream_file(file_path, args.output or None, element_transform(args, Path(file_path), xml_ids, suggestions, renamed))
+            except (etree.XMLSyntaxError, OSError) as message:
+                warn(str(message))
+                exit_code = EPERM
+            except LimitExceeded as message:
+                warn(file_path + ": " + str(message))
+                exit_code = EPERM
+
+            if HOOKS:
+                emit(Event('file_end', file_path=file_path, updated=updated))
+            continue
+
+        if file_path in spooled:
+            source_path = str(spooled.pop(file_path))
+        elif mirror is not None and file_path in written:
+            source_path = str(mirror(file_path))
+        else:
+            source_path = file_path
 
-    for file_path in args.files:
         try:
-            xml = etree.parse(file_path)
+            with time_limit(limits.timeout):
+                xml = parse_xml(source_path)
+                snapshot = snapshot_attributes(xml) if args.patch else None
+
+                updated = update_xref_targets(xml, xml_ids, Path(file_path), args.aggressive, suggestions, mirror, renamed)
         except (etree.XMLSyntaxError, OSError) as message:
             warn(str(message))
             exit_code = EPERM
+            if HOOKS:
+                emit(Event('file_end', file_path=file_path))
+            continue
+        except LimitExceeded as message:
+            warn(file_path + ": " + str(message))
+            exit_code = EPERM
+            if HOOKS:
+                emit(Event('file_end', file_path=file_path))
             continue
 
-        updated = update_xref_targets(xml, xml_ids, Path(file_path), args.aggressive)
+        if validator:
+            for problem in validator.validate(xml, Path(file_path)):
+                warn(problem)
+
+        if mirror is not None:
+            try:
+                if updated:
+                    write_xml(xml, source_path, mirror(file_path) if file_path in written else mirror.prepare(file_path), snapshot)
+                elif file_path not in written:
+                    mirror.link(file_path)
+            except OSError as message:
+                warn(str(message))
+                exit_code = EPERM
+        elif args.output or updated:
+            try:
+                write_xml(xml, source_path, args.output or file_path, snapshot)
+            except OSError as message:
+                warn(str(message))
+                exit_code = EPERM
+
+        if HOOKS:
+            emit(Event('file_end', file_path=file_path, updated=updated))
+
+    if spool is not None:
+        spool.cleanup()
+
+    if HOOKS:
+        emit(Event('phase_end', 'xref', files=xref_count))
+
+    if args.save_catalog and (catalog is None or renames or args.since):
+        if catalog is not None:
+            links = catalog.links()
+
+            for target, sources in index_links(args.xref_dir, xml_ids, link_lists or {}).items():
+                links.setdefault(target, set()).update(sources)
+        else:
+            links = index_links(args.xref_dir, xml_ids, link_lists or {})
 
-        if args.output == sys.stdout:
-            sys.stdout.write(etree.tostring(xml, encoding='unicode'))
-            continue
+        try:
+            save_catalog(args.save_catalog, xml_ids, args.xref_dir, links, args.output_dir)
+        except OSError as message:
+            warn(str(message))
+            exit_code = EPERM
 
-        if args.output:
-            file_path = args.output
-        elif not updated:
-            continue
+    return exit_code
+
+# Hooks selected on the command line are registered only for the duration
+# of the run so that the server can process several requests:
+def run_files(args: argparse.Namespace, warm_catalog: Catalog | None = None, warm_duplicates: Mapping[Path, list[str]] | None = None) -> int:
+    progress = Progress() if args.progress else None
+    metrics  = Metrics() if args.metrics_file else None
+    profiler = Profiler(args.profile_out, args.profile_slowest) if args.profile_out else None
+    hooks    = [hook for hook in (progress, metrics, profiler) if hook is not None]
 
+    for hook in hooks:
+        register(hook)
+
+    try:
+        exit_code = process_files(args, warm_catalog, warm_duplicates)
+    finally:
+        for hook in hooks:
+            unregister(hook)
+
+    if profiler is not None:
         try:
-            xml.write(file_path)
+            profiler.write()
+        except OSError as message:
+            warn(str(message))
+            exit_code = EPERM
+
+    if metrics is not None:
+        try:
+            metrics.write(args.metrics_file)
         except OSError as message:
             warn(str(message))
             exit_code = EPERM
-            continue
 
     return exit_code
 
 def run(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv[:1] == ['serve']:
+        from .serve import serve
+        serve(argv[1:])
+
     try:
         args = parse_args(argv)
-        exit_code = process_files(args)
+
+        for error_message in load_plugins():
+            warn(error_message)
+
+        exit_code = run_files(args)
     except KeyboardInterrupt:
         sys.exit(130)
 
@@ -0,0 +1,73 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import socket
+import sys
+
+from pathlib import Path
+from typing import Any
+
+__all__ = [
+    'run', 'send_request'
+]
+
+# The environment variable with the path to the socket of a running server:
+SOCKET_VARIABLE = 'DITA_CLEANUP_SOCKET'
+
+def send_request(socket_path: str | Path, request: dict[str, Any]) -> dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(socket_path))
+        s.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        s.shutdown(socket.SHUT_WR)
+
+        with s.makefile('rb') as f:
+            response = f.readline()
+
+    if not response:
+        raise ConnectionError(f'No response from the server: {socket_path}')
+
+    return dict(json.loads(response))
+
+def run(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    socket_path = os.environ.get(SOCKET_VARIABLE)
+
+    if socket_path and argv[:1] != ['serve']:
+        try:
+            response = send_request(socket_path, {'argv': argv, 'cwd': os.getcwd()})
+        except (OSError, ValueError):
+            pass
+        else:
+            sys.stdout.write(response['stdout'])
+            sys.stderr.write(response['stderr'])
+            sys.exit(response['exit_code'])
+
+    # Without a running server, process the files in this process instead.
+    # The command-line interface is imported only here because it loads
+    # lxml and every other module, which would slow down each request:
+    from . import cli
+    cli.run(argv)
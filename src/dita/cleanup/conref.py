@@ -0,0 +1,81 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+
+from lxml import etree
+from pathlib import Path
+from .out import warn
+from .xml import list_conrefs, parse_xml
+
+__all__ = [
+    'ConrefIndex'
+]
+
+class ConrefIndex:
+    __slots__ = ('conref_target', 'target_file', 'topic_id', '_ids', '_missing')
+
+    def __init__(self, conref_target: str) -> None:
+        self.conref_target = conref_target.strip()
+        self.target_file, _, anchor = self.conref_target.partition('#')
+        self.topic_id = anchor.rstrip('/')
+        self._ids: dict[Path, set[str] | None] = {}
+        self._missing: dict[tuple[Path, str], set[str]] = {}
+
+    def _index(self, target_path: Path) -> set[str] | None:
+        if target_path not in self._ids:
+            try:
+                root = parse_xml(target_path).getroot()
+            except (etree.XMLSyntaxError, OSError) as message:
+                warn(str(message))
+                self._ids[target_path] = None
+                return None
+
+            # Every element ID is a valid target, including the ones that
+            # are excluded from the catalog:
+            if root.get('id') == self.topic_id:
+                self._ids[target_path] = {str(e.get('id')) for e in root.iterdescendants(etree.Element) if e.get('id') is not None}
+            else:
+                self._ids[target_path] = set()
+
+        return self._ids[target_path]
+
+    def check(self, xml: etree._ElementTree, file_path: Path) -> None:
+        if not (conrefs := list_conrefs(xml, self.conref_target)):
+            return
+
+        if self.target_file:
+            target_path = Path(os.path.normpath(file_path.parent / self.target_file))
+        else:
+            target_path = file_path
+
+        if (ids := self._index(target_path)) is None:
+            return
+
+        for xml_id in conrefs:
+            if xml_id not in ids:
+                self._missing.setdefault((target_path, xml_id), set()).add(str(file_path))
+
+    def report(self) -> None:
+        for (target_path, xml_id), files in sorted(self._missing.items()):
+            warn(str(target_path) + ": Missing conref target: " + xml_id + " (referenced in " + str(len(files)) + (" file)" if len(files) == 1 else " files)"))
@@ -0,0 +1,123 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import functools
+import time
+
+from collections.abc import Callable
+from importlib.metadata import entry_points
+from lxml import etree
+from typing import Final, NamedTuple, ParamSpec, TypeVar
+
+__all__ = [
+    'HOOKS', 'Event', 'emit', 'instrumented', 'load_plugins', 'register',
+    'unregister'
+]
+
+ENTRY_POINT_GROUP: Final = 'dita_cleanup.hooks'
+
+P = ParamSpec('P')
+R = TypeVar('R')
+
+class Event(NamedTuple):
+    name: str
+    detail: str = ''
+    file_path: str | None = None
+    duration: float = 0.0
+    elements: int = 0
+    files: int | None = None
+    updated: bool = False
+
+Hook = Callable[[Event], None]
+
+# Registered hooks; callers check this list before building an event so
+# that instrumentation costs a single truth test when no hook is present:
+HOOKS: Final[list[Hook]] = []
+
+# Hooks that need element counts; counting walks the whole tree, so it is
+# skipped unless at least one of them is registered:
+_counting: list[Hook] = []
+
+_file_path: str | None = None
+
+def register(hook: Hook, elements: bool = False) -> None:
+    if hook not in HOOKS:
+        HOOKS.append(hook)
+    if elements and hook not in _counting:
+        _counting.append(hook)
+
+def unregister(hook: Hook) -> None:
+    if hook in HOOKS:
+        HOOKS.remove(hook)
+    if hook in _counting:
+        _counting.remove(hook)
+
+def emit(event: Event) -> None:
+    global _file_path
+
+    if event.name == 'file_start':
+        _file_path = event.file_path
+    elif event.name == 'file_end':
+        _file_path = None
+    elif event.name == 'warning' and event.file_path is None and _file_path:
+        event = event._replace(file_path=_file_path)
+
+    for hook in list(HOOKS):
+        hook(event)
+
+def count_elements(xml: object) -> int:
+    if isinstance(xml, etree._ElementTree):
+        return sum(1 for _ in xml.iter(etree.Element))
+    return 0
+
+def instrumented(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    def decorator(function: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(function)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not HOOKS:
+                return function(*args, **kwargs)
+
+            start    = time.perf_counter()
+            result   = function(*args, **kwargs)
+            duration = time.perf_counter() - start
+            xml      = args[0] if args and isinstance(args[0], etree._ElementTree) else result
+            elements = count_elements(xml) if _counting else 0
+
+            emit(Event(name, function.__name__, _file_path, duration, elements, updated=result is True))
+            return result
+
+        return wrapper
+
+    return decorator
+
+def load_plugins() -> list[str]:
+    errors: list[str] = []
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            hook = entry_point.load()
+            register(hook, elements=getattr(hook, 'elements', False) is True)
+        except Exception as message:
+            errors.append(f"Cannot load hook: '{entry_point.name}': {message}")
+
+    return errors
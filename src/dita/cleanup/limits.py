@@ -0,0 +1,95 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import re
+import signal
+import threading
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from lxml import etree
+from pathlib import Path
+from typing import Final, NamedTuple
+
+__all__ = [
+    'LimitExceeded', 'Limits', 'check_elements', 'check_size', 'parse_size', 'time_limit'
+]
+
+# Multipliers of the supported size suffixes:
+SIZE_SUFFIXES: Final = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+class LimitExceeded(Exception):
+    pass
+
+class Limits(NamedTuple):
+    max_size: int | None = None
+    max_elements: int | None = None
+    timeout: float | None = None
+
+def parse_size(value: str) -> int | None:
+    if not (match := re.fullmatch(r'([0-9]+)([KMG]?)B?', value.strip().upper())):
+        return None
+
+    return int(match.group(1)) * SIZE_SUFFIXES[match.group(2)]
+
+# The size of data that is already in memory, such as an archive member,
+# is checked directly:
+def check_size(file_path: str | Path | bytes, limits: Limits | None) -> None:
+    if not limits or limits.max_size is None:
+        return
+
+    if (size := len(file_path) if isinstance(file_path, bytes) else Path(file_path).stat().st_size) > limits.max_size:
+        raise LimitExceeded(f'File size limit exceeded: {size} bytes')
+
+def check_elements(xml: etree._ElementTree, limits: Limits | None) -> None:
+    if not limits or limits.max_elements is None:
+        return
+
+    count = 0
+
+    for _ in xml.iter(etree.Element):
+        count += 1
+
+        if count > limits.max_elements:
+            raise LimitExceeded(f'Element limit exceeded: more than {limits.max_elements} elements')
+
+# The time limit interrupts Python code with a timer signal, which is only
+# available in the main thread of a process on POSIX systems. Code running
+# in C extensions is interrupted once it returns:
+@contextmanager
+def time_limit(timeout: float | None) -> Iterator[None]:
+    if not timeout or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum: int, frame: object) -> None:
+        raise LimitExceeded(f'Time limit exceeded: {timeout:g} seconds')
+
+    handler = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, handler)
@@ -0,0 +1,211 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import bisect
+import os
+import sys
+import tempfile
+import time
+
+from collections import Counter
+from pathlib import Path
+from typing import Final
+from .hooks import Event
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore[assignment]
+
+__all__ = [
+    'Metrics'
+]
+
+PREFIX: Final = 'dita_cleanup'
+
+# Upper bounds of the duration buckets in seconds, the default buckets of
+# Prometheus client libraries:
+BUCKETS: Final = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Phases that process the supplied files, as opposed to scanning the
+# --xref-dir directory:
+PHASES: Final = frozenset({'process', 'xref', 'check'})
+
+# Events with durations recorded as histograms:
+DURATIONS: Final = {'parse': 'parse', 'transform': 'transform', 'serialize': 'write'}
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def peak_rss() -> int | None:
+    if resource is None:
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # The maximum resident set size is reported in bytes on macOS and in
+    # kilobytes elsewhere:
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+# Warnings have the form 'file: Type: detail'; the type is used as
+# a label if it can be identified:
+def warning_type(event: Event) -> str:
+    parts = event.detail.split(': ')
+
+    if event.file_path and parts[0] == event.file_path or len(parts) > 2:
+        parts = parts[1:]
+
+    if len(parts) < 2 or not parts[0][:1].isupper() or len(parts[0]) > 64:
+        return 'Other'
+
+    return parts[0]
+
+class Histogram:
+    __slots__ = ('buckets', 'total', 'count')
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(BUCKETS)
+        self.total   = 0.0
+        self.count   = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(BUCKETS, value)
+
+        if index < len(BUCKETS):
+            self.buckets[index] += 1
+
+        self.total += value
+        self.count += 1
+
+    def samples(self, name: str) -> list[str]:
+        result     = []
+        cumulative = 0
+
+        for bound, count in zip(BUCKETS, self.buckets):
+            cumulative += count
+            result.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+
+        result.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        result.append(f'{name}_sum {format_value(self.total)}')
+        result.append(f'{name}_count {self.count}')
+
+        return result
+
+class Metrics:
+    __slots__ = ('processed', 'modified', 'written', 'warnings', 'catalog_ids', 'catalog_files', 'durations', '_phase', '_start')
+
+    def __init__(self) -> None:
+        self.processed: set[str] = set()
+        self.modified: set[str]  = set()
+        self.written: set[str]   = set()
+        self.warnings: Counter[str] = Counter()
+        self.catalog_ids   = 0
+        self.catalog_files = 0
+        self.durations     = {name: Histogram() for name in DURATIONS.values()}
+        self._phase: str | None = None
+        self._start        = time.monotonic()
+
+    def __call__(self, event: Event) -> None:
+        if event.name == 'phase_start':
+            self._phase = event.detail
+        elif event.name == 'phase_end':
+            self._phase = None
+        elif event.name == 'file_end' and event.file_path is not None and self._phase in PHASES:
+            self.processed.add(event.file_path)
+
+            if event.updated:
+                self.modified.add(event.file_path)
+        elif event.name in DURATIONS:
+            self.durations[DURATIONS[event.name]].observe(event.duration)
+
+            if event.name == 'serialize' and event.file_path is not None:
+                self.written.add(event.file_path)
+        elif event.name == 'written' and event.file_path is not None:
+            self.written.add(event.file_path)
+        elif event.name == 'warning':
+            self.warnings[warning_type(event)] += 1
+        elif event.name == 'catalog':
+            self.catalog_ids   = event.elements
+            self.catalog_files = event.files or 0
+
+    def format(self) -> str:
+        lines: list[str] = []
+
+        def family(name: str, kind: str, description: str, samples: list[str]) -> None:
+            lines.append(f'# HELP {PREFIX}_{name} {description}')
+            lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+            lines.extend(samples)
+
+        family('files_total', 'counter', 'Number of supplied files by state.', [
+            f'{PREFIX}_files_total{{state="processed"}} {len(self.processed)}',
+            f'{PREFIX}_files_total{{state="modified"}} {len(self.modified)}',
+            f'{PREFIX}_files_total{{state="written"}} {len(self.written)}',
+        ])
+        family('warnings_total', 'counter', 'Number of reported warnings by type.', [
+            f'{PREFIX}_warnings_total{{type="{escape_label(kind)}"}} {count}' for kind, count in sorted(self.warnings.items())
+        ])
+        family('catalog_ids', 'gauge', 'Number of IDs in the catalog built from the --xref-dir directory.', [
+            f'{PREFIX}_catalog_ids {self.catalog_ids}'
+        ])
+        family('catalog_files', 'gauge', 'Number of files in the catalog built from the --xref-dir directory.', [
+            f'{PREFIX}_catalog_files {self.catalog_files}'
+        ])
+        family('catalog_duplicate_ids', 'gauge', 'Number of duplicate IDs found in the catalog.', [
+            f'{PREFIX}_catalog_duplicate_ids {self.warnings["Duplicate ID"]}'
+        ])
+
+        for name, histogram in self.durations.items():
+            family(f'{name}_duration_seconds', 'histogram', f'Duration of {name} operations in seconds.', histogram.samples(f'{PREFIX}_{name}_duration_seconds'))
+
+        family('run_duration_seconds', 'gauge', 'Duration of the run in seconds.', [
+            f'{PREFIX}_run_duration_seconds {format_value(time.monotonic() - self._start)}'
+        ])
+        family('last_run_timestamp_seconds', 'gauge', 'Time at which the run finished in seconds since the epoch.', [
+            f'{PREFIX}_last_run_timestamp_seconds {format_value(time.time())}'
+        ])
+
+        if (rss := peak_rss()) is not None:
+            family('peak_rss_bytes', 'gauge', 'Peak resident set size of the process in bytes.', [
+                f'{PREFIX}_peak_rss_bytes {rss}'
+            ])
+
+        return '\n'.join(lines) + '\n'
+
+    # The file is replaced atomically so that a collector never reads
+    # a partially written file:
+    def write(self, file_path: str | Path) -> None:
+        directory = Path(file_path).parent
+        fd, temp_path = tempfile.mkstemp(prefix='.' + Path(file_path).name + '.', dir=directory)
+
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.format())
+
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,86 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import shutil
+
+from collections.abc import Iterable
+from pathlib import Path
+
+__all__ = [
+    'Mirror'
+]
+
+# The mirror maps the supplied files to the same relative paths in the
+# output directory. Files that are not supplied keep their location:
+class Mirror:
+    __slots__ = ('base', 'output_dir', 'files')
+
+    def __init__(self, output_dir: str | Path, files: Iterable[str | Path], base: str | Path | None = None) -> None:
+        self.base       = Path(base or Path.cwd()).resolve()
+        self.output_dir = Path(output_dir)
+        self.files: dict[Path, Path] = {}
+
+        for file_path in files:
+            resolved = Path(file_path).resolve()
+
+            if not resolved.is_relative_to(self.base):
+                raise ValueError(f"File outside the current directory: '{file_path}'")
+
+            self.files[resolved] = self.output_dir / resolved.relative_to(self.base)
+
+            if self.files[resolved].resolve() == resolved:
+                raise ValueError(f"Output directory contains the supplied files: '{output_dir}'")
+
+    def __call__(self, file_path: str | Path) -> Path:
+        resolved = Path(file_path).resolve()
+        return self.files.get(resolved, resolved)
+
+    # Files in the output directory can be hard links to the supplied files
+    # and are removed before writing so that the supplied files never
+    # change. A supplied file is never removed, even if it is its own
+    # output:
+    def prepare(self, file_path: str | Path) -> Path:
+        output_path = self.files[Path(file_path).resolve()]
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if output_path.resolve() != Path(file_path).resolve():
+            output_path.unlink(missing_ok=True)
+
+        return output_path
+
+    def link(self, file_path: str | Path) -> Path:
+        output_path = self.prepare(file_path)
+
+        if output_path.resolve() == Path(file_path).resolve():
+            return output_path
+
+        # Hard links are not possible across file systems, for example
+        # from a read-only mount, and some file systems do not support
+        # them at all:
+        try:
+            os.link(file_path, output_path)
+        except OSError:
+            shutil.copy2(file_path, output_path)
+
+        return output_path
@@ -24,15 +24,41 @@
 import sys
 
 from errno import EPERM
+from typing import NoReturn
 from . import NAME
+from .hooks import HOOKS, Event, emit
 
 __all__ = [
-    'exit_with_error', 'warn'
+    'clear_status', 'exit_with_error', 'log', 'show_status', 'warn'
 ]
 
-def exit_with_error(error_message: str, exit_status: int = EPERM) -> None:
+_status_shown = False
+
+def clear_status() -> None:
+    global _status_shown
+
+    if _status_shown:
+        sys.stderr.write('\r\x1b[K')
+        _status_shown = False
+
+def show_status(status_message: str, final: bool = False) -> None:
+    global _status_shown
+    sys.stderr.write(f'\r{NAME}: {status_message}\x1b[K' + ('\n' if final else ''))
+    sys.stderr.flush()
+    _status_shown = not final
+
+def exit_with_error(error_message: str, exit_status: int = EPERM) -> NoReturn:
+    clear_status()
     print(f'{NAME}: {error_message}', file=sys.stderr)
     sys.exit(exit_status)
 
-def warn(error_message: str) -> None:
+def log(message: str) -> None:
+    clear_status()
+    print(f'{NAME}: {message}', file=sys.stderr)
+
+def warn(error_message: str, file_path: str | None = None) -> None:
+    clear_status()
     print(f'{NAME}: {error_message}', file=sys.stderr)
+
+    if HOOKS:
+        emit(Event('warning', error_message, file_path))
@@ -0,0 +1,183 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import re
+from lxml import etree
+from pathlib import Path
+from typing import IO, Final
+from .hooks import instrumented
+
+__all__ = [
+    'patch_source', 'serialize_xml', 'snapshot_attributes', 'write_xml'
+]
+
+# Markup that can contain a less-than sign is matched as a whole so that
+# only actual start tags are captured by the named groups:
+RE_MARKUP: Final = re.compile(rb'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<!DOCTYPE(?:[^\[>]|\[.*?\])*>|</[^>]*>|<(?P<name>[^\s/>!?]+)(?P<attributes>(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*)\s*/?>', re.S)
+RE_ATTRIBUTE: Final = re.compile(rb'\s([^\s=/>]+)\s*=\s*(?:"(?P<double>[^"]*)"|\'(?P<single>[^\']*)\')')
+RE_REFERENCE: Final = re.compile(r'&(?:#x([0-9A-Fa-f]+)|#([0-9]+)|(amp|lt|gt|quot|apos));')
+
+ENTITIES: Final = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'"}
+
+XML_NAMESPACE: Final = 'http://www.w3.org/XML/1998/namespace'
+
+Snapshot = tuple[int, list[tuple[int, etree._Element, dict[str, str]]]]
+
+def list_attributes(e: etree._Element) -> dict[str, str]:
+    return {str(k): str(v) for k, v in e.attrib.items()}
+
+def snapshot_attributes(xml: etree._ElementTree) -> Snapshot:
+    elements = list(xml.iter(etree.Element))
+    return len(elements), [(i, e, list_attributes(e)) for i, e in enumerate(elements) if e.attrib]
+
+def decode_value(value: str) -> str:
+    def replace(m: re.Match[str]) -> str:
+        if m[1]:
+            return chr(int(m[1], 16))
+        if m[2]:
+            return chr(int(m[2]))
+        return ENTITIES[m[3]]
+
+    return RE_REFERENCE.sub(replace, re.sub(r'[\t\n\r]', ' ', value))
+
+def encode_value(value: str, quote: str) -> str:
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace(quote, '&quot;' if quote == '"' else '&apos;')
+    return value.replace('\t', '&#9;').replace('\n', '&#10;').replace('\r', '&#13;')
+
+# Prefixed attribute names in the source are resolved to the Clark notation
+# used by lxml with the prefixes in scope of the element; namespace
+# declarations are not attributes:
+def resolve_name(e: etree._Element, name: str) -> str | None:
+    prefix, _, localname = name.rpartition(':')
+
+    if name == 'xmlns' or prefix == 'xmlns':
+        return None
+    if not prefix:
+        return name
+    if prefix == 'xml':
+        return f'{{{XML_NAMESPACE}}}{localname}'
+    if (uri := e.nsmap.get(prefix)) is None:
+        return None
+
+    return f'{{{uri}}}{localname}'
+
+def patch_source(data: bytes, xml: etree._ElementTree, snapshot: Snapshot) -> bytes | None:
+    encoding = xml.docinfo.encoding or 'UTF-8'
+    patches: dict[int, tuple[etree._Element, dict[str, str]]] = {}
+    count, entries = snapshot
+
+    try:
+        if '<a'.encode(encoding) != b'<a':
+            return None
+    except LookupError:
+        return None
+
+    if sum(1 for _ in xml.iter(etree.Element)) != count:
+        return None
+
+    for index, e, attributes in entries:
+        current = list_attributes(e)
+
+        if current == attributes:
+            continue
+        if current.keys() != attributes.keys():
+            return None
+
+        patches[index] = (e, dict(attributes))
+
+    if not patches:
+        return data
+
+    result   = bytearray()
+    position = 0
+    counted  = 0
+    line     = 1
+    index    = -1
+    last     = max(patches)
+
+    for match in RE_MARKUP.finditer(data):
+        if not match['name']:
+            continue
+
+        index += 1
+
+        if index > last:
+            break
+        if index not in patches:
+            continue
+
+        e, attributes = patches.pop(index)
+        line += data.count(b'\n', counted, match.end())
+        counted = match.end()
+
+        if match['name'].decode(encoding).rpartition(':')[2] != etree.QName(e).localname:
+            return None
+        if isinstance(e.sourceline, int) and e.sourceline < 65535 and e.sourceline != line:
+            return None
+
+        for m in RE_ATTRIBUTE.finditer(data, match.start('attributes'), match.end('attributes')):
+            name = resolve_name(e, m[1].decode(encoding))
+
+            if name is None or name not in attributes or e.get(name) == attributes[name]:
+                continue
+
+            group = 'double' if m['double'] is not None else 'single'
+
+            if decode_value(m[group].decode(encoding)) != attributes[name]:
+                return None
+
+            result.extend(data[position:m.start(group)])
+            result.extend(encode_value(str(e.get(name)), '"' if group == 'double' else "'").encode(encoding, 'xmlcharrefreplace'))
+            position = m.end(group)
+            del attributes[name]
+
+        if any(e.get(name) != value for name, value in attributes.items()):
+            return None
+
+    if patches:
+        return None
+
+    result.extend(data[position:])
+    return bytes(result)
+
+@instrumented('serialize')
+def serialize_xml(xml: etree._ElementTree, data: bytes, snapshot: Snapshot | None = None) -> bytes:
+    if snapshot is not None and (result := patch_source(data, xml, snapshot)) is not None:
+        return result
+
+    return etree.tostring(xml)
+
+@instrumented('serialize')
+def write_xml(xml: etree._ElementTree, source_path: str | Path, target_path: str | Path | IO[str], snapshot: Snapshot | None = None) -> None:
+    if not isinstance(target_path, (str, Path)):
+        target_path.write(etree.tostring(xml, encoding='unicode'))
+        return
+
+    if snapshot is not None:
+        data = patch_source(Path(source_path).read_bytes(), xml, snapshot)
+
+        if data is not None:
+            Path(target_path).write_bytes(data)
+            return
+
+    xml.write(target_path)
@@ -0,0 +1,163 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import cProfile
+import heapq
+import pstats
+import re
+import time
+
+from pathlib import Path
+from .hooks import Event
+
+__all__ = [
+    'Profiler'
+]
+
+def profile_name(*parts: str) -> str:
+    return re.sub(r'[^\w.-]+', '_', '-'.join(parts)) + '.prof'
+
+# The profiler records each phase of the run separately. With a number of
+# slowest files, each file is recorded on its own as well, its statistics
+# are added to the statistics of the phase, and only the slowest files
+# are kept:
+class Profiler:
+    __slots__ = ('directory', 'slowest', 'phases', 'files', '_phase', '_profile', '_stats', '_file', '_file_profile', '_file_start', '_count')
+
+    def __init__(self, directory: str | Path, slowest: int | None = None) -> None:
+        self.directory = Path(directory)
+        self.slowest   = slowest
+        self.phases: list[tuple[str, pstats.Stats]] = []
+        self.files: list[tuple[float, int, str, str, cProfile.Profile]] = []
+        self._phase: str | None = None
+        self._profile: cProfile.Profile | None = None
+        self._stats: pstats.Stats | None = None
+        self._file: str | None = None
+        self._file_profile: cProfile.Profile | None = None
+        self._file_start = 0.0
+        self._count      = 0
+
+    def __call__(self, event: Event) -> None:
+        if event.name == 'phase_start':
+            self.start(event.detail)
+        elif event.name == 'phase_end':
+            self.finish()
+        elif event.name == 'file_start' and self.slowest and self._profile is not None and event.file_path is not None:
+            self.start_file(event.file_path)
+        elif event.name == 'file_end' and self._file_profile is not None:
+            self.finish_file()
+
+    def start(self, phase: str) -> None:
+        self.finish()
+
+        self._phase   = phase
+        self._stats   = None
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def finish(self) -> None:
+        if self._phase is None or self._profile is None:
+            return
+
+        self.finish_file()
+        self._profile.disable()
+        self._add_stats(self._profile)
+
+        if self._stats is not None:
+            self.phases.append((self._phase, self._stats))
+
+        self._phase   = None
+        self._profile = None
+        self._stats   = None
+
+    def start_file(self, file_path: str) -> None:
+        if self._profile is None:
+            return
+
+        self.finish_file()
+        self._profile.disable()
+
+        self._file         = file_path
+        self._file_profile = cProfile.Profile()
+        self._file_start   = time.perf_counter()
+        self._file_profile.enable()
+
+    def finish_file(self) -> None:
+        if self._file_profile is None or self._file is None or self._phase is None or self._profile is None:
+            return
+
+        self._file_profile.disable()
+        duration = time.perf_counter() - self._file_start
+
+        self._add_stats(self._file_profile)
+        self._count += 1
+
+        entry = (duration, self._count, self._phase, self._file, self._file_profile)
+
+        if self.slowest and len(self.files) < self.slowest:
+            heapq.heappush(self.files, entry)
+        elif self.files and duration > self.files[0][0]:
+            heapq.heapreplace(self.files, entry)
+
+        self._file         = None
+        self._file_profile = None
+        self._profile.enable()
+
+    def _add_stats(self, profile: cProfile.Profile) -> None:
+        # Profiles without any recorded calls cannot be loaded by pstats:
+        try:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+        except TypeError:
+            pass
+
+    # Profiles are written in the pstats format that is supported by viewers
+    # such as snakeviz and converters such as gprof2dot and flameprof:
+    def write(self) -> list[Path]:
+        self.finish()
+
+        result: list[Path] = []
+        names: set[str] = set()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        for phase, stats in self.phases:
+            name  = profile_name(phase)
+            index = 1
+
+            while name in names:
+                index += 1
+                name   = profile_name(phase, str(index))
+
+            names.add(name)
+            stats.dump_stats(self.directory / name)
+            result.append(self.directory / name)
+
+        for rank, (duration, _, phase, file_path, profile) in enumerate(sorted(self.files, reverse=True), start=1):
+            name = profile_name(f'slowest-{rank:02}', phase, Path(file_path).name)
+            profile.dump_stats(self.directory / name)
+            result.append(self.directory / name)
+
+        return result
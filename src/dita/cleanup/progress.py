@@ -0,0 +1,118 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import sys
+import time
+
+from pathlib import Path
+from .hooks import Event
+from .out import log, show_status
+
+__all__ = [
+    'Progress'
+]
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes   = divmod(minutes, 60)
+    return f'{hours}:{minutes:02}:{seconds:02}' if hours else f'{minutes}:{seconds:02}'
+
+class Progress:
+    __slots__ = ('interactive', 'interval', 'phase', 'total', 'files', 'size', 'modified', '_start', '_next')
+
+    def __init__(self, interactive: bool | None = None, interval: float | None = None) -> None:
+        self.interactive = sys.stderr.isatty() if interactive is None else interactive
+        self.interval    = interval if interval is not None else 0.2 if self.interactive else 10.0
+        self.phase: str | None = None
+        self.total: int | None = None
+        self.files       = 0
+        self.size        = 0
+        self.modified: set[str] = set()
+        self._start      = 0.0
+        self._next       = 0.0
+
+    def __call__(self, event: Event) -> None:
+        if event.name == 'file_end' or event.name == 'file_found':
+            self.update(event.file_path, event.updated)
+        elif event.name == 'phase_start':
+            self.start(event.detail, event.files)
+        elif event.name == 'phase_end':
+            self.finish()
+
+    def start(self, phase: str, total: int | None = None) -> None:
+        self.finish()
+
+        self.phase  = phase
+        self.total  = total
+        self.files  = 0
+        self.size   = 0
+        self._start = time.monotonic()
+        self._next  = self._start + self.interval
+
+    def update(self, file_path: str | Path | None = None, modified: bool = False) -> None:
+        self.files += 1
+
+        if file_path is not None:
+            try:
+                self.size += os.path.getsize(file_path)
+            except OSError:
+                pass
+
+            if modified:
+                self.modified.add(str(file_path))
+
+        if (now := time.monotonic()) >= self._next:
+            self._next = now + self.interval
+            self.show(now)
+
+    def describe(self, now: float) -> str:
+        elapsed = max(now - self._start, 1e-6)
+        rate    = self.files / elapsed
+        result  = f'{self.phase}: {self.files}'
+
+        if self.total is not None:
+            result += f'/{self.total}'
+
+        result += f' files, {rate:.1f} files/s'
+
+        if self.size:
+            result += f', {self.size / elapsed / 1e6:.1f} MB/s'
+
+        if self.total is not None and self.files < self.total and rate:
+            result += ', ETA ' + format_duration((self.total - self.files) / rate)
+
+        return result + f', {len(self.modified)} modified'
+
+    def show(self, now: float, final: bool = False) -> None:
+        if self.interactive:
+            show_status(self.describe(now), final)
+        else:
+            log(self.describe(now))
+
+    def finish(self) -> None:
+        if self.phase is None:
+            return
+
+        self.show(time.monotonic(), final=True)
+        self.phase = None
@@ -0,0 +1,324 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import time
+
+from contextlib import redirect_stderr, redirect_stdout
+from errno import EADDRINUSE, EINVAL, ENOTDIR
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from typing import Any, Final, NoReturn
+from . import NAME
+from .catalog import Catalog
+from .cli import parse_args, run_files
+from .hooks import Event, load_plugins, register, unregister
+from .out import exit_with_error, log, warn
+from .xml import list_ids, parse_xml
+
+__all__ = [
+    'CatalogCache', 'Server', 'handle_request', 'serve'
+]
+
+# The maximum number of seconds before files that are modified in place
+# are indexed again:
+RESCAN_INTERVAL: Final = 5.0
+
+class CatalogCache:
+    __slots__ = ('directory', 'catalog', 'duplicates', 'interval', '_stats', '_dirs', '_scanned')
+
+    def __init__(self, directory: str | Path, interval: float = RESCAN_INTERVAL) -> None:
+        self.directory = Path(directory).resolve()
+        self.catalog   = Catalog()
+        self.interval  = interval
+        self.duplicates: dict[Path, list[str]] = {}
+        self._stats: dict[Path, tuple[int, int]] = {}
+        self._dirs: dict[Path, int] = {}
+        self._scanned  = float('-inf')
+
+    # Duplicate IDs are reported with every request that uses the catalog
+    # instead of once on the standard error output of the server:
+    def add_file(self, file_path: Path, id_list: list[str]) -> None:
+        seen: set[str] = set()
+        duplicates: list[str] = []
+
+        for xml_id in id_list:
+            if xml_id in self.catalog or xml_id in seen:
+                duplicates.append(xml_id)
+            seen.add(xml_id)
+
+        if duplicates:
+            self.duplicates[file_path] = duplicates
+
+        self.catalog.add_file(file_path, id_list, reported=seen)
+
+    def directories_changed(self) -> bool:
+        for directory, mtime in self._dirs.items():
+            try:
+                if directory.stat().st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+
+        return False
+
+    # The files are only checked again if a directory changed, which is the
+    # case when files are added, removed, or replaced on save, or once the
+    # rescan interval expires to notice files that are modified in place:
+    def refresh(self) -> list[Path]:
+        if time.monotonic() - self._scanned < self.interval and not self.directories_changed():
+            return []
+
+        current: dict[Path, tuple[int, int]] = {}
+        directories: dict[Path, int] = {}
+        changed: list[Path] = []
+        scanned = time.monotonic()
+
+        for root, dirs, files in self.directory.walk(top_down=True, on_error=print):
+            try:
+                directories[root] = root.stat().st_mtime_ns
+            except OSError:
+                continue
+
+            for name in files:
+                if not name.endswith('.dita'):
+                    continue
+
+                file_path = Path(root, name)
+
+                try:
+                    status = file_path.stat()
+                except OSError:
+                    continue
+
+                current[file_path] = (status.st_mtime_ns, status.st_size)
+
+        for file_path in self._stats.keys() - current.keys():
+            self.catalog.remove_file(file_path)
+            self.duplicates.pop(file_path, None)
+            changed.append(file_path)
+
+        for file_path, file_stat in current.items():
+            if self._stats.get(file_path) == file_stat:
+                continue
+
+            self.catalog.remove_file(file_path)
+            self.duplicates.pop(file_path, None)
+            changed.append(file_path)
+
+            try:
+                xml = parse_xml(file_path)
+            except (etree.XMLSyntaxError, OSError) as message:
+                warn(str(message))
+                continue
+
+            self.add_file(file_path, list_ids(xml))
+
+        self._stats    = current
+        self._dirs     = directories
+        self._scanned  = scanned
+        return changed
+
+def exit_status(code: object) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+
+    print(code, file=sys.stderr)
+    return 1
+
+def handle_request(request: dict[str, Any], caches: dict[Path, CatalogCache]) -> dict[str, Any]:
+    stdout = StringIO()
+    stderr = StringIO()
+    warnings: list[dict[str, str | None]] = []
+    argv   = [str(a) for a in request.get('argv', [])]
+    document_path: Path | None = None
+
+    def collect(event: Event) -> None:
+        if event.name == 'warning':
+            warnings.append({'file': event.file_path, 'message': event.detail})
+
+    with redirect_stdout(stdout), redirect_stderr(stderr), tempfile.TemporaryDirectory() as temp_dir:
+        register(collect)
+
+        try:
+            if request.get('cwd'):
+                os.chdir(request['cwd'])
+
+            # Documents supplied in the request are processed in a temporary
+            # file next to the file they were read from so that relative
+            # references resolve the same way; the file does not end with
+            # .dita so that it never enters the catalog:
+            if 'document' in request:
+                name = Path(request.get('name') or Path(temp_dir, 'topic.dita'))
+
+                with tempfile.NamedTemporaryFile('w', suffix='.tmp', prefix=f'.{name.name}.', dir=name.parent, delete=False) as f:
+                    f.write(request['document'])
+
+                document_path = Path(f.name)
+                argv += ['--output', '-', str(document_path)]
+
+            try:
+                args = parse_args(argv)
+                cache = None
+
+                if args.xref_dir and not args.save_catalog:
+                    cache = caches.get(Path(args.xref_dir).resolve())
+
+                exit_code = run_files(args, cache.catalog if cache else None, cache.duplicates if cache else None)
+            finally:
+                if document_path:
+                    document_path.unlink(missing_ok=True)
+        except SystemExit as error:
+            exit_code = exit_status(error.code)
+        except Exception as message:
+            print(f'{NAME}: {message}', file=sys.stderr)
+            exit_code = 1
+        finally:
+            unregister(collect)
+
+    # Report problems in supplied documents under the name of the request:
+    if document_path and request.get('name'):
+        for warning in warnings:
+            if warning['file'] == str(document_path):
+                warning['file'] = request['name']
+            warning['message'] = str(warning['message']).replace(str(document_path), request['name'])
+
+        return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue().replace(str(document_path), request['name']), 'warnings': warnings}
+
+    return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'warnings': warnings}
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    server: 'Server'
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError as message:
+            response = {'exit_code': 1, 'stdout': '', 'stderr': f'{NAME}: Invalid request: {message}\n', 'warnings': []}
+        else:
+            response = handle_request(request, self.server.caches)
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+class Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    def __init__(self, socket_path: str | Path, xref_dirs: list[str] | None = None, interval: float = RESCAN_INTERVAL) -> None:
+        self.caches = {c.directory: c for c in (CatalogCache(d, interval) for d in xref_dirs or [])}
+
+        for cache in self.caches.values():
+            cache.refresh()
+
+        super().__init__(str(socket_path), RequestHandler)
+        os.chmod(socket_path, stat.S_IRUSR | stat.S_IWUSR)
+
+    # Each request is processed in a forked child that inherits the warm
+    # catalogs; they are brought up to date in the parent beforehand so
+    # that the work is not repeated by every request:
+    def process_request(self, request: Any, client_address: Any) -> None:
+        for cache in self.caches.values():
+            if changed := cache.refresh():
+                log(f'Updated catalog: {cache.directory}: {len(changed)} file(s)')
+
+        super().process_request(request, client_address)
+
+def remove_stale_socket(socket_path: str) -> None:
+    if not os.path.exists(socket_path):
+        return
+
+    if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        exit_with_error(f"Not a socket: '{socket_path}'", ENOTDIR)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+            return
+
+    exit_with_error(f"Socket already in use: '{socket_path}'", EADDRINUSE)
+
+def parse_serve_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog=f'{NAME} serve',
+        description='Process requests from the client on a Unix domain socket.',
+        add_help=False)
+
+    parser._optionals.title = 'Options'
+    parser._positionals.title = 'Arguments'
+
+    parser.add_argument('-X', '--xref-dir',
+        default=[],
+        metavar='DIRECTORY',
+        action='append',
+        help='keep the catalog of IDs from the selected directory up to date between requests; can be defined more than once')
+    parser.add_argument('--rescan-interval',
+        default=RESCAN_INTERVAL,
+        type=float,
+        metavar='SECONDS',
+        help=f'check all files for changes at most once in the selected number of seconds unless a directory changes (default: {RESCAN_INTERVAL:g})')
+    parser.add_argument('-h', '--help',
+        action='help',
+        help='display this help and exit')
+    parser.add_argument('socket', metavar='SOCKET',
+        help='specify the path to the Unix domain socket')
+
+    args = parser.parse_args(argv)
+
+    for value in args.xref_dir:
+        if not Path(value).is_dir():
+            exit_with_error(f"Not a directory: '{value}'", ENOTDIR)
+
+    if not args.rescan_interval >= 0:
+        exit_with_error(f"Invalid rescan interval: '{args.rescan_interval:g}'", EINVAL)
+
+    return args
+
+def serve(argv: list[str]) -> NoReturn:
+    args = parse_serve_args(argv)
+
+    remove_stale_socket(args.socket)
+
+    for error_message in load_plugins():
+        warn(error_message)
+
+    try:
+        with Server(args.socket, args.xref_dir, args.rescan_interval) as server:
+            log(f'Listening on {args.socket}')
+            server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
+    except OSError as message:
+        exit_with_error(str(message))
+    finally:
+        if os.path.exists(args.socket) and stat.S_ISSOCK(os.stat(args.socket).st_mode):
+            os.unlink(args.socket)
+
+    sys.exit(0)
@@ -0,0 +1,227 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+
+from collections.abc import Callable
+from contextlib import nullcontext
+from io import BytesIO
+from lxml import etree
+from pathlib import Path
+from typing import IO, Final
+from .hooks import HOOKS, Event, emit, instrumented
+from .xml import prune_id
+
+__all__ = [
+    'scan_xml', 'stream_file', 'stream_xml'
+]
+
+XML_NAMESPACE: Final = 'http://www.w3.org/XML/1998/namespace'
+
+def local_nsmap(e: etree._Element) -> dict[str | None, str]:
+    nsmap  = dict(e.nsmap)
+
+    if (parent := e.getparent()) is not None:
+        nsmap = {k: v for k, v in nsmap.items() if parent.nsmap.get(k) != v}
+
+    return nsmap
+
+def escape_text(value: str) -> bytes:
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+    return value.encode('ascii', 'xmlcharrefreplace')
+
+def escape_attribute(value: str) -> str:
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+    return value.replace('\r', '&#13;').replace('\n', '&#10;').replace('\t', '&#9;')
+
+def qualified_name(e: etree._Element) -> str:
+    localname = etree.QName(e).localname
+    return f'{e.prefix}:{localname}' if e.prefix else localname
+
+# Start tags are serialized with the prefixes that are in scope, including
+# the reserved xml prefix that is never declared:
+def start_tag(e: etree._Element, empty: bool = False) -> bytes:
+    prefixes = {uri: prefix for prefix, uri in e.nsmap.items() if prefix}
+    prefixes[XML_NAMESPACE] = 'xml'
+    result   = '<' + qualified_name(e)
+
+    for prefix, uri in local_nsmap(e).items():
+        result += (f' xmlns:{prefix}="' if prefix else ' xmlns="') + escape_attribute(uri) + '"'
+
+    for key, value in e.attrib.items():
+        qname = etree.QName(key)
+        name  = prefixes[qname.namespace] + ':' + qname.localname if qname.namespace else qname.localname
+
+        result += f' {name}="{escape_attribute(str(value))}"'
+
+    return (result + ('/>' if empty else '>')).encode('ascii', 'xmlcharrefreplace')
+
+def release(e: etree._Element) -> None:
+    e.clear(keep_tail=True)  # type: ignore[call-arg]
+
+    if (parent := e.getparent()) is not None:
+        parent.remove(e)
+
+# Elements are transformed when their start tags are parsed, which is when
+# all of their attributes are known, and written once the next event shows
+# whether they have any content. Only the ancestors of the current element
+# are kept in memory. The output matches etree.tostring() with the ASCII
+# encoding:
+@instrumented('transform')
+def stream_xml(source: str | Path, target: str | Path | IO[bytes] | None, transform: Callable[[etree._Element], bool]) -> bool:
+    updated = False
+    context = etree.iterparse(str(source), events=('start', 'end', 'comment', 'pi'))
+
+    if target is None:
+        for event, e in context:
+            if event == 'start':
+                if transform(e):
+                    updated = True
+            elif (parent := e.getparent()) is not None:
+                e.clear(keep_tail=True)  # type: ignore[call-arg]
+
+                while e.getprevious() is not None:
+                    del parent[0]
+
+        return updated
+
+    with open(target, 'wb') if isinstance(target, (str, Path)) else nullcontext(target) as output:
+        stack: list[bytes] = []
+        started: etree._Element | None = None
+        ended: etree._Element | None = None
+        doctype = False
+
+        for event, e in context:
+            if not doctype:
+                if docinfo_doctype := e.getroottree().docinfo.doctype:
+                    output.write(docinfo_doctype.encode('ascii', 'xmlcharrefreplace') + b'\n')
+                doctype = True
+
+            # Write the start tag of the previous element, or the whole
+            # element if it turned out to be empty:
+            if started is not None:
+                if event == 'end' and e is started and not e.text:
+                    output.write(start_tag(e, empty=True))
+                    stack.append(b'')
+                else:
+                    output.write(start_tag(started))
+                    stack.append(b'</' + qualified_name(started).encode('ascii', 'xmlcharrefreplace') + b'>')
+
+                    if started.text:
+                        output.write(escape_text(started.text))
+
+                started = None
+
+            # Write the text that follows the previous element and release
+            # the element:
+            if ended is not None:
+                if ended.tail and ended.getparent() is not None:
+                    output.write(escape_text(ended.tail))
+
+                release(ended)
+                ended = None
+
+            if event == 'start':
+                if transform(e):
+                    updated = True
+
+                started = e
+            elif event == 'end':
+                output.write(stack.pop())
+                ended = e
+            else:
+                output.write(etree.tostring(e, with_tail=False))
+                ended = e
+
+    return updated
+
+def scan_xml(source: str | Path, prune_ids: bool = False) -> tuple[list[str], list[str]]:
+    id_list: list[str] = []
+    link_list: list[str] = []
+
+    # Collect the same IDs and links as list_ids() and list_links() would
+    # after the IDs are pruned:
+    def collect(e: etree._Element) -> bool:
+        if prune_ids:
+            prune_id(e)
+
+        if e.getparent() is None:
+            if e.tag in ['concept', 'reference', 'task', 'topic']:
+                id_list.append(str(e.get('id', '')))
+        elif id_list and (xml_id := e.get('id')) is not None and not str(xml_id).startswith('_'):
+            id_list.append(str(xml_id))
+
+        if e.tag in ['xref', 'link'] and e.get('scope') != 'external' and (href := e.get('href')):
+            link_list.append(str(href))
+
+        return False
+
+    stream_xml(source, None, collect)
+    return id_list, link_list
+
+# Streamed files are never serialized separately, so the files that are
+# written are reported with their own event:
+def report_written(file_path: str | Path) -> None:
+    if HOOKS:
+        emit(Event('written', file_path=str(file_path)))
+
+def stream_file(file_path: str | Path, target: str | Path | IO[str] | None, transform: Callable[[etree._Element], bool]) -> bool:
+    if target is not None and not isinstance(target, (str, Path)):
+        target.flush()
+
+        if (buffer := getattr(target, 'buffer', None)) is None:
+            data    = BytesIO()
+            updated = stream_xml(file_path, data, transform)
+            target.write(data.getvalue().decode('ascii'))
+            report_written(file_path)
+            return updated
+
+        updated = stream_xml(file_path, buffer, transform)
+        buffer.flush()
+        report_written(file_path)
+        return updated
+
+    if target:
+        updated = stream_xml(file_path, target, transform)
+        report_written(file_path)
+        return updated
+
+    # Files are updated in place through a temporary file that replaces the
+    # original only if anything changed:
+    source_path = file_path
+    file_path   = Path(file_path)
+
+    with tempfile.NamedTemporaryFile(dir=file_path.parent, prefix='.' + file_path.name + '.', delete=False) as f:
+        temp_path = Path(f.name)
+
+    try:
+        if updated := stream_xml(file_path, temp_path, transform):
+            shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+            report_written(source_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+    return updated
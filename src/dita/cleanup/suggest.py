@@ -0,0 +1,124 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+from collections import Counter
+from collections.abc import Iterable
+from typing import Final
+from .xml import RE_ID_REFERENCE
+
+__all__ = [
+    'SuggestionIndex', 'edit_distance', 'normalize_id'
+]
+
+# The number of characters in an indexed substring:
+GRAM_SIZE: Final = 3
+
+# The number of best candidates from the index that are compared in full:
+CANDIDATES: Final = 25
+
+# The maximum number of edits between a suggested ID and the target:
+MAX_DISTANCE: Final = 3
+
+# Substrings shared by more IDs are skipped unless no other substring is found:
+COMMON_GRAM: Final = 5000
+
+def normalize_id(value: str) -> str:
+    return RE_ID_REFERENCE.sub('', value).lower()
+
+def list_grams(value: str) -> set[str]:
+    padded = f'^{value}$'
+    return {padded[i:i + GRAM_SIZE] for i in range(max(len(padded) - GRAM_SIZE + 1, 1))}
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    previous = list(range(len(second) + 1))
+
+    for i, a in enumerate(first, 1):
+        current = [i]
+
+        for j, b in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b)))
+
+        if min(current) > limit:
+            return limit + 1
+
+        previous = current
+
+    return previous[-1]
+
+def list_prefixes(value: str) -> list[str]:
+    result = [value[:i] for i, c in enumerate(value) if c == '_' and i > 0]
+    result.append(value)
+    return result
+
+class SuggestionIndex:
+    __slots__ = ('_source', '_ids', '_grams')
+
+    def __init__(self, xml_ids: Iterable[str]) -> None:
+        self._source: Iterable[str] | None = xml_ids
+        self._ids: list[str] = []
+        self._grams: dict[str, list[int]] = {}
+
+    def _build(self) -> None:
+        if self._source is None:
+            return
+
+        for index, xml_id in enumerate(self._source):
+            self._ids.append(xml_id)
+
+            for gram in list_grams(normalize_id(xml_id)):
+                self._grams.setdefault(gram, []).append(index)
+
+        self._source = None
+
+    def suggest(self, target_id: str, limit: int = 3) -> list[str]:
+        self._build()
+
+        target = normalize_id(target_id)
+        scores: Counter[int] = Counter()
+
+        postings = sorted((self._grams[g] for g in list_grams(target) if g in self._grams), key=len)
+
+        for posting in postings:
+            if scores and len(posting) > COMMON_GRAM:
+                break
+
+            scores.update(posting)
+
+        if not scores:
+            return []
+
+        prefixes = list_prefixes(target)
+        matches  = []
+
+        for index, _ in scores.most_common(CANDIDATES):
+            candidate = normalize_id(self._ids[index])
+            threshold = max(1, min(MAX_DISTANCE, len(candidate) // 4))
+            distance  = min(edit_distance(prefix, candidate, threshold) for prefix in prefixes)
+
+            if distance <= threshold:
+                matches.append((distance, self._ids[index]))
+
+        return [xml_id for _, xml_id in sorted(matches)[:limit]]
@@ -0,0 +1,165 @@
+# Copyright (C) 2026 Jaromir Hradilek
+
+# MIT License
+#
+# Permission  is hereby granted,  free of charge,  to any person  obtaining
+# a copy of  this software  and associated documentation files  (the "Soft-
+# ware"),  to deal in the Software  without restriction,  including without
+# limitation the rights to use,  copy, modify, merge,  publish, distribute,
+# sublicense, and/or sell copies of the Software,  and to permit persons to
+# whom the Software is furnished to do so,  subject to the following condi-
+# tions:
+#
+# The above copyright notice  and this permission notice  shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS",  WITHOUT WARRANTY OF ANY KIND,  EXPRESS
+# OR IMPLIED,  INCLUDING BUT NOT LIMITED TO  THE WARRANTIES OF MERCHANTABI-
+# LITY,  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT
+# SHALL THE AUTHORS OR COPYRIGHT HOLDERS  BE LIABLE FOR ANY CLAIM,  DAMAGES
+# OR OTHER LIABILITY,  WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM,  OUT OF OR IN CONNECTION WITH  THE SOFTWARE  OR  THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+
+from collections.abc import Iterable
+from lxml import etree
+from pathlib import Path
+from typing import Final
+from urllib.parse import unquote, urljoin, urlparse
+
+__all__ = [
+    'Validator'
+]
+
+CATALOG_NAMESPACE: Final = '{urn:oasis:names:tc:entity:xmlns:xml:catalog}'
+XML_BASE: Final = '{http://www.w3.org/XML/1998/namespace}base'
+
+def to_path(uri: str) -> Path | None:
+    parsed = urlparse(uri)
+
+    if parsed.scheme == 'file':
+        return Path(unquote(parsed.path))
+    if not parsed.scheme or len(parsed.scheme) == 1:
+        return Path(uri)
+
+    return None
+
+class CatalogResolver(etree.Resolver):
+    def __init__(self, validator: 'Validator', dtd_path: Path) -> None:
+        super().__init__()
+        self.validator = validator
+        self.dtd_path  = dtd_path
+
+    def resolve(self, system_url: str | None, public_id: str | None, context: object) -> object:  # type: ignore[override]
+        if (path := self.validator.resolve(public_id, system_url, self.dtd_path)) is None:
+            return None
+
+        return self.resolve_filename(str(path), context)  # type: ignore[attr-defined]
+
+class Validator:
+    __slots__ = ('catalog_files', '_public', '_system', '_rewrite', '_dtds')
+
+    def __init__(self, catalog_files: Iterable[str | Path] | None = None) -> None:
+        self.catalog_files = [Path(f) for f in catalog_files or []]
+        self._public: dict[str, str] = {}
+        self._system: dict[str, str] = {}
+        self._rewrite: list[tuple[str, str]] = []
+        self._dtds: dict[Path, etree.DTD | None] = {}
+
+        for catalog_file in self.catalog_files:
+            self._read_catalog(catalog_file, set())
+
+        self._rewrite.sort(key=lambda r: len(r[0]), reverse=True)
+
+    def __reduce__(self) -> tuple[type['Validator'], tuple[list[Path]]]:
+        return Validator, (self.catalog_files,)
+
+    def _read_catalog(self, catalog_file: Path, visited: set[Path]) -> None:
+        catalog_file = catalog_file.resolve()
+
+        if catalog_file in visited:
+            return
+
+        visited.add(catalog_file)
+        parser = etree.XMLParser(no_network=True, resolve_entities=False)
+
+        try:
+            xml = etree.parse(catalog_file, parser)
+        except (etree.XMLSyntaxError, OSError):
+            return
+
+        for e in xml.iter(etree.Element):
+            tag  = str(e.tag).removeprefix(CATALOG_NAMESPACE)
+            base = catalog_file.as_uri()
+
+            for parent in reversed([e, *e.iterancestors()]):
+                if parent.get(XML_BASE):
+                    base = urljoin(base, str(parent.get(XML_BASE)))
+
+            if tag == 'public' and e.get('publicId') and e.get('uri'):
+                self._public.setdefault(str(e.get('publicId')), urljoin(base, str(e.get('uri'))))
+            elif tag == 'system' and e.get('systemId') and e.get('uri'):
+                self._system.setdefault(str(e.get('systemId')), urljoin(base, str(e.get('uri'))))
+            elif tag == 'rewriteSystem' and e.get('systemIdStartString') and e.get('rewritePrefix'):
+                self._rewrite.append((str(e.get('systemIdStartString')), urljoin(base, str(e.get('rewritePrefix')))))
+            elif tag == 'nextCatalog' and e.get('catalog'):
+                if (path := to_path(urljoin(base, str(e.get('catalog'))))) is not None:
+                    self._read_catalog(path, visited)
+
+    def resolve(self, public_id: str | None, system_id: str | None, file_path: Path) -> Path | None:
+        if system_id and system_id in self._system:
+            return to_path(self._system[system_id])
+
+        if system_id:
+            for prefix, replacement in self._rewrite:
+                if system_id.startswith(prefix):
+                    return to_path(replacement + system_id[len(prefix):])
+
+        if public_id and public_id in self._public:
+            return to_path(self._public[public_id])
+
+        if system_id and (path := to_path(system_id)) is not None:
+            return Path(os.path.normpath(file_path.parent / path))
+
+        return None
+
+    def load_dtd(self, dtd_path: Path) -> etree.DTD | None:
+        dtd_path = dtd_path.resolve()
+
+        if dtd_path not in self._dtds:
+            # Load the DTD through a document that refers to it so that its
+            # modules and entity files are resolved through the catalog too:
+            parser = etree.XMLParser(load_dtd=True, no_network=True, resolve_entities=False)
+            parser.resolvers.add(CatalogResolver(self, dtd_path))
+            document = f'<!DOCTYPE dtd SYSTEM "{dtd_path.as_uri()}"><dtd />'
+
+            try:
+                self._dtds[dtd_path] = etree.fromstring(document, parser).getroottree().docinfo.externalDTD
+            except (etree.XMLSyntaxError, OSError):
+                self._dtds[dtd_path] = None
+
+        return self._dtds[dtd_path]
+
+    def validate(self, xml: etree._ElementTree, file_path: Path) -> list[str]:
+        public_id = xml.docinfo.public_id
+        system_id = xml.docinfo.system_url  # type: ignore[attr-defined]
+
+        if not public_id and not system_id:
+            return [str(file_path) + ": Missing document type declaration"]
+
+        dtd_path = self.resolve(public_id, system_id, file_path)
+
+        if dtd_path is None:
+            return [str(file_path) + ": Cannot resolve DTD: " + str(public_id or system_id)]
+
+        dtd = self.load_dtd(dtd_path)
+
+        if dtd is None:
+            return [str(file_path) + ": Cannot load DTD: " + str(dtd_path)]
+
+        if dtd.validate(xml):
+            return []
+
+        return [f"{file_path}:{error.line}: Invalid content: {error.message}" for error in dtd.error_log]  # type: ignore[attr-defined]
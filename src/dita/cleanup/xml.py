@@ -22,19 +22,55 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 import re
+from collections.abc import Callable, Iterable, Mapping
 from lxml import etree
 from pathlib import Path
-from typing import Final
+from typing import IO, TYPE_CHECKING, Final
+from .hooks import instrumented
 from .out import warn
 
+if TYPE_CHECKING:
+    from .suggest import SuggestionIndex
+
 __all__ = [
-    'list_ids', 'prune_ids', 'prune_xrefs', 'replace_attributes',
-    'update_image_paths', 'update_xref_targets'
+    'list_attribute_references', 'list_conrefs', 'list_ids', 'list_links', 'list_target_ids',
+    'match_candidates', 'match_ids',
+    'parse_xml', 'prune_id', 'prune_ids', 'prune_xref', 'prune_xrefs', 'replace_attributes',
+    'report_problems', 'substitute_attributes', 'update_image_path', 'update_image_paths', 'update_xref_target',
+    'update_xref_targets'
 ]
 
-RE_ID_ATTRIBUTE:   Final = re.compile(r'[_-]?\{([0-9A-Za-z_][0-9A-Za-z_-]*|set:.+?|counter2?:.+?)\}')
-RE_TEXT_ATTRIBUTE: Final = re.compile(r'(?<!\$)\{([0-9A-Za-z_][0-9A-Za-z_-]*)\}')
-RE_TEXT_COUNTER:   Final = re.compile(r'(?<!\$)\{(set:.+?|counter2?:.+?)\}')
+# Attribute references in IDs and cross references, optionally preceded by
+# a separator that is removed along with them; the name of the last matched
+# group identifies the type of the reference:
+RE_ID_REFERENCE: Final = re.compile(r'(?P<separator>[_-])?\{(?:(?P<attribute>[0-9A-Za-z_][0-9A-Za-z_-]*)|(?P<set>set:.+?)|(?P<counter>counter2?:.+?))\}')
+
+# Attribute references in text, where references preceded by a dollar sign
+# are left alone:
+RE_ATTRIBUTE_REFERENCE: Final = re.compile(r'(?:(?P<separator>[_-])|(?<!\$))\{(?:(?P<attribute>[0-9A-Za-z_][0-9A-Za-z_-]*)|(?P<set>set:.+?)|(?P<counter>counter2?:.+?))\}')
+
+# Element IDs that do not need to be pruned:
+RE_VALID_ID: Final = re.compile(r'^[A-Za-z_:][A-Za-z0-9_:.-]+$')
+
+def list_attribute_references(value: str | None, pattern: re.Pattern[str] = RE_ATTRIBUTE_REFERENCE) -> list[tuple[str, str]]:
+    if not value or '{' not in value:
+        return []
+
+    return [(str(m.lastgroup), m[str(m.lastgroup)]) for m in pattern.finditer(value)]
+
+def list_conrefs(xml: etree._ElementTree, conref_prefix: str) -> list[str]:
+    result: list[str] = []
+
+    if not conref_prefix.endswith('/'):
+        conref_prefix = conref_prefix + '/'
+
+    for e in xml.iter('ph'):
+        conref = str(e.get('conref', ''))
+
+        if conref.startswith(conref_prefix):
+            result.append(conref[len(conref_prefix):])
+
+    return result
 
 def list_ids(xml: etree._ElementTree) -> list[str]:
     result: list[str] = []
@@ -62,110 +98,201 @@ def list_ids(xml: etree._ElementTree) -> list[str]:
 
     return result
 
-def prune_ids(xml: etree._ElementTree) -> bool:
-    updated = False
-
-    valid_id       = re.compile(r'^[A-Za-z_:][A-Za-z0-9_:.-]+$')
+def list_links(xml: etree._ElementTree) -> list[str]:
+    result: list[str] = []
 
-    for e in xml.iter():
-        if not e.attrib:
+    for e in xml.iter('xref', 'link'):
+        if e.get('scope') == 'external':
             continue
-        if not e.attrib.has_key('id'):
+        if not (href := e.get('href')):
             continue
 
-        xml_id = str(e.attrib['id'])
+        result.append(str(href))
+
+    return result
+
+def list_target_ids(hrefs: Iterable[str]) -> set[str]:
+    result: set[str] = set()
 
-        if valid_id.match(xml_id):
+    for href in hrefs:
+        if '#' not in href:
             continue
 
-        e.attrib['id'] = RE_ID_ATTRIBUTE.sub('', xml_id)
-        updated = True
+        result.add(href.split('#', maxsplit=1)[1].rpartition('/')[2])
+
+    return result
+
+def match_candidates(target_id: str) -> list[str]:
+    candidates = [target_id[:i] for i, c in enumerate(target_id) if c == '_']
+    candidates.append(target_id)
+
+    return candidates
+
+def match_ids(target_id: str, xml_ids: Mapping[str, tuple[str, Path]]) -> list[str]:
+    return [i for i in match_candidates(target_id) if i in xml_ids]
+
+@instrumented('parse')
+def parse_xml(file_path: str | Path | IO[bytes]) -> etree._ElementTree:
+    return etree.parse(file_path)
+
+def prune_id(e: etree._Element) -> bool:
+    if not e.attrib:
+        return False
+    if not e.attrib.has_key('id'):
+        return False
+
+    xml_id = str(e.attrib['id'])
+
+    if RE_VALID_ID.match(xml_id):
+        return False
+
+    xml_id, count = RE_ID_REFERENCE.subn('', xml_id)
+
+    if not count:
+        return False
+
+    e.attrib['id'] = xml_id
+    return True
+
+@instrumented('transform')
+def prune_ids(xml: etree._ElementTree) -> bool:
+    updated = False
+
+    for e in xml.iter():
+        if prune_id(e):
+            updated = True
 
     return updated
 
+def prune_xref(e: etree._Element) -> bool:
+    if e.tag != 'xref':
+        return False
+    if not e.attrib:
+        return False
+    if not e.attrib.has_key('href'):
+        return False
+
+    xml_href = str(e.attrib['href'])
+
+    if '{' not in xml_href:
+        return False
+
+    xml_href, count = RE_ID_REFERENCE.subn('', xml_href)
+
+    if not count:
+        return False
+
+    e.attrib['href'] = xml_href
+    return True
+
+@instrumented('transform')
 def prune_xrefs(xml: etree._ElementTree) -> bool:
     updated = False
 
     for e in xml.iter():
-        if e.tag != 'xref':
-            continue
-        if not e.attrib:
-            continue
-        if not e.attrib.has_key('href'):
-            continue
+        if prune_xref(e):
+            updated = True
+
+    return updated
 
-        xml_href = str(e.attrib['href'])
+def substitute_attributes(value: str, attributes: Mapping[str, str]) -> str:
+    if '{' not in value:
+        return value
 
-        if not RE_ID_ATTRIBUTE.search(xml_href):
+    return RE_ID_REFERENCE.sub(lambda m: (m['separator'] or '') + attributes[m['attribute'].lower()] if m.lastgroup == 'attribute' and m['attribute'].lower() in attributes else m[0], value)
+
+def rebuild_text(text: str, conref_prefix: str | None, attributes: Mapping[str, str] | None = None) -> tuple[str, list[etree._Element]]:
+    start = text
+    nodes: list[etree._Element] = []
+    parts: list[str] = []
+    position = 0
+
+    if '{' not in text:
+        return start, nodes
+
+    # Known attributes are substituted and unknown ones are replaced with
+    # reusable content references in a single scan of the text:
+    for match in RE_ATTRIBUTE_REFERENCE.finditer(text):
+        if match.lastgroup != 'attribute':
             continue
 
-        e.attrib['href'] = RE_ID_ATTRIBUTE.sub('', xml_href)
-        updated = True
+        name = match['attribute'].lower()
 
-    return updated
+        if attributes and name in attributes:
+            parts.append(text[position:match.start('attribute') - 1])
+            parts.append(attributes[name])
+            position = match.end()
+            continue
 
-def rebuild_text(text: str, conref_prefix: str) -> tuple[str, list[etree._Element]]:
-    rest = text
-    start = ''
-    nodes: list[etree._Element] = []
+        if conref_prefix is None:
+            continue
 
-    while match := RE_TEXT_ATTRIBUTE.findall(rest):
-        tail, rest = rest.split('{' + match[0] + '}', 1)
+        parts.append(text[position:match.start('attribute') - 1])
+        position = match.end()
 
         if not nodes:
-            start = tail
+            start = ''.join(parts)
         else:
-            nodes[-1].tail = tail
+            nodes[-1].tail = ''.join(parts)
+
+        parts = []
 
         node = etree.Element('ph')
-        node.set('conref', conref_prefix + match[0].lower())
+        node.set('conref', conref_prefix + name)
         nodes.append(node)
 
-    if nodes:
-        nodes[-1].tail = rest
+    if position:
+        parts.append(text[position:])
+
+        if nodes:
+            nodes[-1].tail = ''.join(parts)
+        else:
+            start = ''.join(parts)
 
     return start, nodes
 
-def replace_attributes(xml: etree._ElementTree, conref_prefix: str) -> bool:
+@instrumented('transform')
+def replace_attributes(xml: etree._ElementTree, conref_prefix: str | None, attributes: Mapping[str, str] | None = None) -> bool:
     updated = False
 
-    if not conref_prefix.endswith('/'):
+    if conref_prefix is not None and not conref_prefix.endswith('/'):
         conref_prefix = conref_prefix + '/'
 
     for e in xml.iter():
-        if e.text:
-            text, nodes = rebuild_text(str(e.text), conref_prefix)
+        if attributes and e.attrib:
+            for name in ('id', 'href'):
+                if (value := e.get(name)) is None:
+                    continue
 
-            if nodes:
-                e.text = text
+                if (result := substitute_attributes(str(value), attributes)) != value:
+                    e.set(name, result)
+                    updated = True
 
-                index = 0
-                for node in nodes:
-                    e.insert(index, node)
-                    index += 1
+        if e.text:
+            text, nodes = rebuild_text(str(e.text), conref_prefix, attributes)
 
+            if nodes or text != e.text:
+                e.text = text
+                e[:0] = nodes
                 updated = True
 
         if e.tail:
-            text, nodes = rebuild_text(str(e.tail), conref_prefix)
-
-            if nodes:
-                e.tail = text
-
-                parent = e.getparent()
+            text, nodes = rebuild_text(str(e.tail), conref_prefix, attributes)
 
-                if parent is None:
+            if nodes or text != e.tail:
+                if e.getparent() is None:
                     continue
 
-                index = parent.index(e)
-                for node in nodes:
-                    index += 1
-                    parent.insert(index, node)
+                e.tail = text
+
+                for node in reversed(nodes):
+                    e.addnext(node)
 
                 updated = True
 
     return updated
 
+@instrumented('transform')
 def report_problems(xml:etree._ElementTree, file_path: Path) -> None:
     topic_type           = xml.getroot().tag
     attribute_references = set()
@@ -178,20 +305,13 @@ def report_problems(xml:etree._ElementTree, file_path: Path) -> None:
         if e.tag == 'shortdesc':
             short_description = True
 
-        if matches := RE_TEXT_ATTRIBUTE.findall(str(e.text) + str(e.tail)):
-            attribute_references.update(set(matches))
+        for value in (e.text, e.tail):
+            for _, reference in list_attribute_references(value):
+                attribute_references.add(reference)
 
-        if matches := RE_TEXT_COUNTER.findall(str(e.text) + str(e.tail)):
-            attribute_references.update(set(matches))
-
-        if not e.attrib:
-            continue
-
-        if e.attrib.has_key('id') and (matches := RE_ID_ATTRIBUTE.findall(str(e.attrib['id']))):
-            attribute_references.update(set(matches))
-
-        if e.attrib.has_key('href') and (matches := RE_ID_ATTRIBUTE.findall(str(e.attrib['href']))):
-            attribute_references.update(set(matches))
+        for value in (e.get('id'), e.get('href')):
+            for _, reference in list_attribute_references(value, RE_ID_REFERENCE):
+                attribute_references.add(reference)
 
     if topic_type == 'topic':
         warn(str(file_path) + ": Generic topic found")
@@ -202,102 +322,142 @@ def report_problems(xml:etree._ElementTree, file_path: Path) -> None:
     for attribute in iter(attribute_references):
         warn(str(file_path) + ": Unresolved attribute reference: " + attribute)
 
-def update_image_paths(xml: etree._ElementTree, images_dir: list[Path], file_path: Path) -> bool:
+def update_image_path(e: etree._Element, images_dir: list[Path], file_path: Path, relocate: Callable[[Path], Path] | None = None) -> bool:
     found   = False
     updated = False
 
-    for e in xml.iter():
-        if e.tag != 'image':
-            continue
-        if not e.attrib:
-            continue
-        if not e.attrib.has_key('href'):
-            continue
+    if e.tag != 'image':
+        return False
+    if not e.attrib:
+        return False
+    if not e.attrib.has_key('href'):
+        return False
 
-        i = Path(str(e.attrib['href'])).resolve()
+    i = Path(str(e.attrib['href'])).resolve()
 
-        for directory in images_dir:
-            f = file_path.resolve()
-            d = directory.resolve()
-            t = d / i.name
-            h = t.relative_to(f.parent, walk_up=True)
+    for directory in images_dir:
+        f = (relocate(file_path) if relocate else file_path).resolve()
+        d = directory.resolve()
+        t = d / i.name
+        h = t.relative_to(f.parent, walk_up=True)
 
-            if not t.exists():
-                continue
+        if not t.exists():
+            continue
 
-            if str(h) == str(e.attrib['href']):
-                found = True
-                continue
+        if str(h) == str(e.attrib['href']):
+            found = True
+            continue
 
-            e.attrib['href'] = str(t.relative_to(f.parent, walk_up=True))
+        e.attrib['href'] = str(t.relative_to(f.parent, walk_up=True))
 
-            found   = True
-            updated = True
+        found   = True
+        updated = True
 
-        if not found:
-            warn(str(file_path) + ": Image not found: " + str(e.attrib['href']))
+    if not found:
+        warn(str(file_path) + ": Image not found: " + str(e.attrib['href']))
 
     return updated
 
-def update_xref_targets(xml: etree._ElementTree, xml_ids: dict[str, tuple[str, Path]], file_path: Path, aggressive: bool = False) -> bool:
+@instrumented('transform')
+def update_image_paths(xml: etree._ElementTree, images_dir: list[Path], file_path: Path, relocate: Callable[[Path], Path] | None = None) -> bool:
     updated = False
 
     for e in xml.iter():
-        if e.tag not in ['xref', 'link']:
-            continue
-        if not e.attrib:
-            continue
-        if e.attrib.has_key('scope') and e.attrib['scope'] == 'external':
-            continue
-        if not e.attrib.has_key('href'):
-            continue
-        if not '#' in str(e.attrib['href']):
-            continue
+        if update_image_path(e, images_dir, file_path, relocate):
+            updated = True
 
-        xref_href = str(e.attrib['href'])
-        xref_file, anchor = xref_href.split('#', maxsplit=1)
-        xref_topic_id, _, xref_target_id = anchor.rpartition('/')
+    return updated
 
-        match = [i for i in xml_ids.keys() if xref_target_id == i or xref_target_id.startswith(i + '_')]
+def relative_target(source_path: Path, target_path: Path) -> str:
+    if target_path.parent == source_path.parent:
+        return str(target_path.name)
 
-        if not match:
-            warn(str(file_path) + ": No matching ID: " + xref_target_id)
-            continue
-        if len(match) > 1:
-            warn(str(file_path) + ": Multiple matching IDs: " + xref_target_id)
-            continue
+    f = source_path.resolve()
+    t = target_path.resolve()
+    return str(t.parent.relative_to(f.parent, walk_up=True) / t.name)
 
-        target_id = match[0]
-        topic_id, target_file = xml_ids[target_id]
+def update_xref_target(e: etree._Element, xml_ids: Mapping[str, tuple[str, Path]], file_path: Path, aggressive: bool = False, suggestions: 'SuggestionIndex | None' = None, relocate: Callable[[Path], Path] | None = None, renames: Mapping[Path, Path] | None = None) -> bool:
+    if e.tag not in ['xref', 'link']:
+        return False
+    if not e.attrib:
+        return False
+    if e.attrib.has_key('scope') and e.attrib['scope'] == 'external':
+        return False
+    if not e.attrib.has_key('href'):
+        return False
 
-        xref_path = Path(file_path.parent, xref_file)
+    xref_href = str(e.attrib['href'])
 
-        if not aggressive and xref_file and target_file.name != xref_path.name:
-            warn(str(file_path) + ": Target file mismatch: expected '" + xref_path.name + "', got '" + target_file.name + "'")
-            continue
+    # Links to whole files are only updated if the file was renamed:
+    if not '#' in xref_href:
+        if not renames or not xref_href or not (target_file := renames.get(Path(file_path.parent, xref_href).resolve())):
+            return False
 
-        if target_file.parent == file_path.parent:
-            target = str(target_file.name)
-        else:
-            f = file_path.resolve()
-            t = target_file.resolve()
-            target = str(t.parent.relative_to(f.parent, walk_up=True) / t.name)
+        target = relative_target(relocate(file_path) if relocate else file_path, relocate(target_file) if relocate else target_file)
+
+        if target == xref_href:
+            return False
 
-        if topic_id == target_id:
-            result = target + '#' + topic_id
+        warn(str(file_path) + ": Target file changed: '" + xref_href + "' -> '" + target + "'")
+        e.attrib['href'] = target
+        return True
+
+    xref_file, anchor = xref_href.split('#', maxsplit=1)
+    xref_topic_id, _, xref_target_id = anchor.rpartition('/')
+
+    match = match_ids(xref_target_id, xml_ids)
+
+    if not match:
+        if suggestions and (similar := suggestions.suggest(xref_target_id)):
+            warn(str(file_path) + ": No matching ID: " + xref_target_id + ", did you mean: " + ", ".join(similar))
         else:
-            result = target + '#' + topic_id + '/' + target_id
+            warn(str(file_path) + ": No matching ID: " + xref_target_id)
+        return False
+    if len(match) > 1:
+        warn(str(file_path) + ": Multiple matching IDs: " + xref_target_id)
+        return False
 
-        if result == xref_href:
-            continue
+    target_id = match[0]
+    topic_id, target_file = xml_ids[target_id]
 
-        if xref_file and xref_path.resolve() != target_file.resolve():
-            warn(str(file_path) + ": Target file changed: '" + xref_file + "' -> '" + target + "': " + xref_target_id)
+    xref_path = Path(file_path.parent, xref_file)
 
-        if xref_topic_id and xref_topic_id != topic_id:
-            warn(str(file_path) + ": Target topic ID changed: '" + xref_topic_id + "' -> '" + topic_id + "': " + xref_target_id)
+    # Links to renamed files are expected to point to a different file name:
+    renamed = renames is not None and renames.get(xref_path.resolve()) == target_file.resolve()
 
-        e.attrib['href'] = result
-        updated = True
+    if not aggressive and not renamed and xref_file and target_file.name != xref_path.name:
+        warn(str(file_path) + ": Target file mismatch: expected '" + xref_path.name + "', got '" + target_file.name + "'")
+        return False
+
+    # Relocated files link to the locations of their targets in the output:
+    source_path = relocate(file_path) if relocate else file_path
+    target_path = relocate(target_file) if relocate else target_file
+
+    target = relative_target(source_path, target_path)
+
+    if topic_id == target_id:
+        result = target + '#' + topic_id
+    else:
+        result = target + '#' + topic_id + '/' + target_id
+
+    if result == xref_href:
+        return False
+
+    if xref_file and xref_path.resolve() != target_file.resolve():
+        warn(str(file_path) + ": Target file changed: '" + xref_file + "' -> '" + target + "': " + xref_target_id)
+
+    if xref_topic_id and xref_topic_id != topic_id:
+        warn(str(file_path) + ": Target topic ID changed: '" + xref_topic_id + "' -> '" + topic_id + "': " + xref_target_id)
+
+    e.attrib['href'] = result
+    return True
+
+@instrumented('transform')
+def update_xref_targets(xml: etree._ElementTree, xml_ids: Mapping[str, tuple[str, Path]], file_path: Path, aggressive: bool = False, suggestions: 'SuggestionIndex | None' = None, relocate: Callable[[Path], Path] | None = None, renames: Mapping[Path, Path] | None = None) -> bool:
+    updated = False
+
+    for e in xml.iter():
+        if update_xref_target(e, xml_ids, file_path, aggressive, suggestions, relocate, renames):
+            updated = True
 
     return updated
@@ -0,0 +1,170 @@
+import unittest
+import contextlib
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+from errno import EINVAL
+from io import StringIO
+from pathlib import Path
+from src.dita.cleanup import cli
+from src.dita.cleanup.archive import is_archive, read_archive
+
+FIRST = b'''\
+<?xml version="1.0" encoding="UTF-8"?>
+<concept id="first">
+    <title>First</title>
+    <conbody>
+        <p id="first-para_{version}"><xref href="#second-para_{version}" /></p>
+    </conbody>
+</concept>
+'''
+
+SECOND = b'''\
+<?xml version="1.0" encoding="UTF-8"?>
+<concept id="second">
+    <title>Second</title>
+    <conbody>
+        <p id="second-para">Text</p>
+    </conbody>
+</concept>
+'''
+
+class TestDitaCleanupArchive(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.members = {
+            'topics/first.dita': FIRST,
+            'topics/nested/second.dita': SECOND,
+            'images/image.png': b'\x89PNG',
+        }
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_tar(self, name):
+        file_path = Path(self.directory, name)
+
+        with tarfile.open(file_path, 'w:gz') as tar_file:
+            for member_name, data in self.members.items():
+                info = tarfile.TarInfo(member_name)
+                info.size = len(data)
+                tar_file.addfile(info, io.BytesIO(data))
+
+        return file_path
+
+    def create_zip(self, name):
+        file_path = Path(self.directory, name)
+
+        with zipfile.ZipFile(file_path, 'w') as zip_file:
+            for member_name, data in self.members.items():
+                zip_file.writestr(member_name, data)
+
+        return file_path
+
+    def read_members(self, file_path):
+        return {(info.filename if isinstance(info, zipfile.ZipInfo) else info.name): data for info, data in read_archive(file_path)}
+
+    def test_is_archive(self):
+        self.assertTrue(is_archive('topics.zip'))
+        self.assertTrue(is_archive('topics.tar.gz'))
+        self.assertTrue(is_archive('TOPICS.TGZ'))
+        self.assertFalse(is_archive('topics.dita'))
+        self.assertFalse(is_archive('topics.gz'))
+
+    def test_process_tar(self):
+        source = self.create_tar('topics.tar.gz')
+        target = Path(self.directory, 'cleaned.tar.gz')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', '-X', 'topics', '-o', str(target), str(source)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+
+        members = self.read_members(target)
+
+        self.assertEqual(list(members), list(self.members))
+        self.assertIn(b'<p id="first-para"><xref href="nested/second.dita#second/second-para"/></p>', members['topics/first.dita'])
+        self.assertEqual(members['topics/nested/second.dita'], SECOND)
+        self.assertEqual(members['images/image.png'], b'\x89PNG')
+        self.assertEqual(self.read_members(source), self.members)
+
+    def test_process_zip_in_place(self):
+        source = self.create_zip('topics.zip')
+
+        with contextlib.redirect_stderr(StringIO()):
+            exit_code = cli.process_files(cli.parse_args(['--patch', '-i', '-X', '.', str(source)]))
+
+        self.assertEqual(exit_code, 0)
+
+        members = self.read_members(source)
+
+        self.assertEqual(members['topics/first.dita'], FIRST.replace(b'_{version}', b'').replace(b'#second-para', b'nested/second.dita#second/second-para'))
+        self.assertEqual(members['images/image.png'], b'\x89PNG')
+        self.assertEqual(sorted(p.name for p in self.directory.iterdir()), ['topics.zip'])
+
+    def test_process_zip_to_tar(self):
+        source = self.create_zip('topics.zip')
+        target = Path(self.directory, 'cleaned.tar')
+
+        with contextlib.redirect_stderr(StringIO()):
+            exit_code = cli.process_files(cli.parse_args(['-i', '-o', str(target), str(source)]))
+
+        self.assertEqual(exit_code, 0)
+
+        members = self.read_members(target)
+
+        self.assertEqual(list(members), list(self.members))
+        self.assertIn(b'id="first-para"', members['topics/first.dita'])
+        self.assertEqual(members['images/image.png'], b'\x89PNG')
+
+    def test_permissions(self):
+        source = self.create_zip('topics.zip')
+        target = Path(self.directory, 'cleaned.zip')
+        source.chmod(0o640)
+        umask = os.umask(0o022)
+
+        try:
+            with contextlib.redirect_stderr(StringIO()):
+                cli.process_files(cli.parse_args(['-i', str(source)]))
+                cli.process_files(cli.parse_args(['-i', '-o', str(target), str(source)]))
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(source.stat().st_mode & 0o777, 0o640)
+        self.assertEqual(target.stat().st_mode & 0o777, 0o644)
+
+    def test_limits(self):
+        source = self.create_tar('topics.tar.gz')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', '--max-size', str(len(FIRST) - 1), '-X', 'topics', str(source)]))
+
+        members = self.read_members(source)
+
+        self.assertNotEqual(exit_code, 0)
+        self.assertEqual(err.getvalue().count('File size limit exceeded'), 1)
+        self.assertRegex(err.getvalue(), r'topics/first.dita: File size limit exceeded')
+        self.assertEqual(members['topics/first.dita'], FIRST)
+
+    def test_invalid_xml(self):
+        self.members['topics/invalid.dita'] = b'<concept>'
+        source = self.create_tar('topics.tar.gz')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', str(source)]))
+
+        self.assertNotEqual(exit_code, 0)
+        self.assertRegex(err.getvalue(), r'topics/invalid.dita: ')
+        self.assertEqual(self.read_members(source)['topics/invalid.dita'], b'<concept>')
+
+    def test_unsupported_options(self):
+        for argv in (['-D', '.', 'topics.zip'], ['topics.zip', 'topic.dita'], ['-o', 'cleaned.dita', 'topics.zip']):
+            with self.assertRaises(SystemExit) as cm,\
+                 contextlib.redirect_stderr(StringIO()):
+                cli.parse_args(argv)
+
+            self.assertEqual(cm.exception.code, EINVAL)
@@ -0,0 +1,36 @@
+import unittest
+import tempfile
+from pathlib import Path
+from src.dita.cleanup.attributes import parse_attributes, read_attributes
+
+class TestDitaCleanupAttributes(unittest.TestCase):
+    def test_parse_attributes(self):
+        attributes = parse_attributes('''\
+// Product information
+:Product-Name: Product
+:product-version: 1.0
+:product-title: {product-name} {product-version} {undefined}
+:empty:
+:description: A long \\
+  description
+Not an attribute: value
+:unset-before: value
+:!unset-before:
+:unset-after: value
+:unset-after!:
+''')
+
+        self.assertEqual(attributes, {
+            'product-name': 'Product',
+            'product-version': '1.0',
+            'product-title': 'Product 1.0 {undefined}',
+            'empty': '',
+            'description': 'A long description',
+        })
+
+    def test_read_attributes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory, 'attributes.adoc')
+            file_path.write_text(':product: Product\n')
+
+            self.assertEqual(read_attributes(file_path), {'product': 'Product'})
@@ -0,0 +1,367 @@
+import unittest
+import contextlib
+import os
+import tempfile
+import tracemalloc
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from unittest.mock import patch
+from src.dita.cleanup import NAME
+from src.dita.cleanup import catalog
+from src.dita.cleanup.catalog import Catalog, MappedCatalog, catalog_ids, \
+     complete_catalog, index_links, list_files, load_catalog, save_catalog, update_catalog
+from src.dita.cleanup.limits import Limits
+
+TOPIC_ONE = '''\
+<concept id="first-topic-id">
+    <title>Concept title</title>
+    <conbody>
+        <section id="first-section-id">
+            <title>Section title</title>
+            <p><ph id="_generated-id">A phrase</ph></p>
+            <p><xref href="#second-section-id">Reference</xref></p>
+            <p><xref href="https://example.com" scope="external">Link</xref></p>
+        </section>
+    </conbody>
+</concept>
+'''
+
+TOPIC_TWO = '''\
+<reference id="second-topic-id">
+    <title>Reference title</title>
+    <refbody>
+        <section id="second-section-id">
+            <title>Section title</title>
+            <p><xref href="../first-topic.dita#first-topic-id">Reference</xref></p>
+        </section>
+    </refbody>
+</reference>
+'''
+
+class TestDitaCleanupCatalog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name, 'topics')
+        Path(self.directory, 'nested').mkdir(parents=True)
+        Path(self.directory, 'first-topic.dita').write_text(TOPIC_ONE)
+        Path(self.directory, 'nested', 'second-topic.dita').write_text(TOPIC_TWO)
+        Path(self.directory, 'image.png').write_bytes(b'')
+        self.catalog_file = Path(self.temp_dir.name, 'ids.catalog')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_list_files(self):
+        files = list_files(self.directory)
+
+        self.assertEqual(len(files), 2)
+        self.assertTrue(Path(self.directory, 'first-topic.dita') in files)
+        self.assertTrue(Path(self.directory, 'nested', 'second-topic.dita') in files)
+
+    def test_catalog_ids(self):
+        ids = catalog_ids(self.directory)
+
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(ids['first-section-id'], ('first-topic-id', Path(self.directory, 'first-topic.dita')))
+        self.assertEqual(ids['second-topic-id'], ('second-topic-id', Path(self.directory, 'nested', 'second-topic.dita')))
+        self.assertFalse('_generated-id' in ids)
+
+    def test_catalog_ids_duplicate(self):
+        Path(self.directory, 'copy.dita').write_text(TOPIC_TWO)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            ids = catalog_ids(self.directory)
+
+        self.assertEqual(len(ids), 4)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Duplicate ID: ')
+
+    def test_catalog_ids_targets(self):
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse:
+            ids = catalog_ids(self.directory, targets={'first-section-id_suffix'})
+
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(sorted(ids), ['first-section-id', 'first-topic-id'])
+
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse:
+            complete_catalog(ids, self.directory)
+
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(ids, catalog_ids(self.directory))
+
+    def test_catalog_ids_targets_duplicate(self):
+        Path(self.directory, 'copy-topic.dita').write_text('<concept id="copy-topic-id"><section id="first-topic-id" /></concept>')
+
+        # The copy is found first, so it defines the duplicate ID:
+        def sorted_files(directory, exclude=None):
+            return sorted(list_files(directory, exclude))
+
+        with patch.object(catalog, 'list_files', sorted_files):
+            with contextlib.redirect_stderr(StringIO()) as err:
+                expected = catalog_ids(self.directory)
+
+            with contextlib.redirect_stderr(StringIO()) as lazy_err:
+                ids = catalog_ids(self.directory, targets={'first-section-id'})
+                complete_catalog(ids, self.directory)
+
+        self.assertEqual(ids['first-topic-id'], ('copy-topic-id', Path(self.directory, 'copy-topic.dita')))
+        self.assertEqual(ids, expected)
+        self.assertEqual(lazy_err.getvalue(), err.getvalue())
+        self.assertEqual(err.getvalue(), f'{NAME}: {Path(self.directory, "first-topic.dita")}: Duplicate ID: first-topic-id\n')
+
+    def test_catalog_ids_limits(self):
+        large = Path(self.directory, 'large-topic.dita')
+        large.write_text('<concept id="large-topic-id">' + '<p/>' * 1000 + '</concept>')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            ids = catalog_ids(self.directory, limits=Limits(max_elements=500))
+
+        self.assertEqual(err.getvalue(), f'{NAME}: {large}: Element limit exceeded: more than 500 elements\n')
+        self.assertFalse('large-topic-id' in ids)
+        self.assertTrue('second-topic-id' in ids)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            ids = catalog_ids(self.directory, limits=Limits(max_size=2048), skipped={large.resolve()})
+
+        self.assertEqual(err.getvalue(), '')
+        self.assertFalse('large-topic-id' in ids)
+
+    def test_catalog_ids_no_targets(self):
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse:
+            ids = catalog_ids(self.directory, targets=set())
+
+        self.assertEqual(parse.call_count, 0)
+        self.assertEqual(len(ids), 0)
+
+    def test_save_catalog_reuses_digests(self):
+        save_catalog(self.catalog_file, catalog_ids(self.directory), self.directory)
+
+        second = Path(self.directory, 'nested', 'second-topic.dita')
+        second.write_text(TOPIC_TWO.replace('Section title', 'Updated section title'))
+
+        with patch.object(catalog, 'file_digest', wraps=catalog.file_digest) as file_digest:
+            save_catalog(self.catalog_file, catalog_ids(self.directory), self.directory)
+
+        file_digest.assert_called_once_with(second)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            self.assertIsInstance(load_catalog(self.catalog_file, self.directory), MappedCatalog)
+
+        self.assertEqual(err.getvalue(), '')
+
+    def test_save_and_load_catalog(self):
+        ids = catalog_ids(self.directory)
+        save_catalog(self.catalog_file, ids, self.directory)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory)
+
+        self.assertIsInstance(catalog, MappedCatalog)
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(len(catalog), len(ids))
+        self.assertEqual(sorted(catalog), sorted(ids))
+        self.assertEqual(dict(catalog.items()), ids)
+        self.assertTrue('first-section-id' in catalog)
+        self.assertFalse('missing-id' in catalog)
+
+        catalog.close()
+
+    def test_load_catalog_modified_tree(self):
+        save_catalog(self.catalog_file, catalog_ids(self.directory), self.directory)
+        Path(self.directory, 'third-topic.dita').write_text(TOPIC_ONE.replace('first', 'third'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory)
+
+        self.assertIsNone(catalog)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Catalog does not match the contents of ')
+
+    def test_load_catalog_same_size_edit(self):
+        save_catalog(self.catalog_file, catalog_ids(self.directory), self.directory)
+        file_path = Path(self.directory, 'first-topic.dita')
+        file_path.write_text(file_path.read_text().replace('first-section-id', 'first-section-ix'))
+        os.utime(file_path, ns=(0, 0))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory)
+
+        self.assertIsNone(catalog)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Catalog does not match the contents of ')
+
+    def test_load_catalog_touched_file(self):
+        save_catalog(self.catalog_file, catalog_ids(self.directory), self.directory)
+        file_path = Path(self.directory, 'first-topic.dita')
+        os.utime(file_path, ns=(0, 0))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory)
+
+        self.assertIsInstance(catalog, MappedCatalog)
+        self.assertEqual(err.getvalue(), '')
+
+        catalog.close()
+
+    def test_load_catalog_invalid_file(self):
+        self.catalog_file.write_bytes(b'<concept id="topic-id" />')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory)
+
+        self.assertIsNone(catalog)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Cannot load catalog: ')
+
+    def test_load_catalog_missing_file(self):
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory)
+
+        self.assertIsNone(catalog)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Cannot load catalog: ')
+
+    def test_index_links(self):
+        link_lists = {}
+        ids = catalog_ids(self.directory, link_lists=link_lists)
+        links = index_links(self.directory, ids, link_lists)
+
+        self.assertEqual(links, {
+            'nested/second-topic.dita': {'first-topic.dita'},
+            'first-topic.dita': {'nested/second-topic.dita'},
+        })
+
+    def test_referencing_files(self):
+        link_lists = {}
+        ids = catalog_ids(self.directory, link_lists=link_lists)
+        save_catalog(self.catalog_file, ids, self.directory, index_links(self.directory, ids, link_lists))
+
+        catalog = load_catalog(self.catalog_file, self.directory)
+
+        self.assertEqual(catalog.referencing_files(Path(self.directory, 'first-topic.dita')), [Path(self.directory, 'nested', 'second-topic.dita')])
+        self.assertEqual(catalog.referencing_files(Path(self.directory, 'nested', 'second-topic.dita')), [Path(self.directory, 'first-topic.dita')])
+        self.assertEqual(catalog.referencing_files(Path(self.directory, 'missing-topic.dita')), [])
+
+        catalog.close()
+
+    def test_load_catalog_renamed_file(self):
+        link_lists = {}
+        ids = catalog_ids(self.directory, link_lists=link_lists)
+        save_catalog(self.catalog_file, ids, self.directory, index_links(self.directory, ids, link_lists))
+
+        old_path = Path(self.directory, 'nested', 'second-topic.dita')
+        new_path = Path(self.directory, 'second-topic.dita')
+        old_path.rename(new_path)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory, [(old_path, new_path)])
+
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(catalog['second-section-id'], ('second-topic-id', new_path))
+        self.assertEqual(catalog.referencing_files(old_path), [Path(self.directory, 'first-topic.dita')])
+        self.assertEqual(catalog.referencing_files(Path(self.directory, 'first-topic.dita')), [new_path])
+        self.assertEqual(catalog.links(), {
+            'second-topic.dita': {'first-topic.dita'},
+            'first-topic.dita': {'second-topic.dita'},
+        })
+
+        catalog.close()
+
+    def test_update_catalog(self):
+        link_lists = {}
+        ids = catalog_ids(self.directory, link_lists=link_lists)
+        save_catalog(self.catalog_file, ids, self.directory, index_links(self.directory, ids, link_lists))
+
+        changed_path = Path(self.directory, 'third-topic.dita')
+        changed_path.write_text(TOPIC_ONE.replace('first', 'third'))
+        deleted_path = Path(self.directory, 'nested', 'second-topic.dita')
+        deleted_path.unlink()
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory, validate=False)
+            update_catalog(catalog, [changed_path], [deleted_path])
+
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(len(catalog), 4)
+        self.assertEqual(sorted(catalog), ['first-section-id', 'first-topic-id', 'third-section-id', 'third-topic-id'])
+        self.assertEqual(catalog['third-section-id'], ('third-topic-id', changed_path))
+        self.assertFalse('second-section-id' in catalog)
+        self.assertEqual(catalog.links(), {'nested/second-topic.dita': {'first-topic.dita'}})
+
+        with self.assertRaises(KeyError):
+            catalog['second-topic-id']
+
+        catalog.close()
+
+    def test_update_catalog_duplicate(self):
+        save_catalog(self.catalog_file, catalog_ids(self.directory), self.directory)
+
+        changed_path = Path(self.directory, 'third-topic.dita')
+        changed_path.write_text(TOPIC_ONE.replace('first-topic-id', 'third-topic-id'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(self.catalog_file, self.directory, validate=False)
+            update_catalog(catalog, [changed_path], [])
+
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*third-topic.dita: Duplicate ID: first-section-id')
+        self.assertEqual(catalog['first-section-id'], ('first-topic-id', Path(self.directory, 'first-topic.dita')))
+
+        catalog.close()
+
+    def test_catalog(self):
+        catalog = Catalog()
+        catalog.add_file(Path('first-topic.dita'), ['first-topic-id', 'first-section-id'])
+        catalog.add_file(Path('second-topic.dita'), ['second-topic-id'])
+        catalog.add_file(Path('map.dita'), [])
+
+        self.assertEqual(len(catalog), 3)
+        self.assertEqual(list(catalog), ['first-topic-id', 'first-section-id', 'second-topic-id'])
+        self.assertEqual(catalog['first-section-id'], ('first-topic-id', Path('first-topic.dita')))
+        self.assertTrue('second-topic-id' in catalog)
+        self.assertFalse('map-id' in catalog)
+        self.assertEqual(list(catalog.files()), [
+            (Path('first-topic.dita'), 'first-topic-id'),
+            (Path('second-topic.dita'), 'second-topic-id'),
+        ])
+
+        with self.assertRaises(KeyError):
+            catalog['missing-id']
+
+    def test_catalog_remove_file(self):
+        catalog = Catalog()
+
+        with contextlib.redirect_stderr(StringIO()):
+            catalog.add_file(Path('first-topic.dita'), ['first-topic-id', 'shared-id'])
+            catalog.add_file(Path('second-topic.dita'), ['second-topic-id', 'shared-id'])
+
+        catalog.remove_file(Path('second-topic.dita'))
+
+        self.assertEqual(list(catalog), ['first-topic-id', 'shared-id'])
+        self.assertEqual(catalog['shared-id'], ('first-topic-id', Path('first-topic.dita')))
+        self.assertEqual(list(catalog.files()), [(Path('first-topic.dita'), 'first-topic-id')])
+
+        catalog.remove_file(Path('first-topic.dita'))
+        catalog.remove_file(Path('missing-topic.dita'))
+
+        self.assertEqual(len(catalog), 0)
+
+    def test_catalog_memory(self):
+        files = [(Path(f'topic-{f}.dita'), [f'topic-{f}'] + [f'section-{f}-{i}' for i in range(50)]) for f in range(1000)]
+
+        tracemalloc.start()
+
+        reference = {}
+        for file_path, id_list in files:
+            for xml_id in id_list:
+                reference[xml_id] = (id_list[0], file_path)
+
+        reference_size = tracemalloc.get_traced_memory()[0]
+        del reference
+        tracemalloc.stop()
+        tracemalloc.start()
+
+        catalog = Catalog()
+        for file_path, id_list in files:
+            catalog.add_file(file_path, id_list)
+
+        catalog_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        self.assertEqual(len(catalog), 51000)
+        self.assertLess(catalog_size, reference_size * 0.6)
@@ -0,0 +1,55 @@
+import unittest
+import contextlib
+import os
+import subprocess
+import tempfile
+from io import StringIO
+from pathlib import Path
+from src.dita.cleanup import NAME
+from src.dita.cleanup.changes import list_changes
+
+class TestDitaCleanupChanges(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name).resolve()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory)
+
+        self.git('init', '-q')
+        Path('first-topic.dita').write_text('<concept id="first-topic-id" />')
+        Path('second-topic.dita').write_text('<concept id="second-topic-id" />')
+        Path('README.md').write_text('Topics')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'Add topics')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def git(self, *arguments):
+        subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *arguments], check=True)
+
+    def test_list_changes(self):
+        Path('nested').mkdir()
+        Path('first-topic.dita').write_text('<concept id="topic-id" />')
+        Path('nested', 'third-topic.dita').write_text('<concept id="third-topic-id" />')
+        Path('second-topic.dita').unlink()
+        Path('README.md').write_text('Updated topics')
+        self.git('add', '.')
+
+        os.chdir('nested')
+        changed, deleted = list_changes('HEAD')
+
+        self.assertEqual(sorted(changed), [self.directory / 'first-topic.dita', self.directory / 'nested' / 'third-topic.dita'])
+        self.assertEqual(deleted, [self.directory / 'second-topic.dita'])
+
+    def test_list_changes_no_changes(self):
+        self.assertEqual(list_changes('HEAD'), ([], []))
+
+    def test_list_changes_invalid_revision(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            list_changes('missing-revision')
+
+        self.assertEqual(cm.exception.code, 22)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*missing-revision')
@@ -0,0 +1,201 @@
+import unittest
+import contextlib
+import json
+import pickle
+import tempfile
+import time
+import warnings
+from errno import EPERM
+from io import StringIO
+from pathlib import Path
+from src.dita.cleanup import NAME
+from src.dita.cleanup.catalog import catalog_ids, load_catalog, save_catalog
+from src.dita.cleanup import check
+from src.dita.cleanup.check import check_file, check_files, write_link_graph
+from src.dita.cleanup.limits import LimitExceeded, Limits
+from unittest.mock import patch
+from src.dita.cleanup.validate import Validator
+
+class TestDitaCleanupCheck(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.first = str(Path(self.directory, 'first-topic.dita'))
+        self.second = str(Path(self.directory, 'second-topic.dita'))
+        Path(self.first).write_text('''\
+<concept id="first-topic-id">
+    <title>First title</title>
+    <conbody>
+        <section id="first-section-id">
+            <p><xref href="second-topic.dita#second-topic-id/second-section-id">Valid reference</xref></p>
+        </section>
+        <p><xref href="second-topic.dita#second-topic-id">Valid topic reference</xref></p>
+        <p><xref href="second-topic.dita">Valid file reference</xref></p>
+        <p><xref href="https://example.com" scope="external">External link</xref></p>
+    </conbody>
+</concept>
+''')
+        Path(self.second).write_text('''\
+<concept id="second-topic-id">
+    <title>Second title</title>
+    <conbody>
+        <section id="second-section-id">
+            <p><xref href="#first-section-id">Wrong file</xref></p>
+            <p><xref href="first-topic.dita#wrong-topic-id/first-section-id">Wrong topic</xref></p>
+            <p><xref href="first-topic.dita#missing-id">Missing ID</xref></p>
+            <p><xref href="missing-topic.dita">Missing file</xref></p>
+        </section>
+        <related-links><link href="first-topic.dita#first-topic-id" /></related-links>
+    </conbody>
+</concept>
+''')
+        self.ids = catalog_ids(self.directory)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_check_file_limits(self):
+        messages, links, failed = check_file(self.first, self.ids, limits=Limits(max_size=10))
+
+        self.assertTrue(failed)
+        self.assertRegex(messages[0], r'first-topic.dita: File size limit exceeded: [0-9]+ bytes$')
+
+        messages, links, failed = check_file(self.first, self.ids, limits=Limits(max_elements=5))
+
+        self.assertTrue(failed)
+        self.assertEqual(messages, [self.first + ': Element limit exceeded: more than 5 elements'])
+
+    def test_check_files_kills_stuck_workers(self):
+        _check_file = check._check_file
+
+        # Simulate a worker that cannot be interrupted by the time limit:
+        def stall(file_path, *args):
+            if file_path == self.second:
+                while True:
+                    try:
+                        time.sleep(10)
+                    except LimitExceeded:
+                        pass
+            return _check_file(file_path, *args)
+
+        files = [self.second, self.first, self.first]
+
+        with patch.object(check, '_check_file', stall),\
+             warnings.catch_warnings(category=DeprecationWarning, action='ignore'),\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = check_files(files, self.ids, jobs=2, limits=Limits(timeout=0.2))
+
+        self.assertEqual(exit_code, EPERM)
+        self.assertEqual(err.getvalue(), f'{NAME}: {self.second}: Time limit exceeded: 0.2 seconds\n')
+
+    def test_check_file_valid(self):
+        messages, links, failed = check_file(self.first, self.ids)
+
+        self.assertFalse(failed)
+        self.assertEqual(messages, [])
+        self.assertEqual(links, [
+            (self.first, 'first-section-id', self.second, 'second-section-id'),
+            (self.first, 'first-topic-id', self.second, 'second-topic-id'),
+            (self.first, 'first-topic-id', str(Path(self.directory, 'second-topic.dita')), ''),
+        ])
+
+    def test_check_file_broken(self):
+        messages, links, failed = check_file(self.second, self.ids)
+
+        self.assertTrue(failed)
+        self.assertEqual(messages, [
+            self.second + ': Broken link: #first-section-id',
+            self.second + ': Broken link: first-topic.dita#wrong-topic-id/first-section-id',
+            self.second + ': Broken link: first-topic.dita#missing-id',
+            self.second + ': Broken link: missing-topic.dita',
+        ])
+        self.assertEqual(links, [(self.second, 'second-topic-id', self.first, 'first-topic-id')])
+
+    def test_check_file_url_scheme(self):
+        Path(self.first).write_text('<concept id="first-topic-id"><p><xref href="https://example.com/#section" /><xref href="mailto:docs@example.com" /><link href="ftp://example.com/file.dita" /></p></concept>')
+
+        messages, links, failed = check_file(self.first, self.ids)
+
+        self.assertFalse(failed)
+        self.assertEqual(messages, [])
+        self.assertEqual(links, [])
+
+    def test_check_file_invalid(self):
+        Path(self.first).write_text('<concept id="first-topic-id">')
+
+        messages, links, failed = check_file(self.first, self.ids)
+
+        self.assertTrue(failed)
+        self.assertEqual(len(messages), 1)
+
+    def test_check_file_validate(self):
+        Path(self.directory, 'concept.dtd').write_text('<!ELEMENT concept (title)>\n<!ATTLIST concept id ID #REQUIRED>\n<!ELEMENT title (#PCDATA)>\n')
+        Path(self.first).write_text('<!DOCTYPE concept SYSTEM "concept.dtd">\n<concept id="first-topic-id"><title>Title</title></concept>')
+        Path(self.second).write_text('<!DOCTYPE concept SYSTEM "concept.dtd">\n<concept id="second-topic-id"><p>Text</p></concept>')
+        validator = Validator()
+
+        self.assertEqual(check_file(self.first, self.ids, validator), ([], [], False))
+
+        messages, links, failed = check_file(self.second, self.ids, validator)
+
+        self.assertTrue(failed)
+        self.assertRegex(messages[0], r'second-topic\.dita:2: Invalid content: ')
+
+    def test_check_files_unmodified(self):
+        contents = [Path(self.first).read_bytes(), Path(self.second).read_bytes()]
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = check_files([self.first, self.second], self.ids)
+
+        self.assertEqual(exit_code, EPERM)
+        self.assertEqual(len(err.getvalue().splitlines()), 4)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Broken link: ')
+        self.assertEqual([Path(self.first).read_bytes(), Path(self.second).read_bytes()], contents)
+
+    def test_check_files_parallel(self):
+        catalog_file = Path(self.directory, 'ids.catalog')
+        save_catalog(catalog_file, self.ids, self.directory)
+        catalog = load_catalog(catalog_file, self.directory)
+        graph_file = str(Path(self.directory, 'links.jsonl'))
+
+        with contextlib.redirect_stderr(StringIO()) as serial:
+            check_files([self.first, self.second], self.ids, 1)
+        with contextlib.redirect_stderr(StringIO()) as parallel:
+            exit_code = check_files([self.first, self.second], catalog, 2, graph_file)
+
+        self.assertEqual(exit_code, EPERM)
+        self.assertEqual(parallel.getvalue(), serial.getvalue())
+        self.assertEqual(len(Path(graph_file).read_text().splitlines()), 4)
+
+        catalog.close()
+
+    def test_mapped_catalog_pickle(self):
+        catalog_file = Path(self.directory, 'ids.catalog')
+        save_catalog(catalog_file, self.ids, self.directory)
+        catalog = load_catalog(catalog_file, self.directory)
+        copy = pickle.loads(pickle.dumps(catalog))
+
+        self.assertEqual(dict(copy.items()), self.ids)
+
+        catalog.close()
+        copy.close()
+
+    def test_write_link_graph_jsonl(self):
+        with StringIO() as f:
+            write_link_graph(f, [('a.dita', 'a-id', 'b.dita', 'b-id')], 'jsonl')
+            lines = f.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0]), {
+            'source_file': 'a.dita',
+            'source_id': 'a-id',
+            'target_file': 'b.dita',
+            'target_id': 'b-id',
+        })
+
+    def test_write_link_graph_dot(self):
+        with StringIO() as f:
+            write_link_graph(f, [('a.dita', 'a-id', 'b.dita', ''), ('b.dita', '', 'a.dita', 'a"id')], 'dot')
+            result = f.getvalue()
+
+        self.assertEqual(result, 'digraph links {\n  "a.dita#a-id" -> "b.dita";\n  "b.dita" -> "a.dita#a\\"id";\n}\n')
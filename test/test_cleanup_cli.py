@@ -1,12 +1,19 @@
 import unittest
 import contextlib
+import os
+import re
 import sys
-from errno import ENOENT, ENOTDIR
+import tempfile
+import time
+from errno import EINVAL, ENOENT, ENOTDIR, EPERM
 from io import StringIO
+from lxml import etree
 from pathlib import Path
 from unittest.mock import patch
 from src.dita.cleanup import cli
 from src.dita.cleanup import NAME, VERSION
+from src.dita.cleanup.catalog import load_catalog
+from src.dita.cleanup.xml import prune_ids
 
 class TestDitaCleanupCli(unittest.TestCase):
     def test_invalid_option(self):
@@ -103,6 +110,35 @@ class TestDitaCleanupCli(unittest.TestCase):
         args = cli.parse_args(['--output', '-', 'test_file'])
         self.assertEqual(args.output, sys.stdout)
 
+    def test_opt_output_dir(self):
+        args = cli.parse_args(['--output-dir', 'output_dir', 'test_file'])
+        self.assertEqual(args.output_dir, 'output_dir')
+
+    def test_opt_output_dir_current_directory(self):
+        for output_dir in ('.', os.getcwd()):
+            with self.assertRaises(SystemExit) as cm,\
+                 contextlib.redirect_stderr(StringIO()) as err:
+                cli.parse_args(['--output-dir', output_dir, 'test_file'])
+
+            self.assertEqual(cm.exception.code, EINVAL)
+            self.assertRegex(err.getvalue(), f"Output directory contains the supplied files: '{re.escape(output_dir)}'")
+
+    def test_opt_output_dir_with_stream(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            cli.parse_args(['--stream', '--output-dir', 'output_dir', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(err.getvalue(), "Option not supported with --stream: '--output-dir'")
+
+    def test_opt_profile_slowest_missing_profile_out(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            cli.parse_args(['--profile-slowest', '5', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(err.getvalue(), "Option requires --profile-out: '--profile-slowest'")
+
     def test_opt_conref_short(self):
         with contextlib.redirect_stdout(StringIO()) as out:
             args = cli.parse_args(['-C', 'conref_target', 'test_file'])
@@ -117,6 +153,29 @@ class TestDitaCleanupCli(unittest.TestCase):
         self.assertEqual(out.getvalue(), '')
         self.assertEqual(args.conref_target, 'conref_target')
 
+    def test_opt_limits_invalid(self):
+        for option in (['--max-size', '1.5M'], ['--max-elements', '0'], ['--timeout', '0']):
+            with self.assertRaises(SystemExit) as cm,\
+                 contextlib.redirect_stderr(StringIO()):
+                cli.parse_args([*option, 'test_file'])
+
+            self.assertEqual(cm.exception.code, EINVAL)
+
+    def test_opt_limits(self):
+        args = cli.parse_args(['--max-size', '2M', '--max-elements', '1000', '--timeout', '1.5', 'test_file'])
+
+        self.assertEqual(args.max_size, 2 * 1024 * 1024)
+        self.assertEqual(args.max_elements, 1000)
+        self.assertEqual(args.timeout, 1.5)
+
+    def test_opt_attributes_short(self):
+        args = cli.parse_args(['-A', 'attributes.adoc', 'test_file'])
+        self.assertEqual(args.attributes, 'attributes.adoc')
+
+    def test_opt_attributes_long(self):
+        args = cli.parse_args(['--attributes', 'attributes.adoc', 'test_file'])
+        self.assertEqual(args.attributes, 'attributes.adoc')
+
     def test_opt_conref_missing_argument(self):
         with self.assertRaises(SystemExit) as cm,\
              contextlib.redirect_stderr(StringIO()) as out,\
@@ -196,6 +255,211 @@ class TestDitaCleanupCli(unittest.TestCase):
         self.assertEqual(cm.exception.code, ENOTDIR)
         self.assertRegex(out.getvalue(), rf"Not a directory: 'file.dita'")
 
+    def test_opt_save_catalog(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['-X', '.', '--save-catalog', 'ids.catalog', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(args.save_catalog, 'ids.catalog')
+
+    def test_opt_save_catalog_missing_xref_dir(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['--save-catalog', 'ids.catalog', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Option requires --xref-dir: '--save-catalog'")
+
+    def test_opt_load_catalog(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['-X', '.', '--load-catalog', 'ids.catalog', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(args.load_catalog, 'ids.catalog')
+
+    def test_opt_load_catalog_missing_xref_dir(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['--load-catalog', 'ids.catalog', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Option requires --xref-dir: '--load-catalog'")
+
+    def test_opt_shard(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--shard', '2/3', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(args.shard, (2, 3))
+
+    def test_opt_shard_invalid_argument(self):
+        for value in ['0/3', '4/3', '1', 'one/two']:
+            with self.assertRaises(SystemExit) as cm,\
+                 contextlib.redirect_stderr(StringIO()) as out:
+                cli.parse_args(['--shard', value, 'test_file'])
+
+            self.assertEqual(cm.exception.code, EINVAL)
+            self.assertRegex(out.getvalue(), rf"Invalid shard: '{value}'")
+
+    def test_shard_files(self):
+        files = [f'topic-{i}.dita' for i in range(20)]
+        shards = [cli.shard_files(files, k, 3) for k in range(1, 4)]
+
+        self.assertEqual(sorted(sum(shards, [])), sorted(files))
+        self.assertTrue(all(shards))
+
+        for shard in shards:
+            self.assertEqual(shard, [f for f in files if f in shard])
+
+        self.assertEqual(cli.shard_files(list(reversed(files)), 1, 3), list(reversed(shards[0])))
+
+    def test_shard_files_balanced_sizes(self):
+        files = ['large.dita', 'medium.dita', 'small-one.dita', 'small-two.dita']
+        sizes = {'large.dita': 100, 'medium.dita': 60, 'small-one.dita': 30, 'small-two.dita': 30}
+
+        def stat(self):
+            return os.stat_result((0, 0, 0, 0, 0, 0, sizes[self.name], 0, 0, 0))
+
+        with patch.object(Path, 'stat', stat):
+            first = cli.shard_files(files, 1, 2)
+            second = cli.shard_files(files, 2, 2)
+
+        self.assertEqual(first, ['large.dita'])
+        self.assertEqual(second, ['medium.dita', 'small-one.dita', 'small-two.dita'])
+
+    def test_opt_rename_map(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['-X', '.', '--load-catalog', 'ids.catalog', '--rename-map', 'renames.txt', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(args.rename_map, 'renames.txt')
+
+    def test_opt_rename_map_missing_catalog(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['-X', '.', '--rename-map', 'renames.txt', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Option requires --load-catalog: '--rename-map'")
+
+    def test_read_rename_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = str(Path(directory, 'renames.txt'))
+            Path(file_path).write_text('old.dita new.dita\nR095\tfirst/old.dita\tsecond/new.dita\n\ninvalid\n')
+
+            with contextlib.redirect_stderr(StringIO()) as err:
+                renames = cli.read_rename_map(file_path)
+
+        self.assertEqual(renames, [
+            (Path('old.dita'), Path('new.dita')),
+            (Path('first/old.dita'), Path('second/new.dita')),
+        ])
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Invalid rename map entry: invalid')
+
+    def test_opt_since(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--since', 'HEAD~1', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(args.since, 'HEAD~1')
+
+    def test_opt_patch(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--patch', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertTrue(args.patch)
+
+    def test_opt_validate(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--validate', '--xml-catalog', 'catalog.xml', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertTrue(args.validate)
+        self.assertEqual(args.xml_catalog, ['catalog.xml'])
+
+    def test_opt_xml_catalog_missing_validate(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['--xml-catalog', 'catalog.xml', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Option requires --validate: '--xml-catalog'")
+
+    def test_opt_progress(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--progress', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertTrue(args.progress)
+
+    def test_opt_check_conrefs(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--check-conrefs', '-C', 'attributes.dita#attributes', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertTrue(args.check_conrefs)
+
+    def test_opt_check_conrefs_missing_conref_target(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['--check-conrefs', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Option requires --conref-target: '--check-conrefs'")
+
+    def test_opt_check_short(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['-c', '-X', '.', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertTrue(args.check)
+
+    def test_opt_check_long(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--check', '-X', '.', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertTrue(args.check)
+
+    def test_opt_check_missing_xref_dir(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['--check', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Option requires --xref-dir: '--check'")
+
+    def test_opt_jobs(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['-j', '4', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(args.jobs, 4)
+
+    def test_opt_jobs_invalid_argument(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['--jobs', '0', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Invalid number of jobs: '0'")
+
+    def test_opt_link_graph(self):
+        with contextlib.redirect_stdout(StringIO()) as out:
+            args = cli.parse_args(['--check', '-X', '.', '--link-graph', 'links.dot', 'test_file'])
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(args.link_graph, 'links.dot')
+
+    def test_opt_link_graph_missing_check(self):
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as out:
+            cli.parse_args(['--link-graph', 'links.dot', 'test_file'])
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(out.getvalue(), rf"Option requires --check: '--link-graph'")
+
     def test_opt_prune_ids_short(self):
         with contextlib.redirect_stdout(StringIO()) as out:
             args = cli.parse_args(['-i', 'test_file'])
@@ -251,3 +515,414 @@ class TestDitaCleanupCli(unittest.TestCase):
 
         self.assertEqual(out.getvalue(), '')
         self.assertTrue(args.verbose)
+
+class TestDitaCleanupProcessFiles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.first = Path(self.directory, 'first-topic.dita')
+        self.second = Path(self.directory, 'second-topic.dita')
+        self.first.write_text('''\
+<concept id="first-topic-id">
+    <title>First title</title>
+    <conbody>
+        <p><xref href="#section-id_{context}">Reference</xref></p>
+    </conbody>
+</concept>
+''')
+        self.second.write_text('''\
+<concept id="second-topic-id">
+    <title>Second title</title>
+    <conbody>
+        <section id="section-id_{context}">
+            <title>Section title</title>
+        </section>
+    </conbody>
+</concept>
+''')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_attributes(self):
+        attributes = Path(self.directory, 'attributes.adoc')
+        attributes.write_text(':context: ctx\n')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-A', str(attributes), '-X', str(self.directory), str(self.first), str(self.second)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertTrue(etree.parse(self.second).xpath('boolean(//section[@id="section-id_ctx"])'))
+        self.assertTrue(etree.parse(self.first).xpath('boolean(//xref[@href="second-topic.dita#second-topic-id/section-id_ctx"])'))
+
+    def test_attributes_missing_file(self):
+        with self.assertRaises(SystemExit),\
+             contextlib.redirect_stderr(StringIO()) as err:
+            cli.process_files(cli.parse_args(['-A', str(Path(self.directory, 'missing.adoc')), str(self.first)]))
+
+        self.assertRegex(err.getvalue(), 'missing.adoc')
+
+    def test_lazy_catalog(self):
+        for i in range(10):
+            Path(self.directory, f'unrelated-{i}.dita').write_text(f'<concept id="unrelated-{i}"><title>Title</title></concept>')
+
+        args = cli.parse_args(['-i', '--lazy-catalog', '-X', str(self.directory), str(self.first)])
+
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(args)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(parse.call_count, 3)
+
+        xml = etree.parse(self.first)
+        self.assertTrue(xml.xpath('boolean(/concept/conbody/p/xref[@href="second-topic.dita#second-topic-id/section-id_{context}"])'))
+
+    def test_lazy_catalog_missing_id(self):
+        self.first.write_text(self.first.read_text().replace('#section-id_{context}', '#section-idx'))
+
+        messages = []
+
+        for options in ([], ['--lazy-catalog']):
+            with contextlib.redirect_stderr(StringIO()) as err:
+                cli.process_files(cli.parse_args([*options, '-X', str(self.directory), str(self.first)]))
+
+            messages.append(err.getvalue())
+
+        self.assertRegex(messages[0], 'did you mean: section-id_{context}')
+        self.assertEqual(messages[1], messages[0])
+
+    def test_limits_max_size(self):
+        self.first.write_text(self.first.read_text().replace('#section-id_{context}', 'second-topic.dita#second-topic-id/section-id_{context}'))
+        self.second.write_text(self.second.read_text() + ' ' * 1024)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', '--max-size', '1K', '-X', str(self.directory), str(self.first), str(self.second)]))
+
+        self.assertEqual(exit_code, EPERM)
+        self.assertEqual(err.getvalue(), f'{NAME}: {self.second}: File size limit exceeded: {self.second.stat().st_size} bytes\n{NAME}: {self.first}: No matching ID: section-id_{{context}}\n')
+        self.assertIn('section-id_{context}', self.second.read_text())
+
+    def test_limits_timeout(self):
+        def stall(xml):
+            if xml.getroot().get('id') == 'first-topic-id':
+                time.sleep(10)
+            return prune_ids(xml)
+
+        with patch.object(cli, 'prune_ids', stall),\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', '--timeout', '0.1', str(self.first), str(self.second)]))
+
+        self.assertEqual(exit_code, EPERM)
+        self.assertEqual(err.getvalue(), f'{NAME}: {self.first}: Time limit exceeded: 0.1 seconds\n')
+        self.assertIn('section-id_{context}', self.first.read_text())
+        self.assertTrue(etree.parse(self.second).xpath('boolean(//section[@id="section-id"])'))
+
+    def test_limits_xref_dir(self):
+        third = Path(self.directory, 'third-topic.dita')
+        third.write_text('<concept id="third-topic-id">' + '<p/>' * 1024 + '</concept>')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', '--max-size', '1K', '-X', str(self.directory), str(self.first)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), f'{NAME}: {third}: File size limit exceeded: {third.stat().st_size} bytes\n')
+        self.assertTrue(etree.parse(self.first).xpath('boolean(//xref[@href="second-topic.dita#second-topic-id/section-id_{context}"])'))
+
+    def test_xref_dir_reuses_parsed_inputs(self):
+        args = cli.parse_args(['-i', '-x', '-X', str(self.directory), str(self.first), str(self.second)])
+
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(args)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(parse.call_count, 3)
+
+        xml = etree.parse(self.first)
+        self.assertTrue(xml.xpath('boolean(/concept/conbody/p/xref[@href="second-topic.dita#second-topic-id/section-id"])'))
+
+    def test_output_dir(self):
+        third = Path(self.directory, 'topics', 'third-topic.dita')
+        third.parent.mkdir()
+        third.write_text('<concept id="third-topic-id"><title>Third title</title></concept>')
+        output = Path(self.directory, 'out')
+
+        with contextlib.chdir(self.directory),\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', '-X', '.', '--output-dir', 'out', 'first-topic.dita', 'second-topic.dita', 'topics/third-topic.dita']))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertIn('{context}', self.first.read_text())
+        self.assertIn('{context}', self.second.read_text())
+        self.assertTrue(etree.parse(Path(output, 'first-topic.dita')).xpath('boolean(//xref[@href="second-topic.dita#second-topic-id/section-id"])'))
+        self.assertTrue(etree.parse(Path(output, 'second-topic.dita')).xpath('boolean(//section[@id="section-id"])'))
+        self.assertTrue(Path(output, 'topics', 'third-topic.dita').samefile(third))
+
+    def test_output_dir_relative_paths(self):
+        images = Path(self.directory, 'images')
+        images.mkdir()
+        Path(images, 'image.png').write_bytes(b'')
+        self.first.write_text(self.first.read_text().replace('<p>', '<p><image href="image.png"/>'))
+
+        with contextlib.chdir(self.directory),\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-D', 'images', '-X', '.', '--output-dir', 'build/out', 'first-topic.dita']))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+
+        xml = etree.parse(Path(self.directory, 'build', 'out', 'first-topic.dita'))
+        self.assertTrue(xml.xpath('boolean(//image[@href="../../images/image.png"])'))
+        self.assertTrue(xml.xpath('boolean(//xref[@href="../../second-topic.dita#second-topic-id/section-id_{context}"])'))
+
+    def test_output_dir_outside_current_directory(self):
+        subdirectory = Path(self.directory, 'topics')
+        subdirectory.mkdir()
+
+        with contextlib.chdir(subdirectory),\
+             self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            cli.process_files(cli.parse_args(['-i', '--output-dir', 'out', str(self.first)]))
+
+        self.assertEqual(cm.exception.code, EINVAL)
+        self.assertRegex(err.getvalue(), 'File outside the current directory')
+
+    def test_metrics_file(self):
+        metrics_file = Path(self.directory, 'dita_cleanup.prom')
+
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            cli.run(['-i', '-X', str(self.directory), '--metrics-file', str(metrics_file), str(self.first), str(self.second)])
+
+        self.assertEqual(cm.exception.code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertIn('dita_cleanup_files_total{state="processed"} 2\n', metrics_file.read_text())
+        self.assertIn('dita_cleanup_files_total{state="modified"} 2\n', metrics_file.read_text())
+        self.assertIn('dita_cleanup_catalog_ids 3\n', metrics_file.read_text())
+
+    def test_metrics_file_stream(self):
+        metrics_file = Path(self.directory, 'dita_cleanup.prom')
+
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()):
+            cli.run(['-i', '--stream', '--metrics-file', str(metrics_file), str(self.first), str(self.second)])
+
+        self.assertEqual(cm.exception.code, 0)
+        self.assertIn('dita_cleanup_files_total{state="modified"} 1\n', metrics_file.read_text())
+        self.assertIn('dita_cleanup_files_total{state="written"} 1\n', metrics_file.read_text())
+
+    def test_profile_out(self):
+        profile_dir = Path(self.directory, 'profiles')
+
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            cli.run(['-i', '-X', str(self.directory), '--profile-out', str(profile_dir), '--profile-slowest', '1', str(self.first), str(self.second)])
+
+        self.assertEqual(cm.exception.code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertLessEqual({'walk.prof', 'catalog.prof', 'process.prof', 'xref.prof'}, {p.name for p in profile_dir.iterdir()})
+        self.assertEqual(len(list(profile_dir.glob('slowest-01-*.prof'))), 1)
+
+    def test_metrics_file_larger_xref_dir(self):
+        metrics_file = Path(self.directory, 'dita_cleanup.prom')
+
+        for i in range(10):
+            Path(self.directory, f'unrelated-{i}.dita').write_text(f'<concept id="unrelated-{i}"><title>Title</title></concept>')
+
+        with self.assertRaises(SystemExit) as cm,\
+             contextlib.redirect_stderr(StringIO()):
+            cli.run(['-X', str(self.directory), '--metrics-file', str(metrics_file), str(self.first)])
+
+        self.assertEqual(cm.exception.code, 0)
+        self.assertIn('dita_cleanup_files_total{state="processed"} 1\n', metrics_file.read_text())
+        self.assertIn('dita_cleanup_catalog_files 12\n', metrics_file.read_text())
+
+    def test_xref_dir_output_stdout(self):
+        args = cli.parse_args(['-i', '-x', '-X', str(self.directory), '-o', '-', str(self.first), str(self.second)])
+
+        with contextlib.redirect_stdout(StringIO()) as out,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            args.output = sys.stdout
+            exit_code = cli.process_files(args)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertIn('href="second-topic.dita#second-topic-id/section-id"', out.getvalue())
+        self.assertIn('<section id="section-id">', out.getvalue())
+        self.assertIn('{context}', self.first.read_text())
+        self.assertIn('{context}', self.second.read_text())
+
+    def test_xref_dir_output_stdout_reparses_inputs(self):
+        args = cli.parse_args(['-i', '-x', '-X', str(self.directory), '-o', '-', str(self.first), str(self.second)])
+        spools = []
+
+        class Spool(tempfile.TemporaryDirectory):
+            def __init__(self):
+                super().__init__()
+                spools.append(Path(self.name))
+
+        with patch.object(cli.tempfile, 'TemporaryDirectory', Spool),\
+             patch.object(etree, 'parse', wraps=etree.parse) as parse,\
+             contextlib.redirect_stdout(StringIO()) as out,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            args.output = sys.stdout
+            exit_code = cli.process_files(args)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(parse.call_count, 4)
+        self.assertEqual(len(spools), 1)
+        self.assertFalse(spools[0].exists())
+        self.assertIn('href="second-topic.dita#second-topic-id/section-id"', out.getvalue())
+        self.assertIn('<section id="section-id">', out.getvalue())
+
+    def test_rename_map_updates_only_referencing_files(self):
+        third = Path(self.directory, 'third-topic.dita')
+        third.write_text('<concept id="third-topic-id"><title>Third title</title></concept>')
+        catalog_file = str(Path(self.directory, 'ids.catalog'))
+        files = [str(self.first), str(self.second), str(third)]
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            cli.process_files(cli.parse_args(['-i', '-x', '-X', str(self.directory), '--save-catalog', catalog_file] + files))
+
+        self.assertEqual(err.getvalue(), '')
+
+        moved = Path(self.directory, 'nested', 'second-topic.dita')
+        moved.parent.mkdir()
+        self.second.rename(moved)
+        rename_map = Path(self.directory, 'renames.txt')
+        rename_map.write_text(f'{self.second} {moved}\n')
+        files = [str(self.first), str(moved), str(third)]
+
+        args = cli.parse_args(['-X', str(self.directory), '--load-catalog', catalog_file, '--rename-map', str(rename_map)] + files)
+
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(args)
+
+        self.assertEqual(exit_code, 0)
+        self.assertRegex(err.getvalue(), rf"^{NAME}: .*: Target file changed: 'second-topic\.dita' -> 'nested/second-topic\.dita'")
+        self.assertEqual(args.files, [str(self.first), str(moved)])
+        self.assertEqual(parse.call_count, 3)
+
+        xml = etree.parse(self.first)
+        self.assertTrue(xml.xpath('boolean(/concept/conbody/p/xref[@href="nested/second-topic.dita#second-topic-id/section-id"])'))
+
+    def test_rename_map_changed_file_name(self):
+        catalog_file = str(Path(self.directory, 'ids.catalog'))
+        self.first.write_text(self.first.read_text().replace('#section-id_{context}', 'second-topic.dita#second-topic-id/section-id_{context}'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            cli.process_files(cli.parse_args(['-X', str(self.directory), '--save-catalog', catalog_file, str(self.first), str(self.second)]))
+
+        self.assertEqual(err.getvalue(), '')
+
+        moved = Path(self.directory, 'moved', 'renamed-topic.dita')
+        moved.parent.mkdir()
+        self.second.rename(moved)
+        rename_map = Path(self.directory, 'renames.txt')
+        rename_map.write_text(f'{self.second} {moved}\n')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-X', str(self.directory), '--load-catalog', catalog_file, '--rename-map', str(rename_map), str(self.first), str(moved)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertNotIn('Target file mismatch', err.getvalue())
+        self.assertTrue(etree.parse(self.first).xpath('boolean(//xref[@href="moved/renamed-topic.dita#second-topic-id/section-id_{context}"])'))
+
+    def test_rename_map_whole_file_links(self):
+        catalog_file = str(Path(self.directory, 'ids.catalog'))
+        self.first.write_text(self.first.read_text().replace('<p>', '<p><xref href="second-topic.dita" /><link href="second-topic.dita" />'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            cli.process_files(cli.parse_args(['-X', str(self.directory), '--save-catalog', catalog_file, str(self.first), str(self.second)]))
+
+        self.assertEqual(err.getvalue(), '')
+
+        moved = Path(self.directory, 'moved', 'renamed-topic.dita')
+        moved.parent.mkdir()
+        self.second.rename(moved)
+        rename_map = Path(self.directory, 'renames.txt')
+        rename_map.write_text(f'{self.second} {moved}\n')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-X', str(self.directory), '--load-catalog', catalog_file, '--rename-map', str(rename_map), str(self.first), str(moved)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertRegex(err.getvalue(), rf"^{NAME}: .*: Target file changed: 'second-topic\.dita' -> 'moved/renamed-topic\.dita'")
+
+        xml = etree.parse(self.first)
+        self.assertTrue(xml.xpath('boolean(//xref[@href="moved/renamed-topic.dita"])'))
+        self.assertTrue(xml.xpath('boolean(//link[@href="moved/renamed-topic.dita"])'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['--check', '-X', str(self.directory), str(self.first)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+
+    def test_since_updates_only_changed_files(self):
+        third = Path(self.directory, 'third-topic.dita')
+        third.write_text('<concept id="third-topic-id"><title>Third title</title></concept>')
+        catalog_file = str(Path(self.directory, 'ids.catalog'))
+        files = [str(self.first), str(self.second), str(third)]
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            cli.process_files(cli.parse_args(['-i', '-x', '-X', str(self.directory), '--save-catalog', catalog_file] + files))
+
+        self.assertEqual(err.getvalue(), '')
+
+        self.second.write_text(self.second.read_text().replace('section-id', 'new-section-id'))
+        self.first.write_text(self.first.read_text().replace('section-id', 'new-section-id'))
+
+        args = cli.parse_args(['-X', str(self.directory), '--load-catalog', catalog_file, '--save-catalog', catalog_file, '--since', 'HEAD'] + files)
+
+        with patch.object(cli, 'list_changes', return_value=([self.first, self.second], [])),\
+             patch.object(etree, 'parse', wraps=etree.parse) as parse,\
+             contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(args)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(args.files, [str(self.first), str(self.second)])
+        self.assertEqual(parse.call_count, 3)
+
+        xml = etree.parse(self.first)
+        self.assertTrue(xml.xpath('boolean(/concept/conbody/p/xref[@href="second-topic.dita#second-topic-id/new-section-id"])'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            catalog = load_catalog(catalog_file, self.directory)
+
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(sorted(catalog), ['first-topic-id', 'new-section-id', 'second-topic-id', 'third-topic-id'])
+        self.assertEqual(catalog.links(), {'second-topic.dita': {'first-topic.dita'}})
+
+        catalog.close()
+
+    def test_patch_preserves_unchanged_bytes(self):
+        source = '<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE concept PUBLIC "-//OASIS//DTD DITA Concept//EN" "concept.dtd">\n' + self.first.read_text()
+        self.first.write_text(source)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['--patch', '-i', '-x', '-X', str(self.directory), str(self.first), str(self.second)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertEqual(self.first.read_text(), source.replace('#section-id_{context}', 'second-topic.dita#second-topic-id/section-id'))
+
+    def test_validate_reports_invalid_files(self):
+        Path(self.directory, 'concept.dtd').write_text('<!ELEMENT concept (title, conbody)>\n<!ATTLIST concept id ID #REQUIRED>\n<!ELEMENT title (#PCDATA)>\n<!ELEMENT conbody (p | section)*>\n<!ELEMENT p (#PCDATA | xref)*>\n<!ELEMENT xref (#PCDATA)>\n<!ATTLIST xref href CDATA #IMPLIED>\n')
+        self.first.write_text('<!DOCTYPE concept SYSTEM "concept.dtd">\n' + self.first.read_text())
+        self.second.write_text('<!DOCTYPE concept SYSTEM "concept.dtd">\n' + self.second.read_text())
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['--validate', '-i', '-x', '-X', str(self.directory), str(self.first), str(self.second)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(len(err.getvalue().splitlines()), 2)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*second-topic\.dita:\d+: Invalid content: No declaration for element section')
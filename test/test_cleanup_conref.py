@@ -0,0 +1,99 @@
+import unittest
+import contextlib
+import tempfile
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from unittest.mock import patch
+from src.dita.cleanup import NAME
+from src.dita.cleanup.conref import ConrefIndex
+from src.dita.cleanup.xml import replace_attributes
+
+ATTRIBUTES = '''\
+<reference id="attributes">
+    <title>Attributes</title>
+    <refbody>
+        <section>
+            <p><ph id="product-name">Product</ph> <ph id="product-version">1.0</ph> <ph id="_internal-name">Internal</ph></p>
+        </section>
+    </refbody>
+</reference>
+'''
+
+class TestDitaCleanupConref(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.target = Path(self.directory, 'attributes.dita')
+        self.target.write_text(ATTRIBUTES)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_topic(self, text, conref_target='attributes.dita#attributes'):
+        xml = etree.ElementTree(etree.fromstring(f'<concept id="topic-id"><conbody><p>{text}</p></conbody></concept>'))
+        replace_attributes(xml, conref_target)
+        return xml
+
+    def test_check(self):
+        index = ConrefIndex('attributes.dita#attributes')
+
+        topics = [
+            self.create_topic('{product-name} {product-version}'),
+            self.create_topic('{product-name} {missing-name}'),
+            self.create_topic('{missing-name} {Other-Name}'),
+        ]
+
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse:
+            for i, xml in enumerate(topics):
+                index.check(xml, Path(self.directory, f'topic-{i}.dita'))
+
+        self.assertEqual(parse.call_count, 1)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            index.report()
+
+        self.assertEqual(err.getvalue(), f'''\
+{NAME}: {self.target}: Missing conref target: missing-name (referenced in 2 files)
+{NAME}: {self.target}: Missing conref target: other-name (referenced in 1 file)
+''')
+
+    def test_check_underscore_id(self):
+        index = ConrefIndex('attributes.dita#attributes')
+        xml = etree.ElementTree(etree.fromstring('<concept id="topic-id"><conbody><p><ph conref="attributes.dita#attributes/_internal-name"/></p></conbody></concept>'))
+        index.check(xml, Path(self.directory, 'topic.dita'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            index.report()
+
+        self.assertEqual(err.getvalue(), '')
+
+    def test_check_wrong_topic_id(self):
+        index = ConrefIndex('attributes.dita#other-attributes')
+        index.check(self.create_topic('{product-name}', 'attributes.dita#other-attributes'), Path(self.directory, 'topic.dita'))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            index.report()
+
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*: Missing conref target: product-name ')
+
+    def test_check_missing_target_file(self):
+        index = ConrefIndex('missing.dita#attributes')
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            index.check(self.create_topic('{product-name}', 'missing.dita#attributes'), Path(self.directory, 'first.dita'))
+            index.check(self.create_topic('{product-name}', 'missing.dita#attributes'), Path(self.directory, 'second.dita'))
+            index.report()
+
+        self.assertEqual(len(err.getvalue().splitlines()), 1)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: .*missing\.dita')
+
+    def test_check_no_conrefs(self):
+        index = ConrefIndex('attributes.dita#attributes')
+
+        xml = self.create_topic('No attributes')
+
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse:
+            index.check(xml, Path(self.directory, 'first.dita'))
+
+        self.assertEqual(parse.call_count, 0)
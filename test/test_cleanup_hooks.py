@@ -0,0 +1,143 @@
+import unittest
+import contextlib
+import tempfile
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from src.dita.cleanup import cli
+from src.dita.cleanup import hooks
+from src.dita.cleanup.hooks import HOOKS, Event, emit, instrumented, load_plugins, register, unregister
+from src.dita.cleanup.out import warn
+
+class TestDitaCleanupHooks(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        register(self.events.append, elements=True)
+
+    def tearDown(self):
+        unregister(self.events.append)
+
+    def test_register(self):
+        register(self.events.append)
+
+        self.assertEqual(HOOKS, [self.events.append])
+
+        unregister(self.events.append)
+
+        self.assertEqual(HOOKS, [])
+
+        register(self.events.append)
+
+    def test_instrumented(self):
+        @instrumented('transform')
+        def transform(xml):
+            return True
+
+        xml = etree.ElementTree(etree.fromstring('<concept id="topic-id"><title>Title</title></concept>'))
+
+        emit(Event('file_start', file_path='topic.dita'))
+        self.assertTrue(transform(xml))
+        emit(Event('file_end', file_path='topic.dita'))
+
+        self.assertEqual(len(self.events), 3)
+        self.assertEqual(self.events[1].name, 'transform')
+        self.assertEqual(self.events[1].detail, 'transform')
+        self.assertEqual(self.events[1].file_path, 'topic.dita')
+        self.assertEqual(self.events[1].elements, 2)
+        self.assertTrue(self.events[1].updated)
+        self.assertGreaterEqual(self.events[1].duration, 0)
+
+    def test_instrumented_no_hooks(self):
+        unregister(self.events.append)
+
+        @instrumented('transform')
+        def transform(xml):
+            return False
+
+        with patch.object(hooks, 'count_elements') as count_elements:
+            self.assertFalse(transform(None))
+
+        count_elements.assert_not_called()
+        register(self.events.append, elements=True)
+
+    def test_instrumented_no_counting_hooks(self):
+        unregister(self.events.append)
+        register(self.events.append)
+
+        @instrumented('transform')
+        def transform(xml):
+            return False
+
+        xml = etree.ElementTree(etree.fromstring('<concept id="topic-id"><title>Title</title></concept>'))
+
+        with patch.object(hooks, 'count_elements') as count_elements:
+            self.assertFalse(transform(xml))
+
+        count_elements.assert_not_called()
+        self.assertEqual(self.events[0].name, 'transform')
+        self.assertEqual(self.events[0].elements, 0)
+        register(self.events.append, elements=True)
+
+    def test_warning(self):
+        with contextlib.redirect_stderr(StringIO()):
+            warn('test message')
+
+        self.assertEqual(self.events, [Event('warning', 'test message')])
+
+    def test_load_plugins(self):
+        hook = MagicMock()
+        valid = MagicMock()
+        valid.load.return_value = hook
+        invalid = MagicMock()
+        invalid.name = 'invalid'
+        invalid.load.side_effect = ImportError('No module named plugin')
+
+        with patch.object(hooks, 'entry_points', return_value=[valid, invalid]) as entry_points:
+            errors = load_plugins()
+
+        entry_points.assert_called_once_with(group='dita_cleanup.hooks')
+        self.assertEqual(errors, ["Cannot load hook: 'invalid': No module named plugin"])
+        self.assertTrue(hook in HOOKS)
+        self.assertFalse(hook in hooks._counting)
+
+        unregister(hook)
+
+    def test_load_plugins_elements(self):
+        hook = MagicMock()
+        hook.elements = True
+        plugin = MagicMock()
+        plugin.load.return_value = hook
+
+        with patch.object(hooks, 'entry_points', return_value=[plugin]):
+            load_plugins()
+
+        self.assertTrue(hook in hooks._counting)
+
+        unregister(hook)
+
+    def test_process_files_events(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = Path(temp_dir, 'first-topic.dita')
+            second = Path(temp_dir, 'second-topic.dita')
+            first.write_text('<concept id="first-topic-id"><p><xref href="#section-id_{context}" /></p></concept>')
+            second.write_text('<concept id="second-topic-id"><section id="section-id_{context}" /></concept>')
+
+            with contextlib.redirect_stderr(StringIO()):
+                cli.process_files(cli.parse_args(['-i', '-X', temp_dir, str(first), str(second)]))
+
+        names = [(e.name, e.detail) for e in self.events if e.name not in ['file_start', 'file_end', 'file_found']]
+
+        self.assertEqual(names, [
+            ('phase_start', 'process'),
+            ('parse', 'parse_xml'), ('transform', 'prune_ids'),
+            ('parse', 'parse_xml'), ('transform', 'prune_ids'), ('serialize', 'write_xml'),
+            ('phase_end', 'process'),
+            ('phase_start', 'walk'), ('phase_end', 'walk'),
+            ('phase_start', 'catalog'), ('phase_end', 'catalog'), ('catalog', temp_dir),
+            ('phase_start', 'xref'),
+            ('parse', 'parse_xml'), ('transform', 'update_xref_targets'), ('serialize', 'write_xml'),
+            ('phase_end', 'xref'),
+        ])
+        self.assertEqual([e.updated for e in self.events if e.name == 'file_end'], [False, True, False, False, True])
+        self.assertEqual([e.elements for e in self.events if e.name == 'catalog'], [3])
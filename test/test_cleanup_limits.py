@@ -0,0 +1,49 @@
+import unittest
+import tempfile
+import time
+from lxml import etree
+from pathlib import Path
+from src.dita.cleanup.limits import LimitExceeded, Limits, check_elements, check_size, parse_size, time_limit
+
+class TestDitaCleanupLimits(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parse_size('100'), 100)
+        self.assertEqual(parse_size('2k'), 2048)
+        self.assertEqual(parse_size('3MB'), 3 * 1024 ** 2)
+        self.assertEqual(parse_size('1G'), 1024 ** 3)
+        self.assertIsNone(parse_size('1.5M'))
+        self.assertIsNone(parse_size('-1'))
+
+    def test_check_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory, 'topic.dita')
+            file_path.write_bytes(b'x' * 100)
+
+            check_size(file_path, None)
+            check_size(file_path, Limits(max_size=100))
+
+            with self.assertRaisesRegex(LimitExceeded, 'File size limit exceeded: 100 bytes'):
+                check_size(file_path, Limits(max_size=99))
+
+    def test_check_elements(self):
+        xml = etree.ElementTree(etree.fromstring('<concept id="topic-id"><title>Title</title><!-- comment --></concept>'))
+
+        check_elements(xml, Limits(max_elements=2))
+
+        with self.assertRaisesRegex(LimitExceeded, 'Element limit exceeded'):
+            check_elements(xml, Limits(max_elements=1))
+
+    def test_time_limit(self):
+        start = time.monotonic()
+
+        with self.assertRaisesRegex(LimitExceeded, 'Time limit exceeded: 0.1 seconds'):
+            with time_limit(0.1):
+                while True:
+                    pass
+
+        self.assertLess(time.monotonic() - start, 2)
+
+        with time_limit(0.1):
+            pass
+
+        time.sleep(0.2)
@@ -0,0 +1,116 @@
+import unittest
+import contextlib
+import os
+import tempfile
+import tracemalloc
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from src.dita.cleanup import cli
+from src.dita.cleanup.catalog import catalog_ids
+from src.dita.cleanup.hooks import register, unregister
+from src.dita.cleanup.xml import replace_attributes
+
+# Memory ceilings: traced Python memory per cataloged ID, traced memory
+# per character of a rewritten text node, and growth of the resident set
+# size while processing a corpus whose trees would take several times as
+# much if they were all kept alive:
+ID_BUDGET   = 200
+TEXT_BUDGET = 3
+RSS_BUDGET  = 12 * 1024 * 1024
+
+def create_topic(index: int, sections: int, count: int) -> str:
+    body = ''.join(f'''
+        <section id="section-{index}-{i}_{{context}}">
+            <title>Section title</title>
+            <p>A paragraph with a <xref href="#section-{(index + 1) % count}-{i}_{{context}}">reference</xref>.</p>
+        </section>''' for i in range(sections))
+
+    return f'<concept id="topic-{index}"><title>Topic title</title><conbody>{body}</conbody></concept>\n'
+
+def create_corpus(directory: Path, count: int, sections: int) -> list[str]:
+    files = []
+
+    for index in range(count):
+        file_path = Path(directory, f'topic-{index}.dita')
+        file_path.write_text(create_topic(index, sections, count))
+        files.append(str(file_path))
+
+    return files
+
+def resident_set_size() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+class TestDitaCleanupMemory(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_catalog_ids_memory(self):
+        create_corpus(self.directory, 500, 20)
+
+        tracemalloc.start()
+        ids = catalog_ids(self.directory)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(len(ids), 10500)
+        self.assertLess(peak, len(ids) * ID_BUDGET)
+
+    def test_process_files_memory(self):
+        files = create_corpus(self.directory, 30, 200)
+
+        tracemalloc.start()
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            exit_code = cli.process_files(cli.parse_args(['-i', '-x', '-X', str(self.directory)] + files))
+
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(err.getvalue(), '')
+        self.assertLess(peak, 30 * 201 * ID_BUDGET)
+
+    @unittest.skipUnless(Path('/proc/self/statm').exists(), 'requires /proc/self/statm')
+    def test_process_files_resident_set_size(self):
+        files = create_corpus(self.directory, 60, 300)
+        start = resident_set_size()
+        samples: dict[str, list[int]] = {}
+        phase = None
+
+        def sample(event):
+            nonlocal phase
+
+            if event.name == 'phase_start':
+                phase = event.detail
+            elif event.name == 'file_end':
+                samples.setdefault(phase, []).append(resident_set_size())
+
+        register(sample)
+
+        try:
+            with contextlib.redirect_stderr(StringIO()):
+                cli.process_files(cli.parse_args(['-i', '-x', '-X', str(self.directory)] + files))
+        finally:
+            unregister(sample)
+
+        self.assertLessEqual({'process', 'xref'}, samples.keys())
+        self.assertLess(max(max(values) for values in samples.values()) - start, RSS_BUDGET)
+
+    def test_replace_attributes_memory(self):
+        text = ('A long paragraph with many words. ' * 20 + '{attribute} ') * 1500
+        xml = etree.ElementTree(etree.fromstring(f'<concept id="topic-id"><conbody><p>{text}</p></conbody></concept>'))
+
+        tracemalloc.start()
+        updated = replace_attributes(xml, 'attributes.dita#attributes')
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertTrue(updated)
+        self.assertEqual(len(xml.findall('.//ph')), 1500)
+        self.assertLess(peak, len(text) * TEXT_BUDGET)
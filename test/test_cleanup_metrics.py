@@ -0,0 +1,84 @@
+import unittest
+import contextlib
+import tempfile
+from io import StringIO
+from pathlib import Path
+from src.dita.cleanup.catalog import catalog_ids
+from src.dita.cleanup.hooks import Event, register, unregister
+from src.dita.cleanup.metrics import Metrics, warning_type
+
+class TestDitaCleanupMetrics(unittest.TestCase):
+    def test_warning_type(self):
+        self.assertEqual(warning_type(Event('warning', 'topic.dita: Duplicate ID: topic-id', 'topic.dita')), 'Duplicate ID')
+        self.assertEqual(warning_type(Event('warning', 'other.dita: Target not found: topic-id')), 'Target not found')
+        self.assertEqual(warning_type(Event('warning', "[Errno 2] No such file or directory: 'topic.dita'")), 'Other')
+
+    def test_events(self):
+        metrics = Metrics()
+
+        metrics(Event('phase_start', 'walk'))
+        metrics(Event('file_end', file_path='catalog.dita'))
+        metrics(Event('phase_end', 'walk'))
+        metrics(Event('phase_start', 'process', files=2))
+        metrics(Event('file_start', file_path='first.dita'))
+        metrics(Event('parse', 'parse_xml', 'first.dita', 0.02))
+        metrics(Event('transform', 'prune_ids', 'first.dita', 0.001, updated=True))
+        metrics(Event('serialize', 'write_xml', 'first.dita', 0.3))
+        metrics(Event('file_end', file_path='first.dita', updated=True))
+        metrics(Event('file_end', file_path='second.dita'))
+        metrics(Event('warning', 'second.dita: Duplicate ID: topic-id', 'second.dita'))
+        metrics(Event('catalog', '.', elements=12, files=2))
+
+        output = metrics.format()
+
+        self.assertIn('dita_cleanup_files_total{state="processed"} 2\n', output)
+        self.assertIn('dita_cleanup_files_total{state="modified"} 1\n', output)
+        self.assertIn('dita_cleanup_files_total{state="written"} 1\n', output)
+        self.assertIn('dita_cleanup_warnings_total{type="Duplicate ID"} 1\n', output)
+        self.assertIn('dita_cleanup_catalog_ids 12\n', output)
+        self.assertIn('dita_cleanup_catalog_files 2\n', output)
+        self.assertIn('dita_cleanup_catalog_duplicate_ids 1\n', output)
+        self.assertIn('dita_cleanup_parse_duration_seconds_bucket{le="0.01"} 0\n', output)
+        self.assertIn('dita_cleanup_parse_duration_seconds_bucket{le="0.025"} 1\n', output)
+        self.assertIn('dita_cleanup_write_duration_seconds_bucket{le="0.25"} 0\n', output)
+        self.assertIn('dita_cleanup_write_duration_seconds_count 1\n', output)
+        self.assertIn('# TYPE dita_cleanup_transform_duration_seconds histogram\n', output)
+        self.assertIn('# TYPE dita_cleanup_files_total counter\n', output)
+        self.assertNotIn('# EOF', output)
+
+    def test_events_written(self):
+        metrics = Metrics()
+
+        metrics(Event('phase_start', 'process', files=2))
+        metrics(Event('written', file_path='first.dita'))
+        metrics(Event('file_end', file_path='first.dita', updated=True))
+        metrics(Event('file_end', file_path='second.dita'))
+
+        self.assertIn('dita_cleanup_files_total{state="written"} 1\n', metrics.format())
+
+    def test_catalog_ids(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            Path(temp_dir, 'first-topic.dita').write_text('<concept id="topic-id" />')
+            Path(temp_dir, 'second-topic.dita').write_text('<concept id="topic-id" />')
+            metrics = Metrics()
+
+            register(metrics)
+
+            with contextlib.redirect_stderr(StringIO()):
+                catalog_ids(temp_dir)
+
+            unregister(metrics)
+
+        self.assertEqual(metrics.catalog_files, 2)
+        self.assertEqual(metrics.warnings['Duplicate ID'], 1)
+        self.assertEqual(metrics.durations['parse'].count, 2)
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir, 'dita_cleanup.prom')
+            file_path.write_text('stale')
+
+            Metrics().write(file_path)
+
+            self.assertEqual(list(Path(temp_dir).iterdir()), [file_path])
+            self.assertRegex(file_path.read_text(), r'^# HELP dita_cleanup_files_total .*\n# TYPE dita_cleanup_files_total counter\n')
@@ -0,0 +1,58 @@
+import unittest
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from src.dita.cleanup.mirror import Mirror
+
+class TestDitaCleanupMirror(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.source = Path(self.directory, 'topics', 'topic.dita')
+        self.source.parent.mkdir()
+        self.source.write_text('<concept id="topic-id"/>')
+        self.mirror = Mirror(Path(self.directory, 'out'), [self.source], self.directory)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_locate(self):
+        other = Path(self.directory, 'other.dita')
+
+        self.assertEqual(self.mirror(self.source), Path(self.directory, 'out', 'topics', 'topic.dita'))
+        self.assertEqual(self.mirror(other), other.resolve())
+
+    def test_outside_base(self):
+        with self.assertRaises(ValueError):
+            Mirror(Path(self.directory, 'out'), [self.source], Path(self.directory, 'out'))
+
+    def test_same_directory(self):
+        with self.assertRaises(ValueError):
+            Mirror(self.directory, [self.source], self.directory)
+
+    def test_same_directory_keeps_source(self):
+        mirror = Mirror(Path(self.directory, 'out'), [self.source], self.directory)
+        mirror.files[self.source.resolve()] = self.source
+
+        self.assertEqual(mirror.link(self.source), self.source)
+        self.assertEqual(mirror.prepare(self.source), self.source)
+        self.assertEqual(self.source.read_text(), '<concept id="topic-id"/>')
+
+    def test_link(self):
+        output_path = self.mirror.link(self.source)
+        self.assertTrue(output_path.samefile(self.source))
+
+    def test_link_copy(self):
+        with patch('os.link', side_effect=OSError):
+            output_path = self.mirror.link(self.source)
+
+        self.assertFalse(output_path.samefile(self.source))
+        self.assertEqual(output_path.read_text(), self.source.read_text())
+
+    def test_prepare_keeps_source(self):
+        self.mirror.link(self.source)
+
+        output_path = self.mirror.prepare(self.source)
+        output_path.write_text('<concept id="updated-id"/>')
+
+        self.assertEqual(self.source.read_text(), '<concept id="topic-id"/>')
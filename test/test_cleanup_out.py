@@ -28,3 +28,12 @@ class TestDitaCleanupOut(unittest.TestCase):
 
         self.assertEqual(cm.exception.code, EINVAL)
         self.assertEqual(err.getvalue().strip(), f'{NAME}: test message')
+
+    def test_show_status(self):
+        with contextlib.redirect_stderr(StringIO()) as err:
+            out.show_status('first status')
+            out.warn('test message')
+            out.show_status('final status', final=True)
+            out.warn('another message')
+
+        self.assertEqual(err.getvalue(), f'\r{NAME}: first status\x1b[K\r\x1b[K{NAME}: test message\n\r{NAME}: final status\x1b[K\n{NAME}: another message\n')
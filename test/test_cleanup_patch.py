@@ -0,0 +1,120 @@
+import unittest
+import tempfile
+from io import BytesIO
+from lxml import etree
+from pathlib import Path
+from src.dita.cleanup.patch import patch_source, snapshot_attributes, write_xml
+from src.dita.cleanup.xml import prune_ids, prune_xrefs, replace_attributes
+
+SOURCE = b'''\
+<?xml version='1.0' encoding='UTF-8'?>
+<!DOCTYPE concept PUBLIC "-//OASIS//DTD DITA Concept//EN" "concept.dtd">
+<concept id='topic-id_{context}'>
+    <!-- <xref href="#commented-id_{context}" /> -->
+    <title>Title &amp; <![CDATA[<ph id="cdata-id">]]></title>
+    <conbody>
+        <p id="paragraph-id_{context}" outputclass="first">An <xref
+            href="#section-id_{context}"
+            >xref</xref> and <xref href="#other-id_{context}">another</xref>.</p>
+    </conbody>
+</concept>
+'''
+
+class TestDitaCleanupPatch(unittest.TestCase):
+    def test_patch_source(self):
+        xml = etree.parse(BytesIO(SOURCE))
+        snapshot = snapshot_attributes(xml)
+
+        prune_ids(xml)
+        prune_xrefs(xml)
+
+        self.assertEqual(patch_source(SOURCE, xml, snapshot), b'''\
+<?xml version='1.0' encoding='UTF-8'?>
+<!DOCTYPE concept PUBLIC "-//OASIS//DTD DITA Concept//EN" "concept.dtd">
+<concept id='topic-id'>
+    <!-- <xref href="#commented-id_{context}" /> -->
+    <title>Title &amp; <![CDATA[<ph id="cdata-id">]]></title>
+    <conbody>
+        <p id="paragraph-id" outputclass="first">An <xref
+            href="#section-id"
+            >xref</xref> and <xref href="#other-id">another</xref>.</p>
+    </conbody>
+</concept>
+''')
+
+    def test_patch_source_no_changes(self):
+        xml = etree.parse(BytesIO(SOURCE))
+
+        self.assertEqual(patch_source(SOURCE, xml, snapshot_attributes(xml)), SOURCE)
+
+    def test_patch_source_escaped_value(self):
+        source = b'<concept id="topic-id"><p><xref href=\'a&amp;b.dita#topic-id\'>x</xref></p></concept>'
+        xml = etree.parse(BytesIO(source))
+        snapshot = snapshot_attributes(xml)
+
+        xml.find('.//xref').set('href', "c&d'.dita#topic-id")
+
+        self.assertEqual(patch_source(source, xml, snapshot), b'<concept id="topic-id"><p><xref href=\'c&amp;d&apos;.dita#topic-id\'>x</xref></p></concept>')
+
+    def test_patch_source_namespaced_attributes(self):
+        source = b'<concept xmlns:d="urn:d" xml:lang="en" d:v="1" id="topic-id_{context}"><p xml:lang="en" id="p_{context}" d:v="1"/></concept>'
+        xml = etree.parse(BytesIO(source))
+        snapshot = snapshot_attributes(xml)
+
+        prune_ids(xml)
+        xml.getroot().set('{http://www.w3.org/XML/1998/namespace}lang', 'en-us')
+        xml.find('p').set('{urn:d}v', '2')
+
+        self.assertEqual(patch_source(source, xml, snapshot), b'<concept xmlns:d="urn:d" xml:lang="en-us" d:v="1" id="topic-id"><p xml:lang="en" id="p" d:v="2"/></concept>')
+
+    def test_patch_source_structural_change(self):
+        xml = etree.parse(BytesIO(SOURCE))
+        snapshot = snapshot_attributes(xml)
+
+        xml.find('.//p').set('id', 'paragraph-id')
+        xml.find('.//p').insert(0, etree.Element('ph'))
+
+        self.assertIsNone(patch_source(SOURCE, xml, snapshot))
+
+    def test_patch_source_new_attribute(self):
+        xml = etree.parse(BytesIO(SOURCE))
+        snapshot = snapshot_attributes(xml)
+
+        xml.find('.//p').set('outputclass', 'second')
+        xml.find('.//p').set('rev', '2')
+
+        self.assertIsNone(patch_source(SOURCE, xml, snapshot))
+
+    def test_patch_source_unsupported_encoding(self):
+        source = '<?xml version="1.0" encoding="UTF-16"?><concept id="topic-id_{context}" />'.encode('utf-16')
+        xml = etree.parse(BytesIO(source))
+        snapshot = snapshot_attributes(xml)
+
+        prune_ids(xml)
+
+        self.assertIsNone(patch_source(source, xml, snapshot))
+
+    def test_write_xml(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir, 'topic.dita')
+            file_path.write_bytes(SOURCE)
+
+            xml = etree.parse(file_path)
+            snapshot = snapshot_attributes(xml)
+            prune_ids(xml)
+            write_xml(xml, file_path, file_path, snapshot)
+
+            self.assertTrue(file_path.read_bytes().startswith(b"<?xml version='1.0' encoding='UTF-8'?>\n<!DOCTYPE concept"))
+            self.assertTrue(b"<concept id='topic-id'>" in file_path.read_bytes())
+
+    def test_write_xml_fallback(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir, 'topic.dita')
+            file_path.write_bytes(b'<concept id="topic-id"><p>A {product}</p></concept>')
+
+            xml = etree.parse(file_path)
+            snapshot = snapshot_attributes(xml)
+            replace_attributes(xml, 'attributes.dita#attributes')
+            write_xml(xml, file_path, file_path, snapshot)
+
+            self.assertEqual(file_path.read_bytes(), b'<concept id="topic-id"><p>A <ph conref="attributes.dita#attributes/product"/></p></concept>')
@@ -0,0 +1,49 @@
+import unittest
+import pstats
+import tempfile
+from src.dita.cleanup.hooks import Event
+from src.dita.cleanup.profiler import Profiler, profile_name
+
+def work(count):
+    return sum(i * i for i in range(count))
+
+class TestDitaCleanupProfiler(unittest.TestCase):
+    def test_profile_name(self):
+        self.assertEqual(profile_name('xref'), 'xref.prof')
+        self.assertEqual(profile_name('slowest-01', 'process', 'my topic.dita'), 'slowest-01-process-my_topic.dita.prof')
+
+    def test_phases(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profiler = Profiler(temp_dir)
+
+            profiler(Event('phase_start', 'process'))
+            work(100)
+            profiler(Event('phase_end', 'process'))
+            profiler(Event('phase_start', 'process'))
+            work(100)
+            profiler(Event('phase_start', 'xref'))
+            work(100)
+
+            result = profiler.write()
+
+            self.assertEqual([p.name for p in result], ['process.prof', 'process-2.prof', 'xref.prof'])
+            self.assertIn('work', {function for _, _, function in pstats.Stats(str(result[0])).stats})
+
+    def test_slowest_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profiler = Profiler(temp_dir, slowest=2)
+
+            profiler(Event('phase_start', 'process'))
+
+            for name, count in (('small.dita', 10), ('large.dita', 200000), ('medium.dita', 50000)):
+                profiler(Event('file_start', file_path=name))
+                work(count)
+                profiler(Event('file_end', file_path=name))
+
+            profiler(Event('phase_end', 'process'))
+
+            result = profiler.write()
+
+            self.assertEqual([p.name for p in result], ['process.prof', 'slowest-01-process-large.dita.prof', 'slowest-02-process-medium.dita.prof'])
+            calls = {function: values[1] for (_, _, function), values in pstats.Stats(str(result[0])).stats.items()}
+            self.assertEqual(calls['work'], 3)
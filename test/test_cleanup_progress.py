@@ -0,0 +1,116 @@
+import unittest
+import contextlib
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+from src.dita.cleanup import NAME
+from src.dita.cleanup.catalog import catalog_ids
+from src.dita.cleanup.hooks import Event, register, unregister
+from src.dita.cleanup.progress import Progress, format_duration
+
+class TestDitaCleanupProgress(unittest.TestCase):
+    def test_format_duration(self):
+        self.assertEqual(format_duration(5), '0:05')
+        self.assertEqual(format_duration(192.5), '3:12')
+        self.assertEqual(format_duration(3723), '1:02:03')
+
+    def test_describe(self):
+        progress = Progress(interactive=False)
+
+        with patch('time.monotonic', return_value=100.0):
+            progress.start('process', 10)
+
+        progress.files = 4
+        progress.size = 8000000
+        progress.modified.update(['first-topic.dita', 'second-topic.dita'])
+
+        self.assertEqual(progress.describe(102.0), 'process: 4/10 files, 2.0 files/s, 4.0 MB/s, ETA 0:03, 2 modified')
+
+    def test_describe_unknown_total(self):
+        progress = Progress(interactive=False)
+
+        with patch('time.monotonic', return_value=100.0):
+            progress.start('walk')
+
+        progress.files = 30
+
+        self.assertEqual(progress.describe(110.0), 'walk: 30 files, 3.0 files/s, 0 modified')
+
+    def test_log_lines(self):
+        progress = Progress(interactive=False, interval=0)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            progress.start('process', 2)
+            progress.update()
+            progress.update()
+            progress.start('xref', 1)
+            progress.finish()
+
+        lines = err.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 4)
+        self.assertRegex(lines[0], rf'^{NAME}: process: 1/2 files, ')
+        self.assertRegex(lines[2], rf'^{NAME}: process: 2/2 files, .*, 0 modified$')
+        self.assertRegex(lines[3], rf'^{NAME}: xref: 0/1 files, ')
+
+    def test_status_line(self):
+        progress = Progress(interactive=True, interval=3600)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            progress.start('process', 100)
+
+            for i in range(100):
+                progress.update()
+
+            progress.finish()
+
+        self.assertEqual(err.getvalue().count('\r'), 1)
+        self.assertRegex(err.getvalue(), rf'^\r{NAME}: process: 100/100 files, .*\x1b\[K\n$')
+
+    def test_modified_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir, 'topic.dita')
+            file_path.write_text('<concept id="topic-id" />')
+            progress = Progress(interactive=False, interval=3600)
+
+            progress.start('process', 2)
+            progress.update(file_path, True)
+            progress.start('xref', 1)
+            progress.update(file_path, True)
+
+            self.assertEqual(progress.size, file_path.stat().st_size)
+            self.assertEqual(progress.modified, {str(file_path)})
+
+    def test_events(self):
+        progress = Progress(interactive=False, interval=3600)
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            progress(Event('phase_start', 'xref', files=3))
+            progress(Event('file_start', file_path='topic.dita'))
+            progress(Event('file_end', file_path='topic.dita', updated=True))
+            progress(Event('warning', 'test message'))
+            progress(Event('phase_end', 'xref'))
+
+        self.assertEqual(progress.files, 1)
+        self.assertEqual(progress.modified, {'topic.dita'})
+        self.assertRegex(err.getvalue(), rf'^{NAME}: xref: 1/3 files, .*, 1 modified\n$')
+
+    def test_catalog_ids_phases(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            Path(temp_dir, 'first-topic.dita').write_text('<concept id="first-topic-id" />')
+            Path(temp_dir, 'second-topic.dita').write_text('<concept id="second-topic-id" />')
+            progress = Progress(interactive=False, interval=3600)
+
+            register(progress)
+
+            with contextlib.redirect_stderr(StringIO()) as err:
+                catalog_ids(temp_dir)
+
+            unregister(progress)
+
+        lines = err.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertRegex(lines[0], rf'^{NAME}: walk: 2 files, ')
+        self.assertRegex(lines[1], rf'^{NAME}: catalog: 2/2 files, ')
@@ -0,0 +1,129 @@
+import unittest
+import contextlib
+import pytest
+import gc
+import math
+import time
+from io import BytesIO, StringIO
+from lxml import etree
+from pathlib import Path
+from src.dita.cleanup.catalog import Catalog
+from src.dita.cleanup.patch import patch_source, snapshot_attributes
+from src.dita.cleanup.xml import list_ids, prune_ids, prune_xrefs, rebuild_text, \
+     replace_attributes, update_xref_targets
+
+# Growth exponents fitted on a log-log scale: a linear function has an
+# exponent close to 1 and a quadratic one close to 2 regardless of the
+# speed of the machine; a lookup that does not depend on the size of the
+# catalog has an exponent close to 0. The limits leave room for noisy
+# timings, and the tests can be left out with -m 'not timing':
+LINEAR    = 1.6
+SUBLINEAR = 0.6
+SIZES     = [1000, 2000, 4000, 8000]
+REPEAT    = 3
+
+def measure(function, setup, size):
+    timings = []
+
+    for i in range(REPEAT):
+        arguments = setup(size)
+        gc.disable()
+        start = time.perf_counter()
+        function(*arguments)
+        timings.append(time.perf_counter() - start)
+        gc.enable()
+
+    return min(timings)
+
+def growth_exponent(function, setup, sizes=SIZES):
+    x = [math.log(size) for size in sizes]
+    y = [math.log(max(measure(function, setup, size), 1e-9)) for size in sizes]
+    mean_x = sum(x) / len(x)
+    mean_y = sum(y) / len(y)
+
+    return sum((a - mean_x) * (b - mean_y) for a, b in zip(x, y)) / sum((a - mean_x) ** 2 for a in x)
+
+def parse(text):
+    return etree.parse(StringIO(text))
+
+def create_catalog(size):
+    catalog = Catalog()
+
+    for index in range(size):
+        catalog.add_file(Path(f'topic-{index}.dita'), [f'topic-{index}'] + [f'section-{index}-{i}' for i in range(10)])
+
+    return catalog
+
+@pytest.mark.timing
+class TestDitaCleanupScaling(unittest.TestCase):
+    def assertGrowth(self, function, setup, limit, sizes=SIZES):
+        exponent = growth_exponent(function, setup, sizes)
+
+        if exponent >= limit:
+            exponent = growth_exponent(function, setup, sizes)
+
+        self.assertLess(exponent, limit, f'{function.__name__}: growth exponent {exponent:.2f}')
+
+    def test_replace_attributes_text(self):
+        self.assertGrowth(replace_attributes, lambda n: (parse('<concept id="topic-id"><p>' + 'Text {attribute} ' * n + '</p></concept>'), 'attributes.dita#attributes'), LINEAR)
+
+    def test_replace_attributes_tail(self):
+        self.assertGrowth(replace_attributes, lambda n: (parse('<concept id="topic-id"><p>' + '<b>bold</b> text {attribute} ' * n + '</p></concept>'), 'attributes.dita#attributes'), LINEAR)
+
+    def test_replace_attributes_known_attributes(self):
+        self.assertGrowth(replace_attributes, lambda n: (parse('<concept id="topic-id"><p>' + 'Text {attribute} {known} ' * n + '</p></concept>'), 'attributes.dita#attributes', {'known': 'value'}), LINEAR)
+
+    def test_rebuild_text(self):
+        self.assertGrowth(rebuild_text, lambda n: ('Text {attribute} ' * n, 'attributes.dita#attributes/'), LINEAR)
+
+    def test_list_ids(self):
+        self.assertGrowth(list_ids, lambda n: (parse('<concept id="topic-id">' + ''.join(f'<p id="p-{i}">Text</p>' for i in range(n)) + '</concept>'),), LINEAR)
+
+    def test_prune_ids(self):
+        self.assertGrowth(prune_ids, lambda n: (parse('<concept id="topic-id">' + ''.join(f'<p id="p-{i}_{{context}}">Text</p>' for i in range(n)) + '</concept>'),), LINEAR)
+
+    def test_prune_xrefs(self):
+        self.assertGrowth(prune_xrefs, lambda n: (parse('<concept id="topic-id"><p>' + ''.join(f'<xref href="#p-{i}_{{context}}" />' for i in range(n)) + '</p></concept>'),), LINEAR)
+
+    def test_catalog_remove_file(self):
+        def remove_files(catalog):
+            for index in range(0, 1000, 10):
+                catalog.remove_file(Path(f'topic-{index}.dita'))
+
+        # The first removal builds the index of file paths:
+        def setup(n):
+            catalog = create_catalog(n)
+            catalog.remove_file(Path('missing.dita'))
+            return (catalog,)
+
+        self.assertGrowth(remove_files, setup, SUBLINEAR)
+
+    def test_update_xref_targets_xrefs(self):
+        catalog = create_catalog(1000)
+
+        def setup(n):
+            xml = parse('<concept id="topic-0"><p>' + ''.join(f'<xref href="#section-{i % 1000}-{i % 10}_context" />' for i in range(n)) + '</p></concept>')
+            return xml, catalog, Path('topic-0.dita')
+
+        with contextlib.redirect_stderr(StringIO()):
+            self.assertGrowth(update_xref_targets, setup, LINEAR)
+
+    def test_update_xref_targets_catalog(self):
+        catalogs = {size: create_catalog(size) for size in SIZES}
+
+        def setup(n):
+            xml = parse('<concept id="topic-0"><p>' + ''.join(f'<xref href="#section-{i % 1000}-{i % 10}_context" />' for i in range(1000)) + '</p></concept>')
+            return xml, catalogs[n], Path('topic-0.dita')
+
+        with contextlib.redirect_stderr(StringIO()):
+            self.assertGrowth(update_xref_targets, setup, SUBLINEAR)
+
+    def test_patch_source(self):
+        def setup(n):
+            data = ('<concept id="topic-id"><p>' + ''.join(f'<xref href="#p-{i}_{{context}}" />' for i in range(n)) + '</p></concept>').encode('utf-8')
+            xml = etree.parse(BytesIO(data))
+            snapshot = snapshot_attributes(xml)
+            prune_xrefs(xml)
+            return data, xml, snapshot
+
+        self.assertGrowth(patch_source, setup, LINEAR)
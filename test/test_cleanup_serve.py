@@ -0,0 +1,170 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from unittest.mock import patch
+from src.dita.cleanup import NAME
+from src.dita.cleanup.client import send_request
+from src.dita.cleanup.serve import CatalogCache, handle_request
+
+TOPIC = '''\
+<concept id="{topic_id}">
+    <title>Topic</title>
+    <conbody>
+        <p id="{topic_id}-para"><xref href="{href}" /></p>
+    </conbody>
+</concept>
+'''
+
+class TestDitaCleanupServe(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name).resolve()
+        self.first = Path(self.directory, 'first.dita')
+        self.second = Path(self.directory, 'second.dita')
+        self.first.write_text(TOPIC.format(topic_id='first', href='#second-para'))
+        self.second.write_text(TOPIC.format(topic_id='second', href='#first-para'))
+        self.cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def test_catalog_cache(self):
+        cache = CatalogCache(self.directory)
+
+        self.assertCountEqual(cache.refresh(), [self.first, self.second])
+        self.assertEqual(cache.catalog['second-para'], ('second', self.second))
+        self.assertEqual(cache.refresh(), [])
+
+        self.second.write_text(TOPIC.format(topic_id='renamed', href='#first-para'))
+        self.second.unlink()
+        third = Path(self.directory, 'third.dita')
+        third.write_text(TOPIC.format(topic_id='third', href='#first-para'))
+
+        self.assertCountEqual(cache.refresh(), [self.second, third])
+        self.assertNotIn('second-para', cache.catalog)
+        self.assertEqual(cache.catalog['third-para'], ('third', third))
+        self.assertEqual(cache.catalog['first-para'], ('first', self.first))
+
+    def test_catalog_cache_rescan_interval(self):
+        cache = CatalogCache(self.directory, interval=3600)
+        cache.refresh()
+
+        self.second.write_text(TOPIC.format(topic_id='edited', href='#first-para'))
+
+        with patch.object(Path, 'walk') as walk:
+            self.assertEqual(cache.refresh(), [])
+
+        walk.assert_not_called()
+
+        cache.interval = 0
+
+        self.assertEqual(cache.refresh(), [self.second])
+        self.assertEqual(cache.catalog['edited-para'], ('edited', self.second))
+
+    def test_handle_request(self):
+        cache = CatalogCache(self.directory)
+        cache.refresh()
+
+        with patch.object(etree, 'parse', wraps=etree.parse) as parse:
+            response = handle_request({'argv': ['-X', '.', 'first.dita'], 'cwd': str(self.directory)}, {cache.directory: cache})
+
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(response['exit_code'], 0)
+        self.assertEqual(response['stderr'], '')
+        self.assertIn('href="second.dita#second/second-para"', self.first.read_text())
+
+    def test_handle_request_document(self):
+        response = handle_request({
+            'argv': ['-X', '.'],
+            'cwd': str(self.directory),
+            'name': str(self.first),
+            'document': TOPIC.format(topic_id='first', href='#missing-para'),
+        }, {})
+
+        self.assertEqual(response['exit_code'], 0)
+        self.assertIn('<xref href="#missing-para"/>', response['stdout'])
+        self.assertEqual(response['warnings'], [{'file': str(self.first), 'message': f'{self.first}: No matching ID: missing-para'}])
+        self.assertEqual(response['stderr'], f'{NAME}: {self.first}: No matching ID: missing-para\n')
+        self.assertEqual(sorted(p.name for p in self.directory.iterdir()), ['first.dita', 'second.dita'])
+        self.assertIn('#second-para', self.first.read_text())
+
+    def test_handle_request_duplicate_ids(self):
+        Path(self.directory, 'copy.dita').write_text(TOPIC.format(topic_id='first', href='#second-para'))
+
+        cache = CatalogCache(self.directory)
+
+        with patch('sys.stderr', StringIO()) as err:
+            cache.refresh()
+
+        self.assertEqual(err.getvalue(), '')
+
+        for argv in (['--check', '-X', '.', 'second.dita'], ['-X', '.', 'second.dita']):
+            expected = handle_request({'argv': argv, 'cwd': str(self.directory)}, {})
+            response = handle_request({'argv': argv, 'cwd': str(self.directory)}, {cache.directory: cache})
+
+            self.assertRegex(expected['stderr'], 'Duplicate ID: first')
+            self.assertCountEqual(response['stderr'].splitlines(), expected['stderr'].splitlines())
+            self.assertCountEqual(response['warnings'], expected['warnings'])
+
+    def test_handle_request_metrics_and_profile(self):
+        cache = CatalogCache(self.directory)
+        cache.refresh()
+
+        response = handle_request({'argv': ['-X', '.', '--metrics-file', 'run.prom', '--profile-out', 'profiles', 'first.dita'], 'cwd': str(self.directory)}, {cache.directory: cache})
+
+        self.assertEqual(response['exit_code'], 0)
+        self.assertIn('dita_cleanup_files_total{state="processed"} 1\n', Path(self.directory, 'run.prom').read_text())
+        self.assertTrue(Path(self.directory, 'profiles', 'xref.prof').is_file())
+
+    def test_handle_request_invalid_arguments(self):
+        response = handle_request({'argv': ['--jobs', '0', 'first.dita']}, {})
+
+        self.assertEqual(response['exit_code'], 22)
+        self.assertEqual(response['stderr'], f"{NAME}: Invalid number of jobs: '0'\n")
+
+    def test_client_imports(self):
+        root = Path(__file__).resolve().parent.parent
+        result = subprocess.run([sys.executable, '-c', 'import sys; import src.dita.cleanup.client; print(sorted(m for m in ("lxml", "src.dita.cleanup.cli") if m in sys.modules))'], cwd=root, capture_output=True, text=True)
+
+        self.assertEqual(result.stdout, '[]\n')
+
+    def test_server(self):
+        socket_path = Path(self.directory, 'cleanup.sock')
+        root = Path(__file__).resolve().parent.parent
+
+        server = subprocess.Popen([sys.executable, '-c', 'from src.dita.cleanup.cli import run; run()', 'serve', '-X', str(self.directory), str(socket_path)], cwd=root, stderr=subprocess.DEVNULL)
+
+        self.first.write_text(TOPIC.format(topic_id='first', href='second.dita#second/second-para'))
+        self.second.write_text(TOPIC.format(topic_id='second', href='first.dita#first/first-para'))
+
+        try:
+            for i in range(100):
+                if socket_path.exists():
+                    break
+                time.sleep(0.05)
+
+            response = send_request(socket_path, {'argv': ['--check', '-X', '.', 'first.dita', 'second.dita'], 'cwd': str(self.directory)})
+            self.assertEqual(response['exit_code'], 0)
+
+            third = Path(self.directory, 'third.dita')
+            third.write_text(TOPIC.format(topic_id='third', href='first.dita#first/first-para'))
+            self.second.write_text(TOPIC.format(topic_id='second', href='third.dita#third/third-para'))
+
+            response = send_request(socket_path, {'argv': ['--check', '-X', '.', 'second.dita'], 'cwd': str(self.directory)})
+            self.assertEqual(response['exit_code'], 0)
+
+            third.unlink()
+
+            response = send_request(socket_path, {'argv': ['--check', '-X', '.', 'second.dita'], 'cwd': str(self.directory)})
+            self.assertNotEqual(response['exit_code'], 0)
+            self.assertEqual([w['message'] for w in response['warnings']], ['second.dita: Broken link: third.dita#third/third-para'])
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,150 @@
+import unittest
+import contextlib
+import io
+import sys
+import tempfile
+from errno import EINVAL
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from unittest.mock import patch
+from src.dita.cleanup import cli
+from src.dita.cleanup.stream import scan_xml, stream_file, stream_xml
+from src.dita.cleanup.xml import list_ids, list_links, prune_id, prune_ids
+
+TOPIC = '''\
+<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE concept PUBLIC "-//OASIS//DTD DITA Concept//EN" "concept.dtd">
+<!-- Generated -->
+<concept xmlns:ditaarch="http://dita.oasis-open.org/architecture/2005/" ditaarch:DITAArchVersion="1.3" id="topic-id_{context}">
+    <title>Topic &amp; title é</title>
+    <conbody>
+        <p id="_internal">Text <b>bold</b> tail <xref href="#other-id_{context}" /> more<?pi data?><!-- note --> end</p>
+        <p id="para-id_{context}" />
+        <p></p>
+        <xref href="https://example.com" scope="external" />
+    </conbody>
+</concept>
+<!-- End -->
+'''
+
+class TestDitaCleanupStream(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        self.topic = Path(self.directory, 'topic.dita')
+        self.topic.write_text(TOPIC)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stream_xml_unchanged(self):
+        data = io.BytesIO()
+
+        self.assertFalse(stream_xml(self.topic, data, lambda e: False))
+        self.assertEqual(data.getvalue(), etree.tostring(etree.parse(self.topic)))
+
+    def test_stream_xml_transform(self):
+        data = io.BytesIO()
+        xml  = etree.parse(self.topic)
+
+        self.assertTrue(stream_xml(self.topic, data, prune_id))
+        self.assertTrue(prune_ids(xml))
+        self.assertEqual(data.getvalue(), etree.tostring(xml))
+
+    def test_stream_xml_namespaced_attributes(self):
+        self.topic.write_text('''\
+<concept xmlns:ditaarch="http://dita.oasis-open.org/architecture/2005/" xml:lang="en" id="topic-id_{context}">
+    <title xml:lang="en-us">Title</title>
+    <conbody><p ditaarch:DITAArchVersion="1.3" xml:space="preserve"/><p xmlns:x="urn:x" x:a="&quot;&#10;"><b x:b="1">b</b></p></conbody>
+</concept>
+''')
+        data = io.BytesIO()
+        xml  = etree.parse(self.topic)
+
+        self.assertTrue(stream_xml(self.topic, data, prune_id))
+        self.assertTrue(prune_ids(xml))
+        self.assertEqual(data.getvalue(), etree.tostring(xml))
+        self.assertEqual(etree.fromstring(data.getvalue()).get('{http://www.w3.org/XML/1998/namespace}lang'), 'en')
+
+    def test_stream_xml_bounded_memory(self):
+        sections = ''.join(f'<section id="section-{i}"><title>Section {i}</title><p>Text <b>{i}</b></p></section>' for i in range(20000))
+        self.topic.write_text(f'<reference id="topic-id"><title>Topic</title><refbody>{sections}</refbody></reference>')
+        counts = []
+
+        def transform(e):
+            if e.get('id', '').endswith('000'):
+                counts.append(sum(1 for _ in e.getroottree().iter()))
+            return False
+
+        for target in (io.BytesIO(), None):
+            counts.clear()
+            stream_xml(self.topic, target, transform)
+
+            # Only the ancestors and the elements from the current parser
+            # buffer are kept in memory:
+            self.assertEqual(len(counts), 19)
+            self.assertLess(max(counts), 4000)
+
+    def test_scan_xml(self):
+        xml = etree.parse(self.topic)
+        prune_ids(xml)
+
+        self.assertEqual(scan_xml(self.topic, True), (list_ids(xml), list_links(xml)))
+
+    def test_stream_file_in_place(self):
+        self.topic.chmod(0o640)
+
+        self.assertFalse(stream_file(self.topic, None, lambda e: False))
+        self.assertEqual(self.topic.read_text(), TOPIC)
+
+        self.assertTrue(stream_file(self.topic, None, prune_id))
+        self.assertIn('id="topic-id"', self.topic.read_text())
+        self.assertEqual(self.topic.stat().st_mode & 0o777, 0o640)
+        self.assertEqual(list(self.directory.iterdir()), [self.topic])
+
+    def test_stream_file_invalid(self):
+        self.topic.write_text('<concept id="topic-id"><title>Title</concept>')
+
+        with self.assertRaises(etree.XMLSyntaxError):
+            stream_file(self.topic, None, prune_id)
+
+        self.assertEqual(list(self.directory.iterdir()), [self.topic])
+
+    def test_process_files(self):
+        other = Path(self.directory, 'other.dita')
+        other.write_text('<concept id="other-id_{context}"><title>Other</title></concept>')
+        expected = Path(self.directory, 'expected')
+        expected.mkdir()
+
+        for file_path in (self.topic, other):
+            Path(expected, file_path.name).write_text(file_path.read_text())
+
+        with contextlib.redirect_stderr(StringIO()):
+            cli.process_files(cli.parse_args(['-i', '-X', str(expected), *map(str, expected.glob('*.dita'))]))
+            exit_code = cli.process_files(cli.parse_args(['--stream', '-i', '-X', str(self.directory), str(self.topic), str(other)]))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(self.topic.read_text(), Path(expected, 'topic.dita').read_text())
+        self.assertIn('href="other.dita#other-id"', self.topic.read_text())
+
+    def test_process_files_stdout(self):
+        stdout = io.TextIOWrapper(io.BytesIO())
+
+        with patch.object(sys, 'stdout', stdout):
+            exit_code = cli.process_files(cli.parse_args(['--stream', '-i', '-o', '-', str(self.topic)]))
+
+        stdout.flush()
+
+        self.assertEqual(exit_code, 0)
+        self.assertIn(b'<concept xmlns:ditaarch', stdout.buffer.getvalue())
+        self.assertIn(b'id="topic-id"', stdout.buffer.getvalue())
+        self.assertEqual(self.topic.read_text(), TOPIC)
+
+    def test_unsupported_options(self):
+        for option in (['-C', 'attributes.dita#attributes'], ['--patch'], ['--verbose']):
+            with self.assertRaises(SystemExit) as cm,\
+                 contextlib.redirect_stderr(StringIO()):
+                cli.parse_args(['--stream', *option, 'topic.dita'])
+
+            self.assertEqual(cm.exception.code, EINVAL)
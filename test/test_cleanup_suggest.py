@@ -0,0 +1,53 @@
+import unittest
+from src.dita.cleanup.suggest import SuggestionIndex, edit_distance, \
+     normalize_id
+
+class TestDitaCleanupSuggest(unittest.TestCase):
+    def test_normalize_id(self):
+        self.assertEqual(normalize_id('Section-ID_{context}'), 'section-id')
+        self.assertEqual(normalize_id('phrase-id-{counter:seq1:1}'), 'phrase-id')
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance('installing', 'installing', 2), 0)
+        self.assertEqual(edit_distance('instaling', 'installing', 2), 1)
+        self.assertEqual(edit_distance('installnig', 'installing', 2), 2)
+        self.assertEqual(edit_distance('configuring', 'installing', 2), 3)
+
+    def test_suggest_typo(self):
+        index = SuggestionIndex(['installing-the-product', 'configuring-the-product', 'removing-the-product'])
+
+        self.assertEqual(index.suggest('instaling-the-product'), ['installing-the-product'])
+
+    def test_suggest_context_suffix(self):
+        index = SuggestionIndex(['proc_installing-the-product', 'proc_configuring-the-product'])
+
+        self.assertEqual(index.suggest('proc_instaling-the-product_assembly-context'), ['proc_installing-the-product'])
+
+    def test_suggest_attribute_fragment(self):
+        index = SuggestionIndex(['installing-the-product', 'configuring-the-product'])
+
+        self.assertEqual(index.suggest('installing-{product}-the-product'), ['installing-the-product'])
+
+    def test_suggest_ordered_by_distance(self):
+        index = SuggestionIndex(['section-ids', 'section-id', 'section-idxyz'])
+
+        self.assertEqual(index.suggest('section-idx'), ['section-id', 'section-ids', 'section-idxyz'])
+        self.assertEqual(index.suggest('section-idx', 1), ['section-id'])
+
+    def test_suggest_no_match(self):
+        index = SuggestionIndex(['installing-the-product', 'configuring-the-product'])
+
+        self.assertEqual(index.suggest('release-notes'), [])
+
+    def test_suggest_empty_index(self):
+        index = SuggestionIndex([])
+
+        self.assertEqual(index.suggest('release-notes'), [])
+
+    def test_suggest_large_index(self):
+        ids = [f'proc_task-{i:05d}' for i in range(100000)]
+        ids.append('proc_installing-the-product')
+        index = SuggestionIndex(ids)
+
+        self.assertEqual(index.suggest('proc_instaling-the-product_assembly'), ['proc_installing-the-product'])
+        self.assertEqual(index.suggest('proc_task-1234_assembly')[0], 'proc_task-01234')
@@ -0,0 +1,147 @@
+import unittest
+import pickle
+import tempfile
+from io import StringIO
+from lxml import etree
+from pathlib import Path
+from unittest.mock import patch
+from src.dita.cleanup.validate import Validator
+
+DTD = '''\
+<!ELEMENT concept (title, conbody?)>
+<!ATTLIST concept id ID #REQUIRED>
+<!ELEMENT title (#PCDATA)>
+<!ELEMENT conbody (#PCDATA)>
+'''
+
+CATALOG = '''\
+<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+    <group xml:base="dtd/">
+        <public publicId="-//OASIS//DTD DITA Concept//EN" uri="concept.dtd" />
+    </group>
+    <rewriteSystem systemIdStartString="https://example.com/dita/" rewritePrefix="dtd/" />
+    <nextCatalog catalog="other/catalog.xml" />
+</catalog>
+'''
+
+OTHER_CATALOG = '''\
+<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+    <system systemId="task.dtd" uri="../dtd/concept.dtd" />
+</catalog>
+'''
+
+MODULAR_DTD = '''\
+<!ENTITY % concept-dec PUBLIC "-//OASIS//ELEMENTS DITA Concept//EN" "https://example.org/dita/concept.mod">
+%concept-dec;
+<!ELEMENT concept (title, conbody?)>
+<!ATTLIST concept id ID #REQUIRED>
+'''
+
+MODULE = '''\
+<!ELEMENT title (#PCDATA)>
+<!ELEMENT conbody (#PCDATA)>
+'''
+
+MODULE_CATALOG = '''\
+<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+    <public publicId="-//OASIS//ELEMENTS DITA Concept//EN" uri="../dtd/concept.mod" />
+</catalog>
+'''
+
+VALID_TOPIC = '''\
+<!DOCTYPE concept PUBLIC "-//OASIS//DTD DITA Concept//EN" "concept.dtd">
+<concept id="topic-id"><title>Title</title></concept>
+'''
+
+INVALID_TOPIC = '''\
+<!DOCTYPE concept PUBLIC "-//OASIS//DTD DITA Concept//EN" "concept.dtd">
+<concept id="topic-id">
+    <conbody>Body</conbody>
+</concept>
+'''
+
+class TestDitaCleanupValidate(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+        Path(self.directory, 'dtd').mkdir()
+        Path(self.directory, 'other').mkdir()
+        Path(self.directory, 'dtd', 'concept.dtd').write_text(DTD)
+        Path(self.directory, 'other', 'catalog.xml').write_text(OTHER_CATALOG)
+        self.catalog_file = Path(self.directory, 'catalog.xml')
+        self.catalog_file.write_text(CATALOG)
+        self.file_path = Path(self.directory, 'topics', 'topic.dita')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_resolve(self):
+        validator = Validator([self.catalog_file])
+        dtd_path = Path(self.directory, 'dtd', 'concept.dtd').resolve()
+
+        self.assertEqual(validator.resolve('-//OASIS//DTD DITA Concept//EN', 'concept.dtd', self.file_path), dtd_path)
+        self.assertEqual(validator.resolve(None, 'https://example.com/dita/concept.dtd', self.file_path), dtd_path)
+        self.assertEqual(validator.resolve(None, 'task.dtd', self.file_path), dtd_path)
+        self.assertEqual(validator.resolve(None, 'local.dtd', self.file_path), Path(self.directory, 'topics', 'local.dtd'))
+        self.assertIsNone(validator.resolve(None, 'https://example.org/topic.dtd', self.file_path))
+
+    def test_validate(self):
+        validator = Validator([self.catalog_file])
+
+        self.assertEqual(validator.validate(etree.parse(StringIO(VALID_TOPIC)), self.file_path), [])
+
+    def test_validate_invalid_content(self):
+        validator = Validator([self.catalog_file])
+        messages = validator.validate(etree.parse(StringIO(INVALID_TOPIC)), self.file_path)
+
+        self.assertEqual(len(messages), 1)
+        self.assertRegex(messages[0], r'topic\.dita:2: Invalid content: Element concept content does not follow the DTD')
+
+    def test_validate_missing_doctype(self):
+        validator = Validator([self.catalog_file])
+
+        self.assertEqual(validator.validate(etree.parse(StringIO('<concept id="topic-id" />')), self.file_path), [
+            f'{self.file_path}: Missing document type declaration'
+        ])
+
+    def test_validate_unresolved_dtd(self):
+        validator = Validator()
+        xml = etree.parse(StringIO('<!DOCTYPE concept SYSTEM "https://example.org/concept.dtd"><concept id="topic-id" />'))
+
+        self.assertEqual(validator.validate(xml, self.file_path), [
+            f'{self.file_path}: Cannot resolve DTD: https://example.org/concept.dtd'
+        ])
+
+    def test_validate_loads_dtd_once(self):
+        validator = Validator([self.catalog_file])
+
+        with patch.object(etree, 'XMLParser', wraps=etree.XMLParser) as parser:
+            for topic in [VALID_TOPIC, INVALID_TOPIC, VALID_TOPIC]:
+                validator.validate(etree.parse(StringIO(topic)), self.file_path)
+
+        self.assertEqual(parser.call_count, 1)
+
+    def test_validate_modules_through_catalog(self):
+        Path(self.directory, 'dtd', 'concept.dtd').write_text(MODULAR_DTD)
+        Path(self.directory, 'dtd', 'concept.mod').write_text(MODULE)
+        Path(self.directory, 'other', 'catalog.xml').write_text(MODULE_CATALOG)
+        validator = Validator([self.catalog_file])
+
+        self.assertEqual(validator.validate(etree.parse(StringIO(VALID_TOPIC)), self.file_path), [])
+        self.assertEqual(len(validator.validate(etree.parse(StringIO(INVALID_TOPIC)), self.file_path)), 1)
+
+    def test_validate_modules_without_network(self):
+        Path(self.directory, 'dtd', 'concept.dtd').write_text(MODULAR_DTD)
+        validator = Validator([self.catalog_file])
+        messages  = validator.validate(etree.parse(StringIO(VALID_TOPIC)), self.file_path)
+
+        self.assertEqual(len(messages), 1)
+        self.assertRegex(messages[0], r'topic\.dita:2: Invalid content: No declaration for element title')
+
+    def test_pickle(self):
+        validator = Validator([self.catalog_file])
+        validator.validate(etree.parse(StringIO(VALID_TOPIC)), self.file_path)
+        copy = pickle.loads(pickle.dumps(validator))
+
+        self.assertEqual(copy.catalog_files, [self.catalog_file])
+        self.assertEqual(copy.validate(etree.parse(StringIO(VALID_TOPIC)), self.file_path), [])
@@ -5,11 +5,42 @@ from lxml import etree
 from pathlib import Path
 from unittest.mock import patch
 from src.dita.cleanup import NAME
-from src.dita.cleanup.xml import list_ids, prune_ids, prune_xrefs, \
-     replace_attributes, report_problems, update_image_paths, \
+from src.dita.cleanup.suggest import SuggestionIndex
+from src.dita.cleanup.xml import list_attribute_references, list_conrefs, list_ids, \
+     match_ids, prune_ids, prune_xrefs, replace_attributes, report_problems, update_image_paths, \
      update_xref_targets
 
 class TestDitaCleanupXML(unittest.TestCase):
+    def test_list_attribute_references(self):
+        references = list_attribute_references('{first} ${second} id_{third} {set:fourth:1} {counter:fifth} {counter2:sixth}')
+
+        self.assertEqual(references, [
+            ('attribute', 'first'),
+            ('attribute', 'third'),
+            ('set', 'set:fourth:1'),
+            ('counter', 'counter:fifth'),
+            ('counter', 'counter2:sixth'),
+        ])
+
+    def test_list_attribute_references_no_references(self):
+        self.assertEqual(list_attribute_references(None), [])
+        self.assertEqual(list_attribute_references(''), [])
+        self.assertEqual(list_attribute_references('A {} sentence {with spaces}.'), [])
+
+    def test_list_conrefs(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id">
+            <title>Concept title</title>
+            <conbody>
+                <p><ph conref="attributes.dita#attributes/first" /> <ph conref="other.dita#attributes/second" /></p>
+                <p><ph conref="attributes.dita#attributes/third" /> <ph>A phrase</ph></p>
+            </conbody>
+        </concept>
+        '''))
+
+        self.assertEqual(list_conrefs(xml, 'attributes.dita#attributes'), ['first', 'third'])
+        self.assertEqual(list_conrefs(xml, 'attributes.dita#attributes/'), ['first', 'third'])
+
     def test_list_ids(self):
         xml = etree.parse(StringIO('''\
         <concept id="topic-id">
@@ -88,6 +119,19 @@ class TestDitaCleanupXML(unittest.TestCase):
 
         self.assertEqual(len(ids), 0)
 
+    def test_match_ids(self):
+        ids = {
+            'first-id': ('topic-id', Path('topic.dita')),
+            'first-id_assembly': ('topic-id', Path('topic.dita')),
+            'second-id': ('topic-id', Path('topic.dita')),
+        }
+
+        self.assertEqual(match_ids('first-id', ids), ['first-id'])
+        self.assertEqual(match_ids('second-id_assembly-context', ids), ['second-id'])
+        self.assertEqual(match_ids('first-id_assembly_context', ids), ['first-id', 'first-id_assembly'])
+        self.assertEqual(match_ids('third-id', ids), [])
+        self.assertEqual(match_ids('second-id-context', ids), [])
+
     def test_prune_ids(self):
         xml = etree.parse(StringIO('''\
         <concept id="topic-id_{context}">
@@ -125,6 +169,38 @@ class TestDitaCleanupXML(unittest.TestCase):
 
         self.assertFalse(updated)
 
+    def test_prune_ids_invalid_without_references(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id">
+            <title>Concept title</title>
+            <conbody>
+                <section id="section id">
+                    <title>Section title</title>
+                </section>
+            </conbody>
+        </concept>
+        '''))
+
+        updated = prune_ids(xml)
+
+        self.assertFalse(updated)
+        self.assertTrue(xml.xpath('boolean(/concept/conbody/section[@id="section id"])'))
+
+    def test_prune_ids_dollar_sign(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id${context}">
+            <title>Concept title</title>
+            <conbody>
+                <p><xref href="#topic-id${context}">Reference</xref></p>
+            </conbody>
+        </concept>
+        '''))
+
+        self.assertTrue(prune_ids(xml))
+        self.assertTrue(prune_xrefs(xml))
+        self.assertTrue(xml.xpath('boolean(/concept[@id="topic-id$"])'))
+        self.assertTrue(xml.xpath('boolean(/concept/conbody/p/xref[@href="#topic-id$"])'))
+
     def test_prune_xrefs(self):
         xml = etree.parse(StringIO('''\
         <concept id="topic-id">
@@ -205,6 +281,23 @@ class TestDitaCleanupXML(unittest.TestCase):
         self.assertTrue(updated)
         self.assertTrue(xml.xpath('boolean(/concept/conbody/p/ph[@conref="topic.dita#topic-id/first-attribute"])'))
 
+    def test_replace_attributes_escaped(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id">
+            <title>Concept title</title>
+            <conbody>
+                <p>first part ${first-attribute} second part {first-attribute} third part</p>
+            </conbody>
+        </concept>
+        '''))
+
+        updated = replace_attributes(xml, 'topic.dita#topic-id')
+
+        self.assertTrue(updated)
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/text()[1]')[0]).strip(), 'first part ${first-attribute} second part')
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/text()[2]')[0]).strip(), 'third part')
+        self.assertEqual(len(xml.xpath('/concept/conbody/p/ph')), 1)
+
     def test_replace_attributes_no_attributes(self):
         xml = etree.parse(StringIO('''\
         <concept id="topic-id">
@@ -220,6 +313,44 @@ class TestDitaCleanupXML(unittest.TestCase):
         self.assertFalse(updated)
         self.assertFalse(xml.xpath('boolean(/concept/conbody/p/ph)'))
 
+    def test_replace_attributes_known_attributes(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id_{context}">
+            <title>Concept title</title>
+            <conbody>
+                <p id="para-{Product}">first part {product} second part {unknown} third part <xref href="{url}/index.html" scope="external" /> {version} fourth part</p>
+            </conbody>
+        </concept>
+        '''))
+
+        updated = replace_attributes(xml, 'topic.dita#topic-id', {'product': 'Product', 'url': 'https://example.com', 'version': '1.0', 'context': 'ctx'})
+
+        self.assertTrue(updated)
+        self.assertEqual(xml.getroot().get('id'), 'topic-id_ctx')
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/@id')[0]), 'para-Product')
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/text()[1]')[0]), 'first part Product second part ')
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/text()[2]')[0]), ' third part ')
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/text()[3]')[0]), ' 1.0 fourth part')
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/xref/@href')[0]), 'https://example.com/index.html')
+        self.assertTrue(xml.xpath('boolean(/concept/conbody/p/ph[@conref="topic.dita#topic-id/unknown"])'))
+
+    def test_replace_attributes_without_conrefs(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id">
+            <title>Concept title</title>
+            <conbody>
+                <p>first part {product} second part {unknown} third part</p>
+            </conbody>
+        </concept>
+        '''))
+
+        updated = replace_attributes(xml, None, {'product': 'Product'})
+
+        self.assertTrue(updated)
+        self.assertEqual(str(xml.xpath('/concept/conbody/p/text()')[0]), 'first part Product second part {unknown} third part')
+        self.assertFalse(xml.xpath('boolean(/concept/conbody/p/ph)'))
+        self.assertFalse(replace_attributes(xml, None, {'product': 'Product'}))
+
     def test_report_problems_attributes(self):
         xml = etree.parse(StringIO('''\
         <concept id="topic-id-{first}">
@@ -250,6 +381,42 @@ class TestDitaCleanupXML(unittest.TestCase):
         self.assertTrue('counter:seq1' in attributes)
         self.assertFalse('fifth' in attributes)
 
+    def test_report_problems_text_and_tail(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id">
+            <title>Concept title</title>
+            <shortdesc>A short description.</shortdesc>
+            <conbody>
+                <p>A paragraph with <b>{first</b>second}.</p>
+                <p><ph>None</ph>{second}</p>
+            </conbody>
+        </concept>
+        '''))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            report_problems(xml, Path('topic.dita'))
+
+        messages = err.getvalue().splitlines()
+
+        self.assertEqual(len(messages), 1)
+        self.assertRegex(messages[0], rf'^{NAME}: topic\.dita: Unresolved attribute reference: second$')
+
+    def test_report_problems_dollar_sign(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id${first}">
+            <title>Concept title</title>
+            <shortdesc>A short description.</shortdesc>
+            <conbody>
+                <p>A shell variable: ${second}</p>
+            </conbody>
+        </concept>
+        '''))
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            report_problems(xml, Path('topic.dita'))
+
+        self.assertEqual(err.getvalue(), f'{NAME}: topic.dita: Unresolved attribute reference: first\n')
+
     def test_report_problems_missing_shortdesc(self):
         xml = etree.parse(StringIO('''\
         <concept id="topic-id">
@@ -488,6 +655,27 @@ class TestDitaCleanupXML(unittest.TestCase):
         self.assertTrue(xml.xpath('boolean(/concept/conbody/p[1]/xref[@href="first-topic.dita#first-topic-id/first-id"])'))
         self.assertRegex(err.getvalue(), rf'^{NAME}: topic\.dita: No matching ID: ')
 
+    def test_update_xref_targets_no_matches_suggestions(self):
+        xml = etree.parse(StringIO('''\
+        <concept id="topic-id">
+            <title>Concept title</title>
+            <conbody>
+                <p><xref href="#secton-id_assembly-context">Reference</xref></p>
+            </conbody>
+        </concept>
+        '''))
+
+        ids = {
+            'first-id': ('first-topic-id', Path('first-topic.dita')),
+            'section-id': ('second-topic-id', Path('second-topic.dita')),
+        }
+
+        with contextlib.redirect_stderr(StringIO()) as err:
+            updated = update_xref_targets(xml, ids, Path('topic.dita'), False, SuggestionIndex(ids))
+
+        self.assertFalse(updated)
+        self.assertRegex(err.getvalue(), rf'^{NAME}: topic\.dita: No matching ID: secton-id_assembly-context, did you mean: section-id$')
+
     def test_update_xref_targets_multiple_matches(self):
         xml = etree.parse(StringIO('''\
         <concept id="topic-id">